@@ -4,41 +4,579 @@ Verrijkt bedrijfsgegevens met data van Ad Hoc Data API.
 """
 
 import os
+import json
+import asyncio
 import requests
+import threading
 import time
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from enrichment_cache import resolve_cache
+from entity_matching import best_match
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp is optioneel - alleen nodig voor AsyncAdHocDataAPI
+    aiohttp = None
+
+BASE_URL = "https://api.adhocdata.nl"
+API_VERSION = "1.0"
+
+# Mogelijke lookup endpoints, in volgorde van proberen
+LOOKUP_PATHS = ["lookup", "search", "companies", "bedrijven"]
+
+
+# Bestand waarin het werkende endpoint bewaard wordt (alleen met persist_endpoint=True)
+ENDPOINT_CACHE_FILE = os.environ.get(
+    'AD_HOC_DATA_ENDPOINT_FILE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'do-scraper', 'adhocdata_endpoint.json')
+)
+
+# Werkend endpoint per base URL + versie, gedeeld door alle clients in dit proces
+_working_endpoints: Dict[str, str] = {}
+_endpoint_lock = threading.Lock()
+
+
+def lookup_endpoints(base_url: str = BASE_URL, api_version: str = API_VERSION) -> List[str]:
+    """Alle kandidaat URLs voor een lookup."""
+    return [f"{base_url}/nl-basis/{api_version}/{path}" for path in LOOKUP_PATHS]
+
+
+def _load_endpoint_file() -> Dict[str, str]:
+    try:
+        with open(ENDPOINT_CACHE_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def remembered_endpoint(base_url: str = BASE_URL, api_version: str = API_VERSION,
+                        persist: bool = False) -> Optional[str]:
+    """Het eerder gevonden werkende endpoint (uit het geheugen, of uit het bestand als persist aan staat)."""
+    key = f"{base_url}|{api_version}"
+    with _endpoint_lock:
+        if key not in _working_endpoints and persist:
+            endpoint = _load_endpoint_file().get(key)
+            if endpoint in lookup_endpoints(base_url, api_version):
+                _working_endpoints[key] = endpoint
+        return _working_endpoints.get(key)
+
+
+def remember_endpoint(endpoint: str, base_url: str = BASE_URL, api_version: str = API_VERSION,
+                      persist: bool = False):
+    """Onthoud het werkende endpoint voor de rest van de sessie (en eventueel op schijf)."""
+    key = f"{base_url}|{api_version}"
+    with _endpoint_lock:
+        if _working_endpoints.get(key) == endpoint:
+            return
+        _working_endpoints[key] = endpoint
+        if not persist:
+            return
+        try:
+            entries = _load_endpoint_file()
+            entries[key] = endpoint
+            os.makedirs(os.path.dirname(ENDPOINT_CACHE_FILE), exist_ok=True)
+            tmp_file = ENDPOINT_CACHE_FILE + '.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump(entries, f, indent=2)
+            os.replace(tmp_file, ENDPOINT_CACHE_FILE)
+        except OSError as e:
+            print(f"⚠️ Kon Ad Hoc Data endpoint niet opslaan: {e}")
+
+
+# Zoveel opeenvolgende fouten (geen 404) van het bekende endpoint voordat de andere opnieuw geprobeerd worden
+KNOWN_ENDPOINT_MAX_FAILURES = 3
+
+
+def endpoint_candidates(base_url: str = BASE_URL, api_version: str = API_VERSION,
+                        persist: bool = False) -> Tuple[Optional[str], List[str]]:
+    """(bekend werkend endpoint of None, overige kandidaten in volgorde)."""
+    known = remembered_endpoint(base_url, api_version, persist)
+    return known, [url for url in lookup_endpoints(base_url, api_version) if url != known]
+
+
+# Rate limiting (per API key). Startwaarde en grenzen zijn te overschrijven via de environment.
+DEFAULT_RATE = float(os.environ.get('AD_HOC_DATA_RATE', 3))          # requests per seconde bij start
+DEFAULT_MIN_RATE = float(os.environ.get('AD_HOC_DATA_MIN_RATE', 0.2))
+DEFAULT_MAX_RATE = float(os.environ.get('AD_HOC_DATA_MAX_RATE', 25))
+THROTTLE_STATUSES = (429, 503)
+# Alleen deze antwoorden laten de rate stijgen; bij andere fouten (401, 403, 500, ...) blijft hij gelijk
+RATE_SUCCESS_STATUSES = (200, 404)
+MAX_THROTTLE_RETRIES = 3
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After header (seconden of HTTP datum) naar seconden."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    Token bucket met AIMD: elke geslaagde request verhoogt de rate lineair, een 429/503 halveert hem
+    en pauzeert de bucket zo lang als Retry-After aangeeft. Zo zoekt de rate zelf het hoogste
+    tempo dat de API volhoudt. Thread-safe; acquire_async voor de async client.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: Optional[float] = None, min_rate: float = DEFAULT_MIN_RATE,
+                 max_rate: float = DEFAULT_MAX_RATE, increase: float = 1.0, decrease: float = 0.5):
+        """
+        Args:
+            rate: startwaarde in requests per seconde
+            burst: maximaal aantal opgespaarde tokens (standaard 1 seconde aan requests)
+            min_rate / max_rate: grenzen voor de aanpassing
+            increase: rate stijgt ongeveer zoveel requests/s per seconde zonder throttling
+            decrease: factor waarmee de rate na throttling vermenigvuldigd wordt
+        """
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.tokens = 1.0
+        self.throttled = 0
+        self.requests = 0
+        self._blocked_until = 0.0
+        self._last_refill = time.monotonic()
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def _capacity(self) -> float:
+        return self.burst if self.burst is not None else max(1.0, self.rate)
+
+    def _reserve(self) -> float:
+        """Reserveer een token. Geeft terug hoe lang de aanroeper moet wachten."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self._capacity(), self.tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            self.requests += 1
+            # Tokens mogen negatief worden: dat zijn reserveringen van wachtende aanroepers
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self._blocked_until - now)
+
+    def acquire(self):
+        """Blokkeer tot er een request gedaan mag worden."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def on_success(self):
+        """Additive increase: ongeveer +increase requests/s per seconde."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        """Multiplicative decrease (hooguit één keer per seconde) en pauze volgens Retry-After."""
+        with self._lock:
+            now = time.monotonic()
+            self.throttled += 1
+            if now - self._last_decrease >= 1.0:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self._last_decrease = now
+            pause = retry_after if retry_after is not None else 1.0 / self.rate
+            self._blocked_until = max(self._blocked_until, now + pause)
+            self.tokens = min(self.tokens, 0.0)
+
+    def stats(self) -> Dict:
+        """Huidige rate en tellers (voor de voortgang in /api/status)."""
+        with self._lock:
+            return {
+                'rate': round(self.rate, 2),
+                'requests': self.requests,
+                'throttled': self.throttled,
+                'paused_for': round(max(0.0, self._blocked_until - time.monotonic()), 1),
+            }
+
+
+# Eén limiter per API key, gedeeld door alle clients (threads, jobs) met die key
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(api_key: str, **kwargs) -> RateLimiter:
+    """Geef de limiter voor een API key (bij eerste gebruik aangemaakt met kwargs)."""
+    with _rate_limiters_lock:
+        if api_key not in _rate_limiters:
+            _rate_limiters[api_key] = RateLimiter(**kwargs)
+        return _rate_limiters[api_key]
+
+
+def configure_rate_limit(api_key: str, **kwargs) -> RateLimiter:
+    """Stel de limiter voor een API key (opnieuw) in, bijv. configure_rate_limit(key, rate=10, max_rate=50)."""
+    with _rate_limiters_lock:
+        _rate_limiters[api_key] = RateLimiter(**kwargs)
+        return _rate_limiters[api_key]
+
+
+# Circuit breaker: na zoveel mislukte lookups op rij wordt de API even overgeslagen
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get('AD_HOC_DATA_BREAKER_FAILURES', 5))
+BREAKER_RESET_TIMEOUT = float(os.environ.get('AD_HOC_DATA_BREAKER_RESET', 60))
+
+# Status van records die door een open circuit (nog) niet verrijkt zijn
+PENDING_ENRICHMENT = 'In afwachting'
+
+
+class CircuitOpenError(Exception):
+    """De lookup is niet uitgevoerd omdat de circuit breaker open staat."""
+
+
+def mark_pending(company_data: Dict) -> Dict:
+    """Kopie van het record gemarkeerd als "in afwachting van verrijking"."""
+    enriched = company_data.copy()
+    enriched['AdHocData_Verrijkt'] = PENDING_ENRICHMENT
+    return enriched
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker rond de lookups.
+    closed: alles gaat door. Na failure_threshold fouten op rij (onbereikbaar, timeouts, 401/403/5xx)
+    gaat hij open: lookups worden direct overgeslagen. Na reset_timeout mag er één probe door
+    (half_open); slaagt die dan gaat hij weer dicht, anders opnieuw open.
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened = 0
+        self.skipped = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def ready_for_probe(self) -> bool:
+        """True als het circuit open is en de wachttijd voorbij is."""
+        with self._lock:
+            return self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout
+
+    def allow(self) -> bool:
+        """Mag er een lookup gedaan worden? In half_open alleen de ene probe."""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._probe_in_flight = False
+            if self.state == "closed" or (self.state == "half_open" and not self._probe_in_flight):
+                self._probe_in_flight = self.state == "half_open"
+                return True
+            self.skipped += 1
+            return False
+
+    def record(self, status: str):
+        """Verwerk de uitkomst van een lookup ("ok"/"not_found" = API bereikbaar, anders fout)."""
+        with self._lock:
+            self._probe_in_flight = False
+            if status in ("ok", "not_found"):
+                if self.state != "closed":
+                    print("✅ Ad Hoc Data API bereikbaar - circuit breaker weer dicht")
+                self.state = "closed"
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+                if self.state == "closed":
+                    print(f"⛔ Ad Hoc Data API faalt ({self.failures}x op rij) - verrijking gepauzeerd, "
+                          f"nieuwe poging over {self.reset_timeout:.0f}s")
+                self.state = "open"
+                self.opened += 1
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'opened': self.opened,
+                'skipped': self.skipped,
+            }
+
+
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(api_key: str, **kwargs) -> CircuitBreaker:
+    """Geef de circuit breaker voor een API key (gedeeld door alle clients met die key)."""
+    with _rate_limiters_lock:
+        if api_key not in _circuit_breakers:
+            _circuit_breakers[api_key] = CircuitBreaker(**kwargs)
+        return _circuit_breakers[api_key]
+
+
+def auth_headers(api_key: str) -> Dict[str, str]:
+    """Headers voor authenticatie. Ad Hoc Data API gebruikt mogelijk een andere methode: stuur beide mee."""
+    return {
+        'Authorization': f'Bearer {api_key}',
+        'X-API-Key': api_key,  # Alternatieve methode
+        'Content-Type': 'application/json',
+        'Accept': 'application/json'
+    }
+
+
+def build_lookup_params(company_name: str, company_address: str = None) -> Dict[str, str]:
+    """Query parameters voor een lookup: naam, en het adres als dat bekend is (betere matching)."""
+    params = {
+        'q': company_name,
+    }
+    # Voeg adres toe als parameter als het beschikbaar is
+    if company_address and company_address != "Niet gevonden":
+        params['address'] = company_address
+        params['adres'] = company_address  # Probeer ook Nederlandse naam
+    return params
+
+
+def precheck_company(company_data: Dict) -> Optional[Dict]:
+    """
+    Check of een bedrijf verrijkt kan worden (naam én adres nodig).
+
+    Returns:
+        None als het bedrijf opgezocht kan worden, anders het (niet verrijkte) resultaat
+    """
+    company_name = company_data.get('Naam', '')
+    company_address = company_data.get('Adres', '')
+    if not company_name or company_name == "Niet gevonden":
+        enriched = company_data.copy()
+        enriched['AdHocData_Verrijkt'] = 'Nee (geen naam)'
+        return enriched
+    if not company_address or company_address == "Niet gevonden":
+        enriched = company_data.copy()
+        enriched['AdHocData_Verrijkt'] = 'Nee (geen adres)'
+        return enriched
+    return None
+
+
+def _field(data: Dict, keys: List[str]) -> str:
+    """Eerste niet-lege waarde voor een lijst van mogelijke veldnamen."""
+    for key in keys:
+        value = data.get(key, '')
+        if value:
+            return value
+    return ''
+
+
+def candidates_from_result(result) -> List[Dict]:
+    """Alle kandidaat resultaten uit een API response ('data', 'result', 'results' of de response zelf)."""
+    if isinstance(result, list):
+        return [res for res in result if isinstance(res, dict)]
+    if not isinstance(result, dict):
+        return []
+    for key in ('data', 'result', 'results'):
+        if key in result:
+            return candidates_from_result(result[key])
+    return [result]
+
+
+def mark_no_match(company_data: Dict, score: float = 0.0) -> Dict:
+    """Kopie van het record gemarkeerd als "geen match", met de score van de beste kandidaat."""
+    enriched = company_data.copy()
+    enriched['AdHocData_Verrijkt'] = 'Nee (geen match op naam+adres)'
+    enriched['AdHocData_MatchScore'] = round(score, 2)
+    return enriched
+
+
+def apply_match(company_data: Dict, api_data: Dict, score: float) -> Dict:
+    """Kopie van het record met de velden van een gematcht API resultaat."""
+    enriched = company_data.copy()
+
+    # Website
+    website = _field(api_data, ['website', 'Website', 'url'])
+    if website and website != enriched.get('Website', ''):
+        enriched['Website'] = website
+
+    # Telefoonnummer (overschrijf alleen als Ad Hoc Data een betere heeft)
+    phone = _field(api_data, ['telefoon', 'Telefoon', 'phone'])
+    if phone and (not enriched.get('Telefoon') or enriched.get('Telefoon') == "Niet vermeld"):
+        enriched['Telefoon'] = phone
+
+    # Emailadres, contactpersoon en SBI code
+    enriched['Email'] = _field(api_data, ['email', 'Email', 'e_mail'])
+    enriched['Contactpersoon'] = _field(api_data, ['contactpersoon', 'Contactpersoon', 'contact'])
+    enriched['SBI_Code'] = _field(api_data, ['sbi', 'SBI', 'sbi_code'])
+
+    enriched['AdHocData_Verrijkt'] = 'Ja'
+    enriched['AdHocData_MatchScore'] = round(score, 2)
+    return enriched
+
+
+def apply_lookup_result(company_data: Dict, result) -> Dict:
+    """
+    Verwerk een lookup response in een kopie van de bedrijfsgegevens.
+    De kandidaat met de hoogste score (entity_matching) wordt gebruikt, mits naam EN adres goed genoeg matchen.
+
+    Args:
+        company_data: Dict met bedrijfsgegevens (minimaal 'Naam' en 'Adres')
+        result: Gedecodeerde API response, of None als de lookup niets opleverde
+
+    Returns:
+        Verrijkt dict met extra velden van Ad Hoc Data
+    """
+    if not result:
+        enriched = company_data.copy()
+        enriched['AdHocData_Verrijkt'] = 'Nee'
+        # Zet lege waarden voor velden die niet gevonden zijn
+        enriched['Email'] = enriched.get('Email', '')
+        enriched['Contactpersoon'] = enriched.get('Contactpersoon', '')
+        enriched['SBI_Code'] = enriched.get('SBI_Code', '')
+        return enriched
+
+    candidates = candidates_from_result(result)
+    best, score = best_match(company_data.get('Naam', ''), company_data.get('Adres', ''), candidates)
+    if best is None:
+        # Geen goede match gevonden
+        return mark_no_match(company_data, score)
+    return apply_match(company_data, candidates[best], score)
 
 
 class AdHocDataAPI:
     """Client voor Ad Hoc Data API."""
     
-    BASE_URL = "https://api.adhocdata.nl"
-    API_VERSION = "1.0"
+    BASE_URL = BASE_URL
+    API_VERSION = API_VERSION
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, cache=True, persist_endpoint: bool = False,
+                 hedged: bool = False):
         """
         Initialiseer Ad Hoc Data API client.
         
         Args:
             api_key: API key voor authenticatie. Als None, wordt AD_HOC_DATA_API_KEY uit environment gehaald.
+            cache: True = persistente SQLite cache (zie enrichment_cache), False = altijd de API vragen,
+                of een eigen EnrichmentCache instance
+            persist_endpoint: het werkende endpoint ook op schijf onthouden (ENDPOINT_CACHE_FILE)
+            hedged: onbekende endpoints parallel proberen en de eerste succesvolle nemen
         """
         self.api_key = api_key or os.getenv('AD_HOC_DATA_API_KEY')
         if not self.api_key:
             raise ValueError("AD_HOC_DATA_API_KEY niet gevonden. Zet deze in environment variables of geef door als parameter.")
         
         self.session = requests.Session()
-        # Ad Hoc Data API gebruikt mogelijk een andere authenticatie methode
         # Probeer beide: Bearer token en API key als header
-        self.session.headers.update({
-            'Authorization': f'Bearer {self.api_key}',
-            'X-API-Key': self.api_key,  # Alternatieve methode
-            'Content-Type': 'application/json',
-            'Accept': 'application/json'
-        })
+        self.session.headers.update(auth_headers(self.api_key))
+        
+        self.cache = resolve_cache(cache)
+        self._owns_cache = self.cache is not None and self.cache is not cache
+        
+        self.persist_endpoint = persist_endpoint
+        self.hedged = hedged
+        self._warned = set()
+        self._last_http_status = None
+        self._known_failures = 0  # opeenvolgende HTTP fouten van het bekende endpoint
+        
+        # Gedeelde token bucket en circuit breaker per API key
+        self.limiter = get_rate_limiter(self.api_key)
+        self.breaker = get_circuit_breaker(self.api_key)
+    
+    def _cache_get(self, company_name: str, company_address: str) -> Tuple[bool, Optional[Dict]]:
+        """Zoek een eerdere response in de cache. Een cache fout telt als miss."""
+        if not self.cache:
+            return False, None
+        try:
+            return self.cache.get(company_name, company_address)
+        except Exception as e:
+            print(f"⚠️ Ad Hoc Data cache niet leesbaar: {str(e)[:50]}")
+            return False, None
+    
+    def _cache_put(self, company_name: str, company_address: str, result, enriched: Dict):
+        """Bewaar een response. Alleen echte antwoorden; None (fout/geen endpoint) wordt niet gecachet."""
+        if not self.cache or result is None:
+            return
+        try:
+            self.cache.put(company_name, company_address, result, matched=enriched.get('AdHocData_Verrijkt') == 'Ja')
+        except Exception as e:
+            print(f"⚠️ Ad Hoc Data cache niet schrijfbaar: {str(e)[:50]}")
+    
+    def _request(self, url: str, params: Dict) -> Tuple[str, Optional[Dict]]:
+        """
+        Eén lookup request.
+
+        Returns:
+            ("ok", response), ("not_found", None) bij 404, ("http_error", None) bij een andere
+            HTTP status (401, 403, ...) of ("error", None) bij een netwerkfout
+        """
+        for _ in range(MAX_THROTTLE_RETRIES + 1):
+            self.limiter.acquire()
+            try:
+                response = self.session.get(url, params=params, timeout=10)
+            except requests.exceptions.RequestException:
+                return "error", None
+            if response.status_code not in THROTTLE_STATUSES:
+                break
+            # Te snel: rate omlaag, wachten volgens Retry-After en dezelfde request opnieuw
+            self._last_http_status = response.status_code
+            self.limiter.on_throttle(parse_retry_after(response.headers.get('Retry-After')))
+        else:
+            return "http_error", None
+        
+        if response.status_code in RATE_SUCCESS_STATUSES:
+            self.limiter.on_success()
+        if response.status_code == 200:
+            try:
+                return "ok", response.json()
+            except ValueError:
+                return "error", None
+        if response.status_code == 404:
+            return "not_found", None
+        self._last_http_status = response.status_code
+        return "http_error", None
+    
+    def _probe(self, endpoints: List[str], params: Dict) -> Tuple[str, Optional[Dict], Optional[str]]:
+        """Probeer de endpoints één voor één (of parallel in hedged modus). Geeft (status, response, endpoint)."""
+        if self.hedged and len(endpoints) > 1:
+            executor = ThreadPoolExecutor(max_workers=len(endpoints))
+            try:
+                futures = {executor.submit(self._request, url, params): url for url in endpoints}
+                statuses = set()
+                for future in as_completed(futures):
+                    status, result = future.result()
+                    if status == "ok":
+                        return status, result, futures[future]
+                    statuses.add(status)
+                for status in ("http_error", "not_found"):
+                    if status in statuses:
+                        return status, None, None
+                return "error", None, None
+            finally:
+                # Niet wachten op de tragere kandidaten
+                executor.shutdown(wait=False)
+        
+        reached = not endpoints
+        for url in endpoints:
+            status, result = self._request(url, params)
+            if status in ("ok", "http_error"):
+                return status, result, url
+            reached = reached or status == "not_found"
+        # Alleen netwerkfouten = API onbereikbaar
+        return ("not_found" if reached else "error"), None, None
+    
+    def _warn_once(self, key: str, message: str):
+        """Print een waarschuwing maar één keer per client (niet per bedrijf)."""
+        if key not in self._warned:
+            self._warned.add(key)
+            print(message)
     
     def lookup(self, company_name: str, company_address: str = None, lookup_type: str = "bedrijf") -> Optional[Dict]:
         """
         Voer een lookup uit op de Ad Hoc Data API met zowel naam als adres.
+        Het eerste werkende endpoint wordt onthouden; de andere kandidaten worden alleen
+        opnieuw geprobeerd als dat endpoint faalt.
         
         Args:
             company_name: Bedrijfsnaam
@@ -47,62 +585,56 @@ class AdHocDataAPI:
         
         Returns:
             Dict met resultaten of None bij fout
+        
+        Raises:
+            CircuitOpenError: de API faalde te vaak achter elkaar; er wordt geen request gedaan
         """
+        if not self.breaker.allow():
+            raise CircuitOpenError("Ad Hoc Data API tijdelijk overgeslagen (circuit breaker open)")
+        status = "error"
         try:
-            # Gebruik de juiste base URL: api.adhocdata.nl
-            # Probeer verschillende mogelijke lookup endpoints
-            endpoints_to_try = [
-                f"{self.BASE_URL}/nl-basis/{self.API_VERSION}/lookup",
-                f"{self.BASE_URL}/nl-basis/{self.API_VERSION}/search",
-                f"{self.BASE_URL}/nl-basis/{self.API_VERSION}/companies",
-                f"{self.BASE_URL}/nl-basis/{self.API_VERSION}/bedrijven",
-            ]
-            
-            # Stuur zowel naam als adres mee voor betere matching
-            params = {
-                'q': company_name,
-            }
-            
-            # Voeg adres toe als parameter als het beschikbaar is
-            if company_address and company_address != "Niet gevonden":
-                params['address'] = company_address
-                params['adres'] = company_address  # Probeer ook Nederlandse naam
-            
-            # Probeer elk endpoint
-            for url in endpoints_to_try:
-                try:
-                    response = self.session.get(url, params=params, timeout=10)
-                    
-                    if response.status_code == 200:
-                        return response.json()
-                    elif response.status_code == 404:
-                        continue  # Probeer volgende endpoint
-                    else:
-                        # Andere fout (401, 403, etc.)
-                        response.raise_for_status()
-                        
-                except requests.exceptions.HTTPError as e:
-                    if e.response.status_code == 404:
-                        continue  # Probeer volgende endpoint
-                    else:
-                        raise  # Her-raise andere HTTP errors
-                except:
-                    continue  # Probeer volgende endpoint
-            
+            status, result = self._lookup(company_name, company_address)
+            return result
+        finally:
+            self.breaker.record(status)
+    
+    def _lookup(self, company_name: str, company_address: str = None) -> Tuple[str, Optional[Dict]]:
+        """Lookup via het onthouden endpoint en zo nodig de andere kandidaten. Geeft (status, response)."""
+        # Stuur zowel naam als adres mee voor betere matching
+        params = build_lookup_params(company_name, company_address)
+        known, others = endpoint_candidates(self.BASE_URL, self.API_VERSION, self.persist_endpoint)
+        
+        status = "error"
+        if known:
+            status, result = self._request(known, params)
+            if status in ("ok", "not_found"):
+                # 404 van het bekende endpoint = bedrijf niet gevonden, geen reden om andere endpoints te proberen
+                self._known_failures = 0
+                return status, result
+            if status == "http_error":
+                self._known_failures += 1
+        
+        # Opnieuw zoeken alleen zonder bekend endpoint, bij een netwerkfout of na herhaalde HTTP fouten
+        if not known or status == "error" or self._known_failures >= KNOWN_ENDPOINT_MAX_FAILURES:
+            self._known_failures = 0
+            probe_status, result, endpoint = self._probe(others, params)
+            if probe_status == "ok":
+                if endpoint != known:
+                    print(f"🔗 Ad Hoc Data API endpoint: {endpoint}")
+                remember_endpoint(endpoint, self.BASE_URL, self.API_VERSION, self.persist_endpoint)
+                return probe_status, result
+            if probe_status != "error":
+                status = probe_status
+        
+        if status == "http_error":
+            # Andere fout (401, 403, etc.)
+            self._warn_once(f"http_{self._last_http_status}",
+                            f"⚠️ Fout bij Ad Hoc Data API lookup: HTTP {self._last_http_status} (verdere meldingen onderdrukt)")
+        elif not known:
             # Geen endpoint werkte
-            print(f"⚠️ Ad Hoc Data API: geen werkend endpoint gevonden voor lookup")
-            print(f"   Probeerde: {', '.join(endpoints_to_try)}")
-            print(f"   Parameters: q={company_name[:30]}..., address={company_address[:30] if company_address else 'None'}...")
-            return None
-            
-        except requests.exceptions.RequestException as e:
-            # Alleen loggen als het niet een 404 is (die hebben we al afgehandeld)
-            if "404" not in str(e):
-                print(f"⚠️ Fout bij Ad Hoc Data API lookup voor '{company_name}': {str(e)}")
-            return None
-        except Exception as e:
-            print(f"⚠️ Onverwachte fout bij Ad Hoc Data API lookup: {str(e)}")
-            return None
+            self._warn_once("no_endpoint", f"⚠️ Ad Hoc Data API: geen werkend endpoint gevonden voor lookup\n"
+                                           f"   Probeerde: {', '.join(others)}")
+        return status, None
     
     def enrich_company(self, company_data: Dict) -> Dict:
         """
@@ -115,130 +647,37 @@ class AdHocDataAPI:
         Returns:
             Verrijkt dict met extra velden van Ad Hoc Data
         """
-        enriched = company_data.copy()
+        # Beide moeten beschikbaar zijn voor een goede match
+        skipped = precheck_company(company_data)
+        if skipped is not None:
+            return skipped
         
-        # Haal zowel naam als adres op voor matching
         company_name = company_data.get('Naam', '')
         company_address = company_data.get('Adres', '')
         
-        # Beide moeten beschikbaar zijn voor een goede match
-        if not company_name or company_name == "Niet gevonden":
-            enriched['AdHocData_Verrijkt'] = 'Nee (geen naam)'
-            return enriched
-        
-        if not company_address or company_address == "Niet gevonden":
-            enriched['AdHocData_Verrijkt'] = 'Nee (geen adres)'
-            return enriched
+        # Eerst de cache: een eerdere response (ook "geen match") kost geen API call
+        found, result = self._cache_get(company_name, company_address)
+        if found:
+            return apply_lookup_result(company_data, result)
         
         # Voer lookup uit met zowel naam als adres
-        result = self.lookup(company_name, company_address)
-        
-        if result:
-            # Voeg relevante velden toe aan enriched data
-            # Pas dit aan op basis van wat de API daadwerkelijk teruggeeft
-            api_data = result
-            if isinstance(result, dict):
-                # Als result een dict is, probeer verschillende mogelijke structuren
-                if 'data' in result:
-                    api_data = result['data']
-                elif 'result' in result:
-                    api_data = result['result']
-                elif 'results' in result and len(result['results']) > 0:
-                    # Als er meerdere resultaten zijn, zoek de beste match op basis van naam EN adres
-                    results = result['results']
-                    best_match = None
-                    matched = False
-                    
-                    for res in results:
-                        # Check of naam en adres matchen
-                        res_name = res.get('naam', '') or res.get('Naam', '') or res.get('name', '')
-                        res_address = res.get('adres', '') or res.get('Adres', '') or res.get('address', '')
-                        
-                        # Check of naam matcht (case-insensitive, gedeeltelijke match)
-                        name_match = res_name.lower() in company_name.lower() or company_name.lower() in res_name.lower()
-                        
-                        # Check of adres matcht (check op postcode of stad)
-                        address_match = False
-                        if res_address and company_address:
-                            # Vergelijk postcodes of steden
-                            res_parts = res_address.lower().split(',')
-                            company_parts = company_address.lower().split(',')
-                            # Check of er overlap is in adres delen
-                            address_match = any(part.strip() in company_address.lower() or part.strip() in res_address.lower() 
-                                              for part in res_parts if len(part.strip()) > 3)
-                        
-                        if name_match and address_match:
-                            best_match = res
-                            matched = True
-                            break
-                    
-                    # Alleen gebruiken als beide naam EN adres matchen
-                    if matched and best_match:
-                        api_data = best_match
-                    else:
-                        # Geen goede match gevonden
-                        enriched['AdHocData_Verrijkt'] = 'Nee (geen match op naam+adres)'
-                        return enriched
-                else:
-                    # Single result - check ook hier of naam en adres matchen
-                    res_name = api_data.get('naam', '') or api_data.get('Naam', '') or api_data.get('name', '')
-                    res_address = api_data.get('adres', '') or api_data.get('Adres', '') or api_data.get('address', '')
-                    
-                    name_match = res_name.lower() in company_name.lower() or company_name.lower() in res_name.lower()
-                    address_match = False
-                    if res_address and company_address:
-                        res_parts = res_address.lower().split(',')
-                        address_match = any(part.strip() in company_address.lower() or part.strip() in res_address.lower() 
-                                          for part in res_parts if len(part.strip()) > 3)
-                    
-                    if not (name_match and address_match):
-                        # Geen match
-                        enriched['AdHocData_Verrijkt'] = 'Nee (geen match op naam+adres)'
-                        return enriched
-                
-                # Alleen hier komen als er een match is - haal de gevraagde velden op
-                # Website
-                website = api_data.get('website', '') or api_data.get('Website', '') or api_data.get('url', '')
-                if website and website != enriched.get('Website', ''):
-                    enriched['Website'] = website
-                
-                # Telefoonnummer (overschrijf alleen als Ad Hoc Data een betere heeft)
-                phone = api_data.get('telefoon', '') or api_data.get('Telefoon', '') or api_data.get('phone', '')
-                if phone and (not enriched.get('Telefoon') or enriched.get('Telefoon') == "Niet vermeld"):
-                    enriched['Telefoon'] = phone
-                
-                # Emailadres
-                email = api_data.get('email', '') or api_data.get('Email', '') or api_data.get('e_mail', '')
-                enriched['Email'] = email if email else ''
-                
-                # Contactpersoon
-                contact = api_data.get('contactpersoon', '') or api_data.get('Contactpersoon', '') or api_data.get('contact', '')
-                enriched['Contactpersoon'] = contact if contact else ''
-                
-                # SBI code
-                sbi = api_data.get('sbi', '') or api_data.get('SBI', '') or api_data.get('sbi_code', '')
-                enriched['SBI_Code'] = sbi if sbi else ''
-                
-                enriched['AdHocData_Verrijkt'] = 'Ja'
-        else:
-            enriched['AdHocData_Verrijkt'] = 'Nee'
-            # Zet lege waarden voor velden die niet gevonden zijn
-            enriched['Email'] = enriched.get('Email', '')
-            enriched['Contactpersoon'] = enriched.get('Contactpersoon', '')
-            enriched['SBI_Code'] = enriched.get('SBI_Code', '')
-        
-        # Rate limiting - wacht even tussen requests
-        time.sleep(0.3)
+        try:
+            result = self.lookup(company_name, company_address)
+        except CircuitOpenError:
+            return mark_pending(company_data)
+        enriched = apply_lookup_result(company_data, result)
+        self._cache_put(company_name, company_address, result, enriched)
         
         return enriched
     
-    def enrich_companies_batch(self, companies: List[Dict], delay: float = 0.5) -> List[Dict]:
+    def enrich_companies_batch(self, companies: List[Dict], delay: Optional[float] = None) -> List[Dict]:
         """
         Verrijk een lijst van bedrijven met Ad Hoc Data.
         
         Args:
             companies: Lijst van bedrijfsdicts
-            delay: Wachtijd tussen requests in seconden (voor rate limiting)
+            delay: Extra vaste wachttijd tussen bedrijven in seconden. Standaard geen: de
+                rate limiter (self.limiter) bepaalt het tempo.
         
         Returns:
             Lijst van verrijkte bedrijfsdicts
@@ -254,8 +693,7 @@ class AdHocDataAPI:
             if i % 10 == 0:
                 print(f"   Verrijkt {i}/{len(companies)} bedrijven...")
             
-            # Rate limiting
-            if i < len(companies):
+            if delay and i < len(companies):
                 time.sleep(delay)
         
         print(f"✅ {len(enriched_companies)} bedrijven verrijkt met Ad Hoc Data")
@@ -263,8 +701,224 @@ class AdHocDataAPI:
         return enriched_companies
     
     def close(self):
-        """Sluit de session."""
+        """Sluit de session (en de cache als die door deze client geopend is)."""
         self.session.close()
+        if self._owns_cache:
+            if self.cache.hits or self.cache.misses:
+                stats = self.cache.stats()
+                print(f"🗃️  Ad Hoc Data cache: {stats['hits']} hits, {stats['misses']} misses ({stats['entries']} in cache)")
+            self.cache.close()
+
+
+class AsyncAdHocDataAPI:
+    """
+    Async client voor Ad Hoc Data API (aiohttp).
+    Alle lookups delen één connection pool; max_in_flight begrenst het aantal gelijktijdige requests.
+
+    Gebruik:
+        async with AsyncAdHocDataAPI(max_in_flight=20) as api:
+            enriched = await api.enrich_many(companies)
+    """
+
+    BASE_URL = BASE_URL
+    API_VERSION = API_VERSION
+
+    def __init__(self, api_key: Optional[str] = None, max_in_flight: int = 20, timeout: float = 10, cache=True,
+                 persist_endpoint: bool = False):
+        """
+        Args:
+            api_key: API key voor authenticatie. Als None, wordt AD_HOC_DATA_API_KEY uit environment gehaald.
+            max_in_flight: maximaal aantal gelijktijdige requests (tevens grootte van de connection pool)
+            timeout: timeout per request in seconden
+            cache: zie AdHocDataAPI
+            persist_endpoint: zie AdHocDataAPI
+        """
+        if aiohttp is None:
+            raise ImportError("aiohttp is niet geïnstalleerd. Installeer met: pip install aiohttp")
+
+        self.api_key = api_key or os.getenv('AD_HOC_DATA_API_KEY')
+        if not self.api_key:
+            raise ValueError("AD_HOC_DATA_API_KEY niet gevonden. Zet deze in environment variables of geef door als parameter.")
+
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.timeout = timeout
+        self._session = None
+        self._semaphore = None
+        self.cache = resolve_cache(cache)
+        self._owns_cache = self.cache is not None and self.cache is not cache
+        self.persist_endpoint = persist_endpoint
+        self._warned = set()
+        self._last_http_status = None
+        self.limiter = get_rate_limiter(self.api_key)
+        self.breaker = get_circuit_breaker(self.api_key)
+
+    # Cache afhandeling is gelijk aan de sync client (SQLite lookups zijn lokaal en snel)
+    _cache_get = AdHocDataAPI._cache_get
+    _cache_put = AdHocDataAPI._cache_put
+    _warn_once = AdHocDataAPI._warn_once
+
+    async def __aenter__(self):
+        self._ensure_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _ensure_session(self):
+        """Maak de sessie aan binnen de draaiende event loop (eenmalig)."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_in_flight, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=auth_headers(self.api_key),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._session
+
+    async def _request(self, session, url: str, params: Dict) -> Tuple[str, Optional[Dict]]:
+        """Eén lookup request via de gedeelde rate limiter (zelfde statussen als AdHocDataAPI._request)."""
+        for _ in range(MAX_THROTTLE_RETRIES + 1):
+            await self.limiter.acquire_async()
+            try:
+                async with session.get(url, params=params) as response:
+                    if response.status in THROTTLE_STATUSES:
+                        self._last_http_status = response.status
+                        self.limiter.on_throttle(parse_retry_after(response.headers.get('Retry-After')))
+                        continue
+                    if response.status in RATE_SUCCESS_STATUSES:
+                        self.limiter.on_success()
+                    if response.status == 200:
+                        return "ok", await response.json(content_type=None)
+                    if response.status == 404:
+                        return "not_found", None
+                    self._last_http_status = response.status
+                    return "http_error", None
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                return "error", None
+        return "http_error", None
+
+    async def lookup(self, company_name: str, company_address: str = None) -> Optional[Dict]:
+        """Async variant van AdHocDataAPI.lookup (zelfde endpoints, parameters en circuit breaker)."""
+        if not self.breaker.allow():
+            raise CircuitOpenError("Ad Hoc Data API tijdelijk overgeslagen (circuit breaker open)")
+        status = "error"
+        try:
+            status, result = await self._lookup(company_name, company_address)
+            return result
+        finally:
+            self.breaker.record(status)
+
+    async def _lookup(self, company_name: str, company_address: str = None) -> Tuple[str, Optional[Dict]]:
+        session = self._ensure_session()
+        params = build_lookup_params(company_name, company_address)
+        # Bekend werkend endpoint eerst (gedeeld met de sync client), de rest alleen als dat faalt
+        known, others = endpoint_candidates(self.BASE_URL, self.API_VERSION, self.persist_endpoint)
+        endpoints_to_try = ([known] if known else []) + others
+
+        reached = False
+        async with self._semaphore:
+            for endpoint in endpoints_to_try:
+                status, result = await self._request(session, endpoint, params)
+                if status == "ok":
+                    remember_endpoint(endpoint, self.BASE_URL, self.API_VERSION, self.persist_endpoint)
+                    return status, result
+                if status == "not_found" and endpoint == known:
+                    # 404 van het bekende endpoint = bedrijf niet gevonden, niet de andere endpoints proberen
+                    return status, None
+                if status == "http_error":
+                    # Andere fout (401, 403, etc.)
+                    self._warn_once(f"http_{self._last_http_status}",
+                                    f"⚠️ Fout bij Ad Hoc Data API lookup: HTTP {self._last_http_status} (verdere meldingen onderdrukt)")
+                    return status, None
+                # Netwerkfout, of 404 van een nog onbekend endpoint: probeer volgende endpoint
+                reached = reached or status == "not_found"
+
+        if not known:
+            self._warn_once("no_endpoint", "⚠️ Ad Hoc Data API: geen werkend endpoint gevonden voor lookup")
+        return ("not_found" if reached else "error"), None
+
+    async def enrich_company(self, company_data: Dict) -> Dict:
+        """Async variant van AdHocDataAPI.enrich_company (tempo via de gedeelde rate limiter)."""
+        skipped = precheck_company(company_data)
+        if skipped is not None:
+            return skipped
+        company_name = company_data.get('Naam', '')
+        company_address = company_data.get('Adres', '')
+        found, result = self._cache_get(company_name, company_address)
+        if found:
+            return apply_lookup_result(company_data, result)
+        try:
+            result = await self.lookup(company_name, company_address)
+        except CircuitOpenError:
+            return mark_pending(company_data)
+        enriched = apply_lookup_result(company_data, result)
+        self._cache_put(company_name, company_address, result, enriched)
+        return enriched
+
+    async def enrich_many(self, companies: List[Dict],
+                          progress_callback: Optional[Callable[[int, int], None]] = None) -> List[Dict]:
+        """
+        Verrijk een lijst bedrijven gelijktijdig. De volgorde van de uitvoer is gelijk aan de invoer.
+
+        Args:
+            companies: Lijst van bedrijfsdicts
+            progress_callback: optioneel, wordt aangeroepen met (klaar, totaal)
+
+        Returns:
+            Lijst van verrijkte bedrijfsdicts
+        """
+        total = len(companies)
+        done = 0
+        print(f"\n🔄 Verrijken van {total} bedrijven met Ad Hoc Data ({self.max_in_flight} tegelijk)...")
+
+        async def _enrich(company):
+            nonlocal done
+            try:
+                enriched = await self.enrich_company(company)
+            except Exception as e:
+                print(f"⚠️ Onverwachte fout bij Ad Hoc Data API lookup: {str(e)}")
+                enriched = company.copy()
+                enriched['AdHocData_Verrijkt'] = 'Nee'
+            done += 1
+            if progress_callback:
+                progress_callback(done, total)
+            elif done % 50 == 0:
+                print(f"   Verrijkt {done}/{total} bedrijven...")
+            return enriched
+
+        self._ensure_session()
+        enriched_companies = await asyncio.gather(*(_enrich(company) for company in companies))
+        print(f"✅ {len(enriched_companies)} bedrijven verrijkt met Ad Hoc Data")
+        return list(enriched_companies)
+
+    async def close(self):
+        """Sluit de sessie (en daarmee de connection pool)."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self._owns_cache:
+            self.cache.close()
+            self._owns_cache = False
+
+
+def enrich_many(companies: List[Dict], api_key: Optional[str] = None, max_in_flight: int = 20) -> List[Dict]:
+    """
+    Synchrone helper rond AsyncAdHocDataAPI.enrich_many (voor code zonder event loop).
+    Valt terug op de sequentiële AdHocDataAPI als aiohttp niet geïnstalleerd is.
+    """
+    if aiohttp is None:
+        api = AdHocDataAPI(api_key=api_key)
+        try:
+            return api.enrich_companies_batch(companies)
+        finally:
+            api.close()
+
+    async def _run():
+        async with AsyncAdHocDataAPI(api_key=api_key, max_in_flight=max_in_flight) as api:
+            return await api.enrich_many(companies)
+
+    return asyncio.run(_run())
 
 
 def enrich_with_ad_hoc_data(companies: List[Dict], api_key: Optional[str] = None) -> List[Dict]:
@@ -279,10 +933,8 @@ def enrich_with_ad_hoc_data(companies: List[Dict], api_key: Optional[str] = None
         Lijst van verrijkte bedrijfsdicts
     """
     try:
-        api = AdHocDataAPI(api_key=api_key)
-        enriched = api.enrich_companies_batch(companies)
-        api.close()
-        return enriched
+        # Gelijktijdig via aiohttp als dat beschikbaar is, anders sequentieel
+        return enrich_many(companies, api_key=api_key)
     except Exception as e:
         print(f"⚠️ Kon Ad Hoc Data API niet gebruiken: {str(e)}")
         print("   Bedrijven worden opgeslagen zonder verrijking.")
@@ -6,6 +6,9 @@ import threading
 import json
 import glob
 from script import run_scraper as run_trustoo_scraper
+from chrome_utils import BrowserPool
+from job_queue import JobQueue
+from sharding import add_sharded_jobs, SHARD_URL_TEMPLATES
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -61,11 +64,28 @@ scraper_status = {
     'csv_file': None,
     'excel_file': None,
     'scraper_instance': None,  # Houd scraper instance bij voor direct stoppen
+    'enrichment': None,  # Laatste voortgang van de achtergrond verrijking
     'last_scraper_instance': None  # Houd laatste scraper instance bij voor bestanden
 }
 
-def run_scraper_thread(url, load_existing=False):
-    """Voer Trustoo scraper uit in aparte thread."""
+# Pool met warme browsers, gedeeld door alle jobs van dit proces (scheelt een koude Chrome start per job)
+browser_pool = BrowserPool(
+    size=int(os.environ.get('BROWSER_POOL_SIZE', 1)),
+    max_jobs_per_browser=int(os.environ.get('BROWSER_MAX_JOBS', 20)),
+    headless=os.environ.get('BROWSER_HEADLESS', 'false').lower() == 'true'  # Lokaal: zichtbaar
+)
+
+# Maximaal aantal parallelle jobs (= browsers) per wachtrij, ongeacht wat de request vraagt
+MAX_QUEUE_CONCURRENCY = int(os.environ.get('MAX_QUEUE_CONCURRENCY', 3))
+
+# Huidige multi-categorie wachtrij (None als er nog geen is gestart)
+job_queue = None
+
+def queue_running():
+    return job_queue is not None and job_queue.is_running()
+
+def run_scraper_thread(url, load_existing=False, mode="browser"):
+    """Voer Trustoo scraper uit in aparte thread (mode "browser" of "http")."""
     global scraper_status
     
     scraper_status['running'] = True
@@ -75,6 +95,7 @@ def run_scraper_thread(url, load_existing=False):
     scraper_status['csv_file'] = None
     scraper_status['excel_file'] = None
     scraper_status['scraper_instance'] = None
+    scraper_status['enrichment'] = None
     
     try:
         # Redirect output naar status
@@ -106,12 +127,28 @@ def run_scraper_thread(url, load_existing=False):
             from script import TrustooPreciseScraper
             import os as os_module
             
+            pooled_driver = None
+            
             # Maak scraper instance direct aan (altijd Trustoo)
-            scraper_instance = TrustooPreciseScraper(
-                headless=False,  # Lokaal: niet headless zodat gebruiker kan zien wat er gebeurt
-                load_existing=load_existing,
-                stop_callback=should_stop
-            )
+            if mode == "http":
+                # Browserloos: pagineert via HTTP met gedeelde connection pool
+                from trustoo_http import TrustooHttpScraper
+                scraper_instance = TrustooHttpScraper(
+                    load_existing=load_existing,
+                    stop_callback=should_stop
+                )
+            else:
+                # Warme browser uit de pool in plaats van een nieuwe Chrome per job
+                pooled_driver = browser_pool.acquire()
+                try:
+                    scraper_instance = TrustooPreciseScraper(
+                        load_existing=load_existing,
+                        stop_callback=should_stop,
+                        driver=pooled_driver
+                    )
+                except Exception:
+                    browser_pool.release(pooled_driver)
+                    raise
             # OPSLAAN IN STATUS VOOR DIRECTE TOEGANG
             scraper_status['scraper_instance'] = scraper_instance
             
@@ -130,7 +167,10 @@ def run_scraper_thread(url, load_existing=False):
                     print(f"\n✅ Scrapen voltooid")
                 
                 print(f"📊 Totaal verzameld: {len(companies)} bedrijven")
-                print("ℹ️ Bedrijven zijn automatisch verrijkt met Ad Hoc Data tijdens het scrapen")
+                # Achtergrond verrijking afronden vóór het opslaan (bij stop begrensd)
+                scraper_instance.finish_enrichment(
+                    timeout=scraper_instance.ENRICHMENT_STOP_TIMEOUT if was_stopped else None)
+                print("ℹ️ Bedrijven zijn verrijkt met Ad Hoc Data tijdens het scrapen")
                 
                 # Genereer bestandsnamen met standaard naam
                 output_dir = "scrapes"
@@ -168,9 +208,12 @@ def run_scraper_thread(url, load_existing=False):
                 scraper_status['excel_file'] = excel_path
                 
             finally:
-                # Sluit browser
+                # Sluit scraper en geef de browser terug aan de pool (reset of vervangen)
+                scraper_status['enrichment'] = scraper_instance.enrichment_progress()
                 scraper_instance.close()
                 scraper_status['scraper_instance'] = None
+                if pooled_driver:
+                    browser_pool.release(pooled_driver)
             
             if scraper_status.get('stop_requested', False):
                 scraper_status['output'].append(f"\n\n⚠️ Scrapen gestopt door gebruiker\n📊 Totaal verzameld: {len(companies)} bedrijven\n💾 Bestanden opgeslagen in: {csv_path}\n")
@@ -240,7 +283,7 @@ def index():
 def start_scraper():
     global scraper_status
     
-    if scraper_status['running']:
+    if scraper_status['running'] or queue_running():
         return jsonify({'error': 'Scraper draait al'}), 400
     
     data = request.json
@@ -253,16 +296,85 @@ def start_scraper():
     # Altijd nieuw bestand aanmaken (mode is niet meer nodig)
     load_existing = False
     
+    # Scrape modus: "browser" (standaard) of "http" (zonder Chrome)
+    scrape_mode = data.get('scrape_mode', 'browser')
+    if scrape_mode not in ('browser', 'http'):
+        return jsonify({'error': 'Ongeldige scrape_mode'}), 400
+    
     # Start scraper in thread
     thread = threading.Thread(
         target=run_scraper_thread,
-        args=(url, load_existing),
+        args=(url, load_existing, scrape_mode),
         daemon=True
     )
     thread.start()
     
     return jsonify({'status': 'started'})
 
+@app.route('/api/queue', methods=['POST'])
+@login_required
+def start_queue():
+    """Start meerdere categorieën parallel: {"urls": [...], "concurrency": 2, "title": "...", "shard": "province"}.
+    
+    Met shard ("province" of "city") wordt elke /nederland/ URL opgesplitst in regionale crawls.
+    """
+    global job_queue
+    
+    if scraper_status['running'] or queue_running():
+        return jsonify({'error': 'Scraper draait al'}), 400
+    
+    data = request.json or {}
+    urls = [url.strip() for url in data.get('urls', []) if url and url.strip()]
+    if not urls or not all(url.startswith('http') for url in urls):
+        return jsonify({'error': 'Ongeldige URL(s)'}), 400
+    
+    shard = data.get('shard')
+    if shard and shard not in SHARD_URL_TEMPLATES:
+        return jsonify({'error': 'Ongeldige shard (province of city)'}), 400
+    
+    try:
+        concurrency = int(data.get('concurrency') or os.environ.get('QUEUE_CONCURRENCY', 2))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Ongeldige concurrency (geheel getal verwacht)'}), 400
+    if concurrency < 1:
+        return jsonify({'error': 'Ongeldige concurrency (minimaal 1)'}), 400
+    concurrency = min(concurrency, MAX_QUEUE_CONCURRENCY)
+    job_queue = JobQueue(
+        concurrency=concurrency,
+        batch_name=data.get('title'),
+        browser_pool=browser_pool,
+        headless=browser_pool.headless,
+        max_retries=int(os.environ.get('QUEUE_MAX_RETRIES', 1))
+    )
+    for url in urls:
+        if shard:
+            try:
+                add_sharded_jobs(job_queue, url, level=shard)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        else:
+            job_queue.add_job(url)
+    
+    # Workers + samenvoegen in de achtergrond
+    threading.Thread(target=job_queue.run, daemon=True).start()
+    
+    return jsonify({'status': 'started', 'jobs': len(job_queue.jobs), 'concurrency': job_queue.concurrency})
+
+@app.route('/api/queue', methods=['GET'])
+@login_required
+def queue_status():
+    if job_queue is None:
+        return jsonify({'running': False, 'jobs': []})
+    return jsonify(job_queue.status())
+
+@app.route('/api/queue/stop', methods=['POST'])
+@login_required
+def stop_queue():
+    if job_queue is None:
+        return jsonify({'error': 'Geen wachtrij actief'}), 400
+    job_queue.stop()
+    return jsonify({'status': 'stopping'})
+
 @app.route('/api/stop', methods=['POST'])
 @login_required
 def stop_scraper():
@@ -286,6 +398,9 @@ def stop_scraper():
             # Sla bestanden direct op VOORDAT browser sluit
             if len(scraper_instance.companies_data) > 0:
                 try:
+                    # Niet op openstaande verrijkingen wachten - de request moet direct terugkomen. De scraper
+                    # thread rondt de verrijking af (begrensd) en slaat daarna opnieuw op, met de verrijkte velden.
+                    
                     # Gebruik globale os module (niet lokaal importeren)
                     import os as os_module
                     
@@ -359,9 +474,10 @@ def stop_scraper():
                     scraper_status['output'].append(f"⚠️ Fout bij opslaan: {save_err}\n")
                     scraper_status['output'].append(f"Traceback: {traceback.format_exc()}\n")
             
-            # SLUIT BROWSER DIRECT - FORCEER!
+            # SLUIT BROWSER DIRECT - FORCEER! Maar alleen een eigen browser: een driver uit de pool geeft
+            # de scraper thread terug via release(), die hem reset of vervangt als hij niet meer gezond is
             try:
-                if scraper_instance.driver:
+                if scraper_instance.driver and getattr(scraper_instance, '_owns_driver', True):
                     scraper_instance.driver.quit()
                     scraper_status['output'].append("🔒 Browser geforceerd gesloten\n")
             except Exception as close_err:
@@ -413,13 +529,20 @@ def stop_scraper():
 def get_status():
     global scraper_status
     
+    # Verrijking loopt los van het scrapen en heeft een eigen voortgang
+    scraper_instance = scraper_status.get('scraper_instance')
+    if scraper_instance is not None:
+        scraper_status['enrichment'] = scraper_instance.enrichment_progress()
+    
     return jsonify({
         'running': scraper_status['running'],
         'output': ''.join(scraper_status['output'][-100:]),  # Laatste 100 regels
         'companies_count': scraper_status['companies_count'],
         'error': scraper_status['error'],
         'csv_file': scraper_status['csv_file'],
-        'excel_file': scraper_status['excel_file']
+        'excel_file': scraper_status['excel_file'],
+        'enrichment': scraper_status['enrichment'],
+        'browser_pool': browser_pool.stats()
     })
 
 @app.route('/api/download/<path:filename>')
@@ -443,6 +566,9 @@ def download_file(filename):
 if __name__ == '__main__':
     # Op Railway gebruik PORT, lokaal gebruik 5001 (5000 wordt gebruikt door macOS AirPlay)
     port = int(os.environ.get('PORT', 5001))
+    # Start alvast een browser zodat de eerste job direct kan beginnen
+    if os.environ.get('BROWSER_PREWARM', 'true').lower() == 'true':
+        browser_pool.prewarm()
     # Op Railway moet debug=False zijn
     app.run(host='0.0.0.0', port=port, debug=False)
 
@@ -0,0 +1,490 @@
+"""
+Gedeelde Chrome/Selenium hulpfuncties voor de scrapers.
+Bevat het starten van Chrome, een pool met warme browsers voor de Flask app,
+het blokkeren van onnodige resources (afbeeldingen, fonts, media, trackers) via CDP
+en het uitlezen van de Chrome performance log.
+"""
+
+import os
+import re
+import json
+import shutil
+import subprocess
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+# Standaard URL patronen per categorie voor Network.setBlockedURLs (wildcard * toegestaan)
+RESOURCE_BLOCK_PATTERNS = {
+    "images": ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico", "*.bmp"],
+    "fonts": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+    "media": ["*.mp4", "*.webm", "*.ogg", "*.mp3", "*.wav", "*.m3u8"],
+    "trackers": [
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+        "*googleadservices.com*", "*facebook.net*", "*connect.facebook.com*",
+        "*hotjar.com*", "*clarity.ms*", "*bat.bing.com*", "*tiktok.com*",
+        "*linkedin.com/px*", "*snap.licdn.com*", "*sentry.io*", "*newrelic.com*",
+    ],
+}
+
+DEFAULT_BLOCK_CATEGORIES = ("images", "fonts", "media", "trackers")
+
+# Geschatte grootte per geblokkeerde resource (bytes). Een geblokkeerde request wordt nooit
+# gedownload, dus de echte grootte is onbekend - dit zijn typische waarden per resource type.
+ESTIMATED_RESOURCE_BYTES = {
+    "Image": 35_000,
+    "Font": 45_000,
+    "Media": 500_000,
+    "Script": 60_000,
+    "Stylesheet": 20_000,
+    "XHR": 2_000,
+    "Fetch": 2_000,
+    "Other": 10_000,
+}
+
+
+def build_chrome_options(headless=True, performance_log=False):
+    """Chrome opties die beide scrapers gebruiken."""
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument('--headless')
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
+    
+    # Railway/Server specifieke opties
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    
+    # Blokkeer locatie-detectie om te voorkomen dat Trustoo automatisch naar een specifieke locatie navigeert
+    options.add_argument('--disable-geolocation')
+    options.add_experimental_option("prefs", {
+        "profile.default_content_setting_values.geolocation": 2,  # Blokkeer geolocatie
+        "profile.default_content_setting_values.notifications": 2  # Blokkeer notificaties
+    })
+    
+    # Op Railway, gebruik chromium uit nixpacks / de Docker image
+    chrome_binary = os.environ.get('CHROME_BIN')
+    if chrome_binary and os.path.exists(chrome_binary):
+        options.binary_location = chrome_binary
+    
+    # Performance log aan om XHR/fetch responses te kunnen lezen en geblokkeerde requests te tellen
+    if performance_log:
+        enable_performance_logging(options)
+    return options
+
+
+# Cache van de gevonden chromedriver (pad + versies), zodat een start geen versiecheck of netwerk nodig heeft
+DRIVER_CACHE_FILE = os.environ.get(
+    'CHROMEDRIVER_CACHE_FILE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'do-scraper', 'chromedriver.json')
+)
+
+# Plekken waar een door het OS geïnstalleerde chromedriver staat (o.a. Debian chromium-driver)
+LOCAL_CHROMEDRIVER_PATHS = [
+    "/usr/bin/chromedriver",
+    "/usr/lib/chromium/chromedriver",
+    "/usr/lib/chromium-browser/chromedriver",
+    "/usr/local/bin/chromedriver",
+]
+
+_resolved_driver = None
+_resolve_lock = threading.Lock()
+
+
+def _find_chrome_binary() -> Optional[str]:
+    chrome_binary = os.environ.get('CHROME_BIN')
+    if chrome_binary and os.path.exists(chrome_binary):
+        return chrome_binary
+    for name in ("chromium", "chromium-browser", "google-chrome", "google-chrome-stable"):
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+def _binary_version(path: Optional[str]) -> Optional[str]:
+    """Versie van een chrome/chromedriver binary (bijv. "131.0.6778.85"), of None."""
+    if not path:
+        return None
+    try:
+        output = subprocess.run([path, '--version'], capture_output=True, text=True, timeout=10).stdout
+    except Exception:
+        return None
+    match = re.search(r'(\d+)\.\d+\.\d+(\.\d+)?', output)
+    return match.group(0) if match else None
+
+
+def _major(version: Optional[str]) -> Optional[str]:
+    return version.split('.')[0] if version else None
+
+
+def _binary_fingerprint(path: Optional[str]) -> Optional[str]:
+    """Goedkope check of een binary veranderd is (pad + grootte + mtime), zonder hem te starten."""
+    if not path:
+        return None
+    try:
+        stat = os.stat(os.path.realpath(path))
+    except OSError:
+        return None
+    return f"{os.path.realpath(path)}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+def _load_driver_cache() -> Dict:
+    try:
+        with open(DRIVER_CACHE_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_driver_cache(entry: Dict):
+    try:
+        os.makedirs(os.path.dirname(DRIVER_CACHE_FILE), exist_ok=True)
+        tmp_file = DRIVER_CACHE_FILE + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(entry, f, indent=2)
+        os.replace(tmp_file, DRIVER_CACHE_FILE)
+    except OSError as e:
+        print(f"⚠️ Kon chromedriver cache niet opslaan: {e}")
+
+
+def resolve_chromedriver() -> str:
+    """
+    Geef het pad naar een chromedriver die bij de geïnstalleerde Chrome/Chromium past.
+
+    Volgorde: proces-cache, cache op schijf (geldig zolang Chrome en de driver niet veranderd zijn),
+    CHROMEDRIVER_PATH, een lokaal geïnstalleerde chromedriver met dezelfde major versie,
+    en pas als laatste webdriver-manager (kan het netwerk op).
+    """
+    global _resolved_driver
+    with _resolve_lock:
+        if _resolved_driver and os.path.exists(_resolved_driver):
+            return _resolved_driver
+
+        chrome_binary = _find_chrome_binary()
+        chrome_fingerprint = _binary_fingerprint(chrome_binary)
+
+        cache = _load_driver_cache()
+        driver_path = cache.get('driver_path')
+        if (driver_path and cache.get('chrome_fingerprint') == chrome_fingerprint
+                and cache.get('driver_fingerprint') == _binary_fingerprint(driver_path)):
+            _resolved_driver = driver_path
+            return driver_path
+
+        chrome_version = _binary_version(chrome_binary)
+        candidates = [os.environ.get('CHROMEDRIVER_PATH'), shutil.which('chromedriver')] + LOCAL_CHROMEDRIVER_PATHS
+        source = None
+        driver_path = None
+        driver_version = None
+        for candidate in candidates:
+            if not candidate or not os.path.isfile(candidate) or not os.access(candidate, os.X_OK):
+                continue
+            driver_version = _binary_version(candidate)
+            if driver_version and (chrome_version is None or _major(driver_version) == _major(chrome_version)):
+                driver_path, source = candidate, "lokaal"
+                break
+
+        if not driver_path:
+            # Niets lokaal gevonden - webdriver-manager (checkt versies, downloadt zo nodig)
+            driver_path = ChromeDriverManager().install()
+            driver_version = _binary_version(driver_path)
+            source = "webdriver-manager"
+
+        _save_driver_cache({
+            'driver_path': driver_path,
+            'driver_version': driver_version,
+            'driver_fingerprint': _binary_fingerprint(driver_path),
+            'chrome_binary': chrome_binary,
+            'chrome_version': chrome_version,
+            'chrome_fingerprint': chrome_fingerprint,
+            'source': source,
+        })
+        print(f"🔧 Chromedriver {driver_version or '?'} ({source}): {driver_path}")
+        _resolved_driver = driver_path
+        return driver_path
+
+
+def create_chrome_driver(headless=True, performance_log=False):
+    """Start een nieuwe Chrome instantie."""
+    options = build_chrome_options(headless=headless, performance_log=performance_log)
+    # Lokale/gecachte chromedriver, webdriver-manager alleen als terugval
+    service = Service(resolve_chromedriver())
+    return webdriver.Chrome(service=service, options=options)
+
+
+def enable_performance_logging(options):
+    """Zet de Chrome performance log aan (nodig voor netwerk capture en de bytes-bespaard meting)."""
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+
+def read_performance_log(driver) -> List[Tuple[str, Dict]]:
+    """Lees (en leeg) de Chrome performance log. Geeft (method, params) tuples terug."""
+    try:
+        entries = driver.get_log('performance')
+    except Exception:
+        return []
+    events = []
+    for entry in entries:
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, ValueError, TypeError):
+            continue
+        events.append((message.get('method'), message.get('params', {})))
+    return events
+
+
+def resolve_block_patterns(block_resources) -> List[str]:
+    """
+    Zet de block_resources instelling om naar een lijst URL patronen.
+
+    Args:
+        block_resources: True (standaard categorieën), False/None (niets blokkeren),
+            of een lijst met categorienamen uit RESOURCE_BLOCK_PATTERNS en/of eigen URL patronen.
+    """
+    if not block_resources:
+        return []
+    if block_resources is True:
+        block_resources = DEFAULT_BLOCK_CATEGORIES
+    patterns = []
+    for item in block_resources:
+        patterns.extend(RESOURCE_BLOCK_PATTERNS.get(item, [item]))
+    return patterns
+
+
+class ResourceBlocker:
+    """Blokkeer resources via CDP en houd bij hoeveel bandbreedte dat scheelt."""
+
+    def __init__(self, driver, patterns: Iterable[str]):
+        self.driver = driver
+        self.patterns = list(patterns)
+        self.active = False
+        self.blocked_requests = 0
+        self.blocked_by_type: Dict[str, int] = {}
+        self.estimated_bytes_saved = 0
+        self.downloaded_bytes = 0
+
+    def apply(self) -> bool:
+        """Activeer de blokkade. Blijft actief voor alle navigaties in deze tab."""
+        if not self.patterns:
+            return False
+        try:
+            self.driver.execute_cdp_cmd('Network.enable', {})
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.patterns})
+            self.active = True
+            print(f"🚫 Resource blocking actief ({len(self.patterns)} patronen)")
+        except Exception as e:
+            print(f"⚠️ Resource blocking niet beschikbaar: {str(e)[:80]}")
+            self.active = False
+        return self.active
+
+    def observe(self, events: Iterable[Tuple[str, Dict]]):
+        """Verwerk performance log events: tel geblokkeerde en gedownloade requests."""
+        for method, params in events:
+            if method == 'Network.loadingFailed' and params.get('blockedReason'):
+                resource_type = params.get('type') or 'Other'
+                self.blocked_requests += 1
+                self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+                self.estimated_bytes_saved += ESTIMATED_RESOURCE_BYTES.get(resource_type, ESTIMATED_RESOURCE_BYTES['Other'])
+            elif method == 'Network.loadingFinished':
+                self.downloaded_bytes += int(params.get('encodedDataLength') or 0)
+
+    def summary(self) -> Dict:
+        """Statistieken van deze run."""
+        return {
+            'blocked_requests': self.blocked_requests,
+            'blocked_by_type': dict(self.blocked_by_type),
+            'estimated_bytes_saved': self.estimated_bytes_saved,
+            'downloaded_bytes': self.downloaded_bytes,
+        }
+
+    def report(self):
+        """Print hoeveel er geblokkeerd en (geschat) bespaard is."""
+        if not self.active:
+            return
+        by_type = ", ".join(f"{name}: {count}" for name, count in sorted(self.blocked_by_type.items()))
+        print(f"🚫 {self.blocked_requests} requests geblokkeerd" + (f" ({by_type})" if by_type else ""))
+        print(f"   ~{format_bytes(self.estimated_bytes_saved)} bespaard, {format_bytes(self.downloaded_bytes)} gedownload")
+
+
+def format_bytes(num_bytes: Optional[int]) -> str:
+    """Leesbare weergave van een aantal bytes."""
+    size = float(num_bytes or 0)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class BrowserPool:
+    """
+    Pool met voorgestarte Chrome instanties die tussen jobs hergebruikt worden.
+
+    Een job krijgt via acquire() een driver met schone state en geeft hem met release() terug.
+    Drivers worden vervangen na max_jobs_per_browser jobs of als ze niet meer gezond zijn
+    (bijv. na een geforceerde stop). Alle drivers hebben de performance log aan, zodat
+    netwerk capture en resource blocking per job aan of uit kunnen.
+    """
+
+    # Origins waarvan cookies/localStorage tussen jobs gewist worden
+    RESET_ORIGINS = ["https://trustoo.nl", "https://www.trustoo.nl", "https://www.werkspot.nl"]
+
+    def __init__(self, size=1, max_jobs_per_browser=20, headless=True):
+        self.size = size
+        self.max_jobs_per_browser = max_jobs_per_browser
+        self.headless = headless
+        self._idle = []  # [(driver, aantal jobs)]
+        self._in_use = {}  # id(driver) -> aantal jobs
+        self._starting = 0
+        self._condition = threading.Condition()
+        self.launched = 0
+        self.recycled = 0
+
+    def _launch(self):
+        driver = create_chrome_driver(headless=self.headless, performance_log=True)
+        self.launched += 1
+        return driver
+
+    def prewarm(self, count=1, background=True):
+        """Start alvast browsers zodat de eerste job geen koude start heeft."""
+        def warm():
+            for _ in range(count):
+                with self._condition:
+                    if len(self._idle) + len(self._in_use) + self._starting >= self.size:
+                        return
+                    self._starting += 1
+                try:
+                    driver = self._launch()
+                    with self._condition:
+                        self._idle.append((driver, 0))
+                    print("🔥 Browser voorgestart voor de pool")
+                except Exception as e:
+                    print(f"⚠️ Browser voorstarten mislukt: {str(e)[:80]}")
+                finally:
+                    with self._condition:
+                        self._starting -= 1
+                        self._condition.notify_all()
+
+        if background:
+            threading.Thread(target=warm, daemon=True).start()
+        else:
+            warm()
+
+    def acquire(self, timeout=None):
+        """Geef een gezonde driver. Start een nieuwe als de pool nog niet vol is, wacht anders."""
+        while True:
+            with self._condition:
+                while True:
+                    if self._idle:
+                        driver, jobs = self._idle.pop()
+                        break
+                    if len(self._in_use) + self._starting < self.size:
+                        driver, jobs = None, 0
+                        break
+                    # Pool vol (of een voorgestarte browser komt eraan) - wacht op release/prewarm
+                    if not self._condition.wait(timeout=timeout):
+                        raise TimeoutError("Geen browser beschikbaar in de pool")
+                # Plek reserveren: controleren, afsluiten of starten gebeurt buiten het lock
+                # (WebDriver calls kunnen lang duren en zouden release/stats blokkeren)
+                self._starting += 1
+
+            healthy = False
+            try:
+                if driver is None:
+                    driver = self._launch()
+                    healthy = True
+                else:
+                    healthy = self._is_healthy(driver)
+                    if not healthy:
+                        self._quit(driver)
+            finally:
+                with self._condition:
+                    self._starting -= 1
+                    if healthy:
+                        self._in_use[id(driver)] = jobs
+                    self._condition.notify_all()
+            if healthy:
+                return driver
+
+    def release(self, driver):
+        """Geef een driver terug. Wordt gereset, of vervangen als hij op of ongezond is."""
+        with self._condition:
+            jobs = self._in_use.pop(id(driver), 0) + 1
+            # Pool is intussen verkleind (resize) - deze browser is over
+            surplus = len(self._idle) + len(self._in_use) + self._starting >= self.size
+        if surplus:
+            self._quit(driver)
+        elif jobs >= self.max_jobs_per_browser or not self._reset(driver):
+            self._quit(driver)
+            self.recycled += 1
+        else:
+            with self._condition:
+                self._idle.append((driver, jobs))
+        with self._condition:
+            self._condition.notify_all()
+
+    def _is_healthy(self, driver):
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _reset(self, driver):
+        """Wis de state van de vorige job. Geeft False terug als de driver niet meer bruikbaar is."""
+        try:
+            # Extra tabs sluiten, terug naar een lege pagina
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            driver.get("about:blank")
+
+            driver.delete_all_cookies()
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': []})
+            for origin in self.RESET_ORIGINS:
+                driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+
+            # Oude events niet meetellen in de volgende job
+            read_performance_log(driver)
+            return self._is_healthy(driver)
+        except Exception:
+            return False
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def stats(self):
+        """Status van de pool (voor /api/status)."""
+        with self._condition:
+            return {
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'launched': self.launched,
+                'recycled': self.recycled,
+            }
+
+    def resize(self, size):
+        """Zet de grootte van de pool. Bij verkleinen worden overtollige idle browsers direct gesloten,
+        browsers die nog in gebruik zijn bij hun release()."""
+        with self._condition:
+            self.size = max(1, int(size))
+            surplus = len(self._idle) + len(self._in_use) + self._starting - self.size
+            closing = [self._idle.pop() for _ in range(min(max(0, surplus), len(self._idle)))]
+            self._condition.notify_all()
+        for driver, _ in closing:
+            self._quit(driver)
+
+    def close(self):
+        """Sluit alle browsers die niet in gebruik zijn."""
+        with self._condition:
+            idle, self._idle = self._idle, []
+        for driver, _ in idle:
+            self._quit(driver)
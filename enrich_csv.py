@@ -0,0 +1,172 @@
+"""
+Verrijk een bestaande scrape (CSV of Excel) achteraf met Ad Hoc Data.
+Leest het bestand in blokken, verrijkt elk blok met een pool van threads en schrijft het resultaat
+per blok weg. Een checkpoint houdt bij hoeveel rijen klaar zijn, zodat een herstart verder gaat
+waar hij gebleven was. Rijen die al verrijkt zijn (AdHocData_Verrijkt = Ja) worden overgeslagen,
+dus de output nog een keer draaien vult alleen de rijen aan die "In afwachting" of mislukt waren.
+
+Gebruik:
+    python enrich_csv.py scrapes/elektriciens/elektriciens.csv [output.csv] [--workers 8] [--chunk 500] [--excel]
+"""
+
+import os
+import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List
+
+import pandas as pd
+
+from ad_hoc_data import AdHocDataAPI
+from exporters import export_excel
+
+# Kolommen die de verrijking kan toevoegen; ze staan altijd in de output zodat alle blokken dezelfde kolommen hebben
+ENRICHMENT_COLUMNS = ['Website', 'Telefoon', 'Email', 'Contactpersoon', 'SBI_Code', 'AdHocData_Verrijkt', 'AdHocData_MatchScore']
+
+
+def iter_chunks(path: str, chunksize: int, skip_rows: int = 0) -> Iterator[pd.DataFrame]:
+    """Lees een CSV of Excel bestand in blokken van chunksize rijen (alles als tekst)."""
+    if path.lower().endswith(('.xlsx', '.xlsm')):
+        # Excel kan pandas niet in blokken lezen - openpyxl read-only streamt de rijen
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(cell) if cell is not None else '' for cell in next(rows)]
+            batch = []
+            for i, row in enumerate(rows):
+                if i < skip_rows:
+                    continue
+                batch.append(['' if cell is None else str(cell) for cell in row])
+                if len(batch) >= chunksize:
+                    yield pd.DataFrame(batch, columns=header)
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch, columns=header)
+        finally:
+            workbook.close()
+        return
+
+    yield from pd.read_csv(path, chunksize=chunksize, dtype=str, keep_default_na=False, encoding='utf-8-sig',
+                           skiprows=range(1, skip_rows + 1) if skip_rows else None)
+
+
+class CsvEnricher:
+    """Verrijkt een bestand blok voor blok met checkpoint en incrementele output."""
+
+    def __init__(self, input_file: str, output_file: str = None, workers: int = 8, chunksize: int = 500,
+                 api: AdHocDataAPI = None, checkpoint_file: str = None):
+        self.input_file = input_file
+        base = os.path.splitext(input_file)[0]
+        self.output_file = output_file or f"{base}_verrijkt.csv"
+        self.checkpoint_file = checkpoint_file or os.path.splitext(self.output_file)[0] + "_checkpoint.json"
+        self.workers = max(1, workers)
+        self.chunksize = max(1, chunksize)
+        self.api = api or AdHocDataAPI()
+        self.columns: List[str] = []
+
+        self.rows_done = 0
+        self.enriched = 0
+        self.skipped = 0
+
+    def load_checkpoint(self) -> int:
+        """Herstel rows_done en kap de output af op de laatst bevestigde grootte."""
+        if not os.path.exists(self.checkpoint_file):
+            return 0
+        try:
+            with open(self.checkpoint_file, 'r') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if checkpoint.get('input') != os.path.abspath(self.input_file) or not os.path.exists(self.output_file):
+            return 0
+
+        # Een blok dat na het laatste checkpoint half geschreven is weer weghalen
+        with open(self.output_file, 'r+b') as f:
+            f.truncate(checkpoint['output_bytes'])
+        self.rows_done = checkpoint['rows_done']
+        self.columns = checkpoint.get('columns', [])
+        print(f"📌 Hervatten na {self.rows_done} rijen")
+        return self.rows_done
+
+    def _save_checkpoint(self):
+        tmp_file = self.checkpoint_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump({
+                'input': os.path.abspath(self.input_file),
+                'rows_done': self.rows_done,
+                'output_bytes': os.path.getsize(self.output_file),
+                'columns': self.columns,
+            }, f)
+        os.replace(tmp_file, self.checkpoint_file)
+
+    def _enrich_row(self, row: Dict) -> Dict:
+        if row.get('AdHocData_Verrijkt') == 'Ja':
+            return row  # Al verrijkt in een eerdere run
+        try:
+            return self.api.enrich_company(row)
+        except Exception as e:
+            print(f"   ⚠️ Verrijking mislukt voor {row.get('Naam', 'Onbekend')}: {str(e)[:50]}")
+            return row
+
+    def _write_chunk(self, rows: List[Dict]):
+        """Voeg een blok toe aan de output; de kolommen liggen vast na het eerste blok."""
+        if not self.columns:
+            self.columns = list(dict.fromkeys([col for row in rows for col in row] + ENRICHMENT_COLUMNS))
+        first = not os.path.exists(self.output_file) or os.path.getsize(self.output_file) == 0
+        df = pd.DataFrame(rows).reindex(columns=self.columns, fill_value='')
+        df.to_csv(self.output_file, mode='a', header=first, index=False, encoding='utf-8-sig' if first else 'utf-8')
+
+    def run(self) -> str:
+        """Verrijk het hele bestand. Geeft het pad van de output terug."""
+        if self.load_checkpoint() == 0 and os.path.exists(self.output_file):
+            os.remove(self.output_file)  # Geen geldig checkpoint - opnieuw beginnen
+
+        print(f"🔄 Verrijken van {self.input_file} ({self.workers} tegelijk, blokken van {self.chunksize})")
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for chunk in iter_chunks(self.input_file, self.chunksize, skip_rows=self.rows_done):
+                rows = chunk.to_dict('records')
+                already = sum(1 for row in rows if row.get('AdHocData_Verrijkt') == 'Ja')
+                # map behoudt de volgorde van de rijen
+                enriched_rows = list(executor.map(self._enrich_row, rows))
+                self.enriched += sum(1 for row in enriched_rows if row.get('AdHocData_Verrijkt') == 'Ja') - already
+                self.skipped += already
+
+                self._write_chunk(enriched_rows)
+                self.rows_done += len(rows)
+                self._save_checkpoint()
+                print(f"   💾 {self.rows_done} rijen verwerkt ({self.enriched} verrijkt, {self.skipped} al verrijkt)")
+
+        if os.path.exists(self.checkpoint_file):
+            os.remove(self.checkpoint_file)
+        print(f"✅ Klaar: {self.rows_done} rijen, output in {self.output_file}")
+        return self.output_file
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verrijk een bestaande scrape met Ad Hoc Data")
+    parser.add_argument('input', help="CSV of Excel bestand (bijv. scrapes/<titel>/<titel>.csv)")
+    parser.add_argument('output', nargs='?', help="output CSV (standaard <input>_verrijkt.csv)")
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('AD_HOC_DATA_WORKERS', 8)),
+                        help="aantal gelijktijdige lookups")
+    parser.add_argument('--chunk', type=int, default=500, help="aantal rijen per blok / checkpoint")
+    parser.add_argument('--excel', action='store_true', help="na afloop ook een Excel versie schrijven")
+    args = parser.parse_args(argv)
+
+    api = AdHocDataAPI(persist_endpoint=True)
+    try:
+        output_file = CsvEnricher(args.input, args.output, workers=args.workers, chunksize=args.chunk, api=api).run()
+    finally:
+        api.close()
+
+    if args.excel:
+        excel_file = os.path.splitext(output_file)[0] + ".xlsx"
+        # Blok voor blok naar Excel streamen, zodat ook grote bestanden niet in het geheugen hoeven
+        columns = list(pd.read_csv(output_file, nrows=0, encoding='utf-8-sig').columns)
+        chunks = iter_chunks(output_file, 5000)
+        export_excel((row for chunk in chunks for row in chunk.to_dict('records')), excel_file, columns=columns)
+        print(f"📁 Excel: {excel_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Achtergrond verrijking met Ad Hoc Data.
+De scraper zet nieuwe bedrijven in een wachtrij; een pool van worker threads doet de API lookups
+en werkt de records in place bij. Zo wacht de browser niet meer op HTTP lookups.
+Records die door een open circuit breaker niet verrijkt konden worden ("In afwachting") worden
+opnieuw ingepland zodra de API weer bereikbaar is.
+"""
+
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from ad_hoc_data import PENDING_ENRICHMENT
+
+# Velden die de verrijking invult. Ze worden vooraf gezet zodat elk record dezelfde kolommen heeft,
+# ook als de lookup nooit gedaan wordt.
+ENRICHMENT_FIELDS = ['Email', 'Contactpersoon', 'SBI_Code', 'AdHocData_MatchScore']
+PENDING_STATUS = 'In wachtrij'
+# Maximaal zo lang (seconden) wachten tot de worker threads na close() gestopt zijn
+CLOSE_JOIN_TIMEOUT = 15
+
+
+class EnrichmentWorker:
+    """Pool van threads die bedrijven op de achtergrond verrijken via een AdHocDataAPI client."""
+
+    def __init__(self, api, workers=4, on_update=None):
+        """
+        Args:
+            api: AdHocDataAPI (of compatibel object met enrich_company)
+            workers: aantal gelijktijdige lookups
+            on_update: optionele callback(company) als een record bijgewerkt is (bijv. CompanyStore.upsert)
+        """
+        self.api = api
+        self.on_update = on_update
+        self.workers = max(1, int(workers))
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self.submitted = 0
+        self.done = 0
+        self.enriched = 0
+        self.not_enriched = 0  # geen match, geen naam/adres of fout
+        self.backfilled = 0
+        self._awaiting: List[Dict] = []  # wachten op een dicht circuit
+        self.started_at = None
+
+    def _start(self):
+        """Start de threads bij de eerste submit."""
+        self.started_at = time.time()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"enrich-worker-{i + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, company: Dict):
+        """Zet een record in de wachtrij; het wordt later in place bijgewerkt."""
+        for field in ENRICHMENT_FIELDS:
+            company.setdefault(field, '')
+        company['AdHocData_Verrijkt'] = PENDING_STATUS
+        with self._lock:
+            closed = self._closed
+            if not closed and not self._threads:
+                self._start()
+        if closed:
+            company['AdHocData_Verrijkt'] = 'Nee'
+            self._notify(company)
+            return
+        self._enqueue(company)
+
+    def _notify(self, company: Dict):
+        if self.on_update is not None:
+            try:
+                self.on_update(company)
+            except Exception as e:
+                print(f"   ⚠️ Bijgewerkt record niet opgeslagen: {str(e)[:50]}")
+
+    def _enqueue(self, company: Dict):
+        with self._lock:
+            self.submitted += 1
+        self._queue.put(company)
+
+    def _maybe_backfill(self):
+        """Plan records "In afwachting" opnieuw in: allemaal als het circuit dicht is, anders één als probe."""
+        breaker = getattr(self.api, 'breaker', None)
+        with self._lock:
+            if not self._awaiting or self._closed:
+                return
+            if breaker is None or breaker.state == "closed":
+                batch, self._awaiting = self._awaiting, []
+            elif breaker.ready_for_probe():
+                batch = [self._awaiting.pop(0)]
+            else:
+                return
+            self.backfilled += len(batch)
+        for company in batch:
+            self._enqueue(company)
+
+    def _work(self):
+        while True:
+            try:
+                company = self._queue.get(timeout=1)
+            except queue.Empty:
+                self._maybe_backfill()
+                continue
+            if company is None:
+                self._queue.task_done()
+                return
+            try:
+                if self._closed:
+                    # Afgebroken voordat de lookup gedaan is
+                    company['AdHocData_Verrijkt'] = 'Nee'
+                    self._notify(company)
+                    continue
+                try:
+                    result = self.api.enrich_company(company)
+                    company.update(result)
+                    status = result.get('AdHocData_Verrijkt')
+                except Exception as e:
+                    print(f"   ⚠️ Verrijking mislukt voor {company.get('Naam', 'Onbekend')}: {str(e)[:50]}")
+                    company['AdHocData_Verrijkt'] = status = 'Nee'
+                self._notify(company)
+                with self._lock:
+                    if status == PENDING_ENRICHMENT:
+                        self._awaiting.append(company)
+                    elif status == 'Ja':
+                        self.enriched += 1
+                    else:
+                        self.not_enriched += 1
+                if status != PENDING_ENRICHMENT:
+                    self._maybe_backfill()
+            finally:
+                with self._lock:
+                    self.done += 1
+                self._queue.task_done()
+
+    def pending(self) -> int:
+        with self._lock:
+            return self.submitted - self.done
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wacht tot alle lookups in de wachtrij klaar zijn.
+
+        Returns:
+            True als alles verwerkt is, False als de timeout verstreek
+        """
+        remaining = self.pending()
+        if remaining:
+            print(f"⏳ Wachten op verrijking van {remaining} bedrijven...")
+        deadline = None if timeout is None else time.time() + timeout
+        while self.pending() > 0:
+            if deadline is not None and time.time() >= deadline:
+                print(f"⚠️ Verrijking niet afgerond: {self.pending()} bedrijven overgeslagen")
+                return False
+            time.sleep(0.1)
+        awaiting = len(self._awaiting)
+        if awaiting:
+            print(f"⏸️  {awaiting} bedrijven nog '{PENDING_ENRICHMENT}' (Ad Hoc Data API onbereikbaar)")
+        return True
+
+    def close(self, timeout: Optional[float] = 0, join_timeout: float = CLOSE_JOIN_TIMEOUT):
+        """
+        Stop de workers. Wat na timeout nog in de wachtrij staat wordt als niet verrijkt gemarkeerd.
+        Wacht daarna (hooguit join_timeout seconden) tot de threads gestopt zijn, zodat on_update na
+        close() niet meer aangeroepen wordt - de eigenaar kan dan veilig zijn store sluiten.
+        """
+        if timeout != 0:
+            self.drain(timeout)
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        for _ in self._threads:
+            self._queue.put(None)
+        deadline = time.time() + join_timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.time()))
+        alive = sum(1 for thread in self._threads if thread.is_alive())
+        if alive:
+            # Lookup hangt nog - het resultaat niet meer wegschrijven, de store wordt zo gesloten
+            self.on_update = None
+            print(f"⚠️ {alive} verrijkingsworkers nog bezig na {join_timeout}s - hun resultaten worden niet opgeslagen")
+
+    def progress(self) -> Dict:
+        """Voortgang voor /api/status."""
+        cache = getattr(self.api, 'cache', None)
+        limiter = getattr(self.api, 'limiter', None)
+        breaker = getattr(self.api, 'breaker', None)
+        with self._lock:
+            elapsed = time.time() - self.started_at if self.started_at else 0
+            return {
+                'submitted': self.submitted,
+                'done': self.done,
+                'pending': self.submitted - self.done,
+                'enriched': self.enriched,
+                'not_enriched': self.not_enriched,
+                'workers': self.workers,
+                'per_second': round(self.done / elapsed, 2) if elapsed > 0 else 0.0,
+                'cache': cache.stats() if cache is not None else None,
+                'rate_limit': limiter.stats() if limiter is not None else None,
+                'awaiting_backfill': len(self._awaiting),
+                'backfilled': self.backfilled,
+                'circuit': breaker.stats() if breaker is not None else None,
+            }
@@ -0,0 +1,143 @@
+"""
+Persistente cache voor Ad Hoc Data lookups (SQLite).
+Sleutel is de genormaliseerde (Naam, Adres); de ruwe API response wordt bewaard zodat de matching
+later opnieuw gedaan kan worden zonder API call. Ook "geen match" resultaten worden (korter) bewaard.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+import unicodedata
+from typing import Dict, Optional, Tuple
+
+CACHE_FILE = os.environ.get(
+    'AD_HOC_DATA_CACHE_FILE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'do-scraper', 'adhocdata.sqlite')
+)
+
+DEFAULT_TTL_DAYS = 30
+DEFAULT_NEGATIVE_TTL_DAYS = 7
+
+
+def normalize_text(text: str) -> str:
+    """Kleine letters, zonder accenten, leestekens en dubbele spaties."""
+    text = unicodedata.normalize('NFKD', str(text or '')).encode('ascii', 'ignore').decode('ascii')
+    text = re.sub(r'[^a-z0-9]+', ' ', text.lower())
+    return ' '.join(text.split())
+
+
+def cache_key(naam: str, adres: str) -> str:
+    """Cache sleutel voor een bedrijf: genormaliseerde naam en adres."""
+    return f"{normalize_text(naam)}|{normalize_text(adres)}"
+
+
+class EnrichmentCache:
+    """SQLite cache met TTL, negative caching en hit/miss tellers. Thread-safe (één verbinding met lock)."""
+
+    def __init__(self, path: str = CACHE_FILE, ttl_days: float = DEFAULT_TTL_DAYS,
+                 negative_ttl_days: float = DEFAULT_NEGATIVE_TTL_DAYS):
+        """
+        Args:
+            path: SQLite bestand (standaard AD_HOC_DATA_CACHE_FILE of ~/.cache/do-scraper/adhocdata.sqlite)
+            ttl_days: geldigheid van een gematcht resultaat
+            negative_ttl_days: geldigheid van een "geen match" resultaat
+        """
+        self.path = path
+        self.ttl = ttl_days * 86400
+        self.negative_ttl = negative_ttl_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS lookups (
+                key TEXT PRIMARY KEY,
+                naam TEXT,
+                adres TEXT,
+                response TEXT,
+                matched INTEGER NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, naam: str, adres: str) -> Tuple[bool, Optional[Dict]]:
+        """
+        Zoek een eerdere response op.
+
+        Returns:
+            (gevonden, response). Verlopen entries tellen als niet gevonden.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, matched, fetched_at FROM lookups WHERE key = ?", (cache_key(naam, adres),)
+            ).fetchone()
+            if row is not None:
+                response, matched, fetched_at = row
+                ttl = self.ttl if matched else self.negative_ttl
+                if time.time() - fetched_at < ttl:
+                    self.hits += 1
+                    return True, json.loads(response) if response else None
+            self.misses += 1
+            return False, None
+
+    def put(self, naam: str, adres: str, response, matched: bool):
+        """Bewaar de ruwe response; matched=False voor een (korter geldige) "geen match"."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO lookups (key, naam, adres, response, matched, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (cache_key(naam, adres), naam, adres,
+                 json.dumps(response, ensure_ascii=False) if response is not None else None,
+                 1 if matched else 0, time.time())
+            )
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Verwijder verlopen entries. Geeft het aantal verwijderde rijen terug."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM lookups WHERE (matched = 1 AND fetched_at < ?) OR (matched = 0 AND fetched_at < ?)",
+                (now - self.ttl, now - self.negative_ttl)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def stats(self) -> Dict:
+        """Hit/miss tellers van deze sessie en de grootte van de cache."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM lookups").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'entries': entries,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def resolve_cache(cache) -> Optional[EnrichmentCache]:
+    """
+    Zet de cache parameter van de API clients om naar een EnrichmentCache.
+    True = standaard cache (uit te zetten met AD_HOC_DATA_CACHE=false), False/None = geen cache.
+    """
+    if isinstance(cache, EnrichmentCache):
+        return cache
+    if not cache or os.environ.get('AD_HOC_DATA_CACHE', 'true').lower() == 'false':
+        return None
+    try:
+        return EnrichmentCache()
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️ Ad Hoc Data cache niet beschikbaar: {e}")
+        return None
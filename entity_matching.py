@@ -0,0 +1,273 @@
+"""
+Fuzzy matching van Ad Hoc Data resultaten op gescrapete bedrijven.
+Normaliseert namen (rechtsvormen, accenten, leestekens) en adressen (postcode, huisnummer) en
+berekent een score tussen 0 en 1. De similarity wordt met numpy berekend over gehashte tokens en
+trigrammen, zodat duizenden paren (bijv. alle responses uit de cache opnieuw matchen) in één keer gaan.
+
+Gebruik:
+    python entity_matching.py scrapes/<titel>/<titel>.csv [output.csv]   # opnieuw matchen vanuit de cache
+"""
+
+import os
+import re
+import zlib
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Rechtsvormen die niets over de identiteit van een bedrijf zeggen
+LEGAL_SUFFIXES = {
+    'bv', 'b v', 'nv', 'n v', 'vof', 'v o f', 'cv', 'c v', 'eenmanszaak', 'holding', 'stichting',
+    'vereniging', 'cooperatie', 'ua', 'u a', 'ba', 'b a',
+}
+
+POSTCODE_RE = re.compile(r'\b(\d{4})\s?([A-Za-z]{2})\b')
+HOUSE_NUMBER_RE = re.compile(r'\b(\d{1,5})\s*(?:-|\s)?\s*([A-Za-z]{1,2}\b|\d{1,3}\b)?')
+
+NAME_KEYS = ['naam', 'Naam', 'name', 'handelsnaam']
+ADDRESS_KEYS = ['adres', 'Adres', 'address']
+POSTCODE_KEYS = ['postcode', 'Postcode', 'zipcode']
+CITY_KEYS = ['plaats', 'Plaats', 'woonplaats', 'city']
+
+# Gewichten en drempels (drempel te overschrijven met AD_HOC_DATA_MATCH_THRESHOLD)
+NAME_WEIGHT = 0.6
+ADDRESS_WEIGHT = 0.4
+MIN_NAME_SIMILARITY = 0.5
+MIN_ADDRESS_SIMILARITY = 0.5
+MATCH_THRESHOLD = float(os.environ.get('AD_HOC_DATA_MATCH_THRESHOLD', 0.6))
+
+HASH_DIM = 1024
+BLOCK_SIZE = 4096
+
+
+def _strip_accents(text: str) -> str:
+    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+
+
+@lru_cache(maxsize=65536)
+def normalize_name(name: str) -> str:
+    """Bedrijfsnaam zonder accenten, leestekens en rechtsvorm: "Elektro Jansen B.V." -> "elektro jansen"."""
+    text = _strip_accents(str(name or '')).lower()
+    # "b.v." / "v.o.f." eerst aan elkaar schrijven, anders blijven er losse letters over
+    text = re.sub(r'\b([a-z])\.\s?(?=[a-z]\b\.?)', r'\1', text)
+    text = re.sub(r'[^a-z0-9]+', ' ', text)
+    tokens = [token for token in text.split() if token not in LEGAL_SUFFIXES]
+    return ' '.join(tokens)
+
+
+@lru_cache(maxsize=65536)
+def parse_address(address: str) -> Tuple[str, str, str]:
+    """
+    Splits een adres in (postcode, huisnummer, rest).
+
+    "Dorpsstraat 12a, 1234 ab Utrecht" -> ("1234AB", "12A", "dorpsstraat utrecht")
+    "2e Jan Steenstraat 5, Amsterdam" -> ("", "5", "2e jan steenstraat amsterdam")
+    """
+    text = _strip_accents(str(address or ''))
+    postcode = ''
+    match = POSTCODE_RE.search(text)
+    if match:
+        postcode = (match.group(1) + match.group(2)).upper()
+        # Als scheiding markeren: het huisnummer staat vóór de postcode
+        text = text[:match.start()] + ',' + text[match.end():]
+
+    # Huisnummer = laatste getal in het straatdeel (vóór postcode of komma), niet het eerste getal:
+    # in "2e Jan Steenstraat 5" hoort de 2 bij de straatnaam
+    street = text.split(',', 1)[0]
+    matches = list(HOUSE_NUMBER_RE.finditer(street)) or list(HOUSE_NUMBER_RE.finditer(text))
+    house_number = ''
+    match = matches[-1] if matches else None
+    if match:
+        addition = match.group(2) or ''
+        house_number = (match.group(1) + ('-' + addition if addition.isdigit() else addition)).upper()
+        text = text[:match.start()] + ' ' + text[match.end():]
+
+    rest = ' '.join(re.sub(r'[^a-z0-9]+', ' ', text.lower()).split())
+    return postcode, house_number, rest
+
+
+def _trigrams(text: str) -> List[str]:
+    padded = f" {text} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)] if text else []
+
+
+def _hash_matrix(features: Sequence[Sequence[str]]) -> np.ndarray:
+    """Binaire (n, HASH_DIM) matrix met een bit per gehasht token."""
+    matrix = np.zeros((len(features), HASH_DIM), dtype=bool)
+    rows, cols = [], []
+    for i, items in enumerate(features):
+        for item in items:
+            rows.append(i)
+            cols.append(zlib.crc32(item.encode()) % HASH_DIM)
+    if rows:
+        matrix[rows, cols] = True
+    return matrix
+
+
+def _jaccard(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Jaccard per rij van twee even grote binaire matrices."""
+    intersection = np.logical_and(a, b).sum(axis=1)
+    union = np.logical_or(a, b).sum(axis=1)
+    return np.divide(intersection, union, out=np.zeros(len(a)), where=union > 0)
+
+
+def _overlap(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Overlap coëfficiënt per rij: doorsnede gedeeld door de kleinste set (deelnaam telt als match)."""
+    intersection = np.logical_and(a, b).sum(axis=1)
+    smallest = np.minimum(a.sum(axis=1), b.sum(axis=1))
+    return np.divide(intersection, smallest, out=np.zeros(len(a)), where=smallest > 0)
+
+
+def _text_similarity(left: Sequence[str], right: Sequence[str], containment: bool = False) -> np.ndarray:
+    """
+    Gemiddelde van token-Jaccard en trigram similarity per paar.
+    Met containment telt de trigram overlap t.o.v. de kortste tekst ("Jansen" vs "Elektro Jansen").
+    """
+    if len(left) > BLOCK_SIZE:
+        # In blokken, zodat de (n, HASH_DIM) matrices klein blijven
+        return np.concatenate([_text_similarity(left[i:i + BLOCK_SIZE], right[i:i + BLOCK_SIZE], containment)
+                               for i in range(0, len(left), BLOCK_SIZE)])
+    tokens = _jaccard(_hash_matrix([text.split() for text in left]), _hash_matrix([text.split() for text in right]))
+    left_grams = _hash_matrix([_trigrams(text) for text in left])
+    right_grams = _hash_matrix([_trigrams(text) for text in right])
+    grams = _overlap(left_grams, right_grams) if containment else _jaccard(left_grams, right_grams)
+    return (tokens + grams) / 2
+
+
+def score_pairs(left: Sequence[Tuple[str, str]], right: Sequence[Tuple[str, str]]) -> Dict[str, np.ndarray]:
+    """
+    Score paren (naam, adres) links tegen (naam, adres) rechts, gevectoriseerd.
+
+    Returns:
+        dict met arrays 'score', 'name' en 'address' (alle tussen 0 en 1) en 'match' (bool)
+    """
+    if not left:
+        empty = np.zeros(0)
+        return {'score': empty, 'name': empty, 'address': empty, 'match': empty.astype(bool)}
+
+    name_similarity = _text_similarity([normalize_name(name) for name, _ in left],
+                                       [normalize_name(name) for name, _ in right], containment=True)
+
+    left_addresses = [parse_address(address) for _, address in left]
+    right_addresses = [parse_address(address) for _, address in right]
+    left_postcodes = np.array([postcode for postcode, _, _ in left_addresses])
+    right_postcodes = np.array([postcode for postcode, _, _ in right_addresses])
+    left_numbers = np.array([number for _, number, _ in left_addresses])
+    right_numbers = np.array([number for _, number, _ in right_addresses])
+
+    # Postcode is het sterkste signaal; huisnummer telt half mee als één van beide ontbreekt
+    both_postcodes = (left_postcodes != '') & (right_postcodes != '')
+    number_score = np.where((left_numbers == '') | (right_numbers == ''), 0.5,
+                            (left_numbers == right_numbers).astype(float))
+    postcode_score = 0.7 * (left_postcodes == right_postcodes) + 0.3 * number_score
+    # Zonder postcode aan beide kanten: straat/plaats tekst vergelijken
+    # Met containment: alleen een plaats ("Utrecht") past op een volledig adres in die plaats
+    rest_score = _text_similarity([rest for _, _, rest in left_addresses], [rest for _, _, rest in right_addresses],
+                                  containment=True)
+    address_similarity = np.where(both_postcodes, postcode_score, rest_score)
+
+    score = NAME_WEIGHT * name_similarity + ADDRESS_WEIGHT * address_similarity
+    match = ((name_similarity >= MIN_NAME_SIMILARITY) & (address_similarity >= MIN_ADDRESS_SIMILARITY)
+             & (score >= MATCH_THRESHOLD))
+    return {'score': score, 'name': name_similarity, 'address': address_similarity, 'match': match}
+
+
+def _first(data: Dict, keys: List[str]) -> str:
+    for key in keys:
+        value = data.get(key)
+        if value:
+            return str(value)
+    return ''
+
+
+def candidate_key(candidate: Dict) -> Tuple[str, str]:
+    """(naam, adres) van een API resultaat; losse postcode/plaats velden worden aan het adres toegevoegd."""
+    address = _first(candidate, ADDRESS_KEYS)
+    for extra in (_first(candidate, POSTCODE_KEYS), _first(candidate, CITY_KEYS)):
+        if extra and extra.lower() not in address.lower():
+            address = f"{address}, {extra}" if address else extra
+    return _first(candidate, NAME_KEYS), address
+
+
+def best_matches(queries: Sequence[Tuple[str, str]], candidate_lists: Sequence[List[Dict]]) -> List[Tuple[Optional[int], float]]:
+    """
+    Beste kandidaat per query in één gevectoriseerde berekening.
+
+    Args:
+        queries: (naam, adres) per bedrijf
+        candidate_lists: lijst met API resultaten per bedrijf
+
+    Returns:
+        per bedrijf (index van de beste match of None, score van de beste kandidaat)
+    """
+    left, right, owners = [], [], []
+    for owner, (query, candidates) in enumerate(zip(queries, candidate_lists)):
+        for candidate in candidates:
+            left.append(query)
+            right.append(candidate_key(candidate))
+            owners.append(owner)
+
+    scores = score_pairs(left, right)
+    results: List[Tuple[Optional[int], float]] = [(None, 0.0)] * len(queries)
+    position = 0
+    for owner, candidates in enumerate(candidate_lists):
+        count = len(candidates)
+        if count:
+            block = slice(position, position + count)
+            best = int(np.argmax(scores['score'][block]))
+            matched = bool(scores['match'][block][best])
+            results[owner] = (best if matched else None, float(scores['score'][block][best]))
+        position += count
+    return results
+
+
+def best_match(company_name: str, company_address: str, candidates: List[Dict]) -> Tuple[Optional[int], float]:
+    """Beste kandidaat voor één bedrijf: (index of None als niets goed genoeg is, score)."""
+    return best_matches([(company_name, company_address)], [candidates])[0]
+
+
+def rematch_from_cache(companies: List[Dict], cache) -> List[Dict]:
+    """
+    Match bedrijven opnieuw tegen de ruwe responses in de EnrichmentCache, zonder API calls.
+    Bedrijven zonder cache entry blijven ongewijzigd.
+    """
+    from ad_hoc_data import apply_match, candidates_from_result, mark_no_match
+
+    indices, queries, candidate_lists = [], [], []
+    for i, company in enumerate(companies):
+        found, response = cache.get(company.get('Naam', ''), company.get('Adres', ''))
+        if found and response:
+            indices.append(i)
+            queries.append((company.get('Naam', ''), company.get('Adres', '')))
+            candidate_lists.append(candidates_from_result(response))
+
+    for i, candidates, (best, score) in zip(indices, candidate_lists, best_matches(queries, candidate_lists)):
+        if best is None:
+            companies[i] = mark_no_match(companies[i], score)
+        else:
+            companies[i] = apply_match(companies[i], candidates[best], score)
+    print(f"🔁 {len(indices)} van {len(companies)} bedrijven opnieuw gematcht vanuit de cache")
+    return companies
+
+
+if __name__ == "__main__":
+    import sys
+    import pandas as pd
+    from enrichment_cache import EnrichmentCache
+
+    if len(sys.argv) < 2:
+        print("Gebruik: python entity_matching.py <bedrijven.csv> [output.csv]")
+        sys.exit(1)
+
+    input_file = sys.argv[1]
+    output_file = sys.argv[2] if len(sys.argv) > 2 else input_file.replace('.csv', '_gematcht.csv')
+    records = pd.read_csv(input_file, dtype=str, keep_default_na=False, encoding='utf-8-sig').to_dict('records')
+    cache = EnrichmentCache()
+    try:
+        rematch_from_cache(records, cache)
+    finally:
+        cache.close()
+    pd.DataFrame(records).to_csv(output_file, index=False, encoding='utf-8-sig')
+    print(f"💾 Opgeslagen in: {output_file}")
@@ -0,0 +1,312 @@
+"""
+Export van bedrijfsrecords naar CSV, Excel en Parquet/Arrow.
+CSV wordt in blokken van CSV_BATCH_SIZE rijen geschreven (zoals enrich_csv), niet via één DataFrame.
+Excel wordt met openpyxl in write-only mode geschreven: rijen worden direct naar het bestand gestreamd in
+plaats van eerst een volledig workbook (en DataFrame) in het geheugen op te bouwen. Numerieke kolommen
+worden als getal weggeschreven, kolombreedtes worden geschat op een steekproef van de eerste rijen.
+Parquet en Arrow IPC (pyarrow, optioneel) krijgen getypeerde kolommen: getallen als float/int,
+Beschikbaarheid als categorie (dictionary), de rest als tekst - met compressie.
+"""
+
+import os
+import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils import get_column_letter
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optioneel - alleen nodig voor export_parquet
+    pa = None
+    pq = None
+
+HAS_PYARROW = pa is not None
+
+# Kolomvolgorde van de Trustoo export (met Ad Hoc Data en profielvelden)
+TRUSTOO_COLUMNS = [
+    'Naam', 'Adres', 'Telefoon', 'Email', 'Website', 'Contactpersoon',
+    'TrustScore', 'AantalReviews', 'Beschikbaarheid', 'JarenInBedrijf',
+    'LaatsteReview', 'SBI_Code', 'Beschrijving', 'BeschrijvingVolledig', 'Diensten',
+    'Certificeringen', 'Reviews', 'AantalReviewsProfiel', 'ProfielURL', 'ProfielGecrawld',
+    'AdHocData_Verrijkt', 'AdHocData_MatchScore'
+]
+
+# Kolommen die als getal in Excel komen (waarden die niet te parsen zijn, zoals "N/A", blijven tekst)
+NUMERIC_COLUMNS = {
+    'TrustScore': float,
+    'Rating': float,
+    'AantalReviews': int,
+    'AantalReviewsProfiel': int,
+    'AdHocData_MatchScore': float,
+}
+
+# Kolommen met weinig verschillende waarden: in Parquet/Arrow als categorie (dictionary encoded)
+CATEGORICAL_COLUMNS = ['Beschikbaarheid', 'AdHocData_Verrijkt', 'ProfielGecrawld', 'Categorie']
+
+WIDTH_SAMPLE_ROWS = 200
+MIN_COLUMN_WIDTH = 8
+MAX_COLUMN_WIDTH = 60
+MAX_CELL_LENGTH = 32767  # limiet van Excel per cel
+ARROW_BATCH_SIZE = 10000
+CSV_BATCH_SIZE = 5000
+PARQUET_COMPRESSION = 'zstd'
+
+
+def existing_columns(records: Iterable[Dict], column_order: Optional[List[str]] = None) -> List[str]:
+    """
+    Kolommen uit column_order die in minstens één record voorkomen; zonder column_order alle velden op volgorde.
+    Een CompanyStore houdt zijn kolommen zelf bij (records.columns) - dan is er geen scan nodig.
+    """
+    present = {}
+    if isinstance(getattr(records, 'columns', None), list):
+        present = dict.fromkeys(records.columns)
+    else:
+        for record in records:
+            for key in record:
+                present.setdefault(key, None)
+    if column_order is None:
+        return list(present)
+    return [col for col in column_order if col in present]
+
+
+def _is_empty(value) -> bool:
+    # NaN is niet gelijk aan zichzelf
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def _number(value, kind):
+    """Parse een getal ("4,8", "12", 0.83). None als het geen getal is (bijv. "N/A")."""
+    if _is_empty(value) or isinstance(value, bool):
+        return None
+    try:
+        number = float(str(value).strip().replace(',', '.'))
+    except ValueError:
+        return None
+    if number != number:
+        return None
+    return int(number) if kind is int and number.is_integer() else number
+
+
+def _cell_value(value, kind=None):
+    """Zet een veldwaarde om naar een Excel celwaarde."""
+    if _is_empty(value):
+        return None
+    if kind is not None:
+        number = _number(value, kind)
+        if number is not None:
+            return number
+    if isinstance(value, (int, float)):
+        return value
+    text = ILLEGAL_CHARACTERS_RE.sub('', str(value))
+    return text[:MAX_CELL_LENGTH]
+
+
+def export_csv(records: Iterable[Dict], filename: str, columns: Optional[List[str]] = None,
+               silent: bool = False) -> Dict:
+    """
+    Schrijf records in blokken van CSV_BATCH_SIZE rijen naar CSV (utf-8-sig, zoals de DataFrame export).
+
+    Args:
+        records: lijst, CompanyStore of iterator van dicts
+        filename: doelbestand; er wordt eerst naar een tijdelijk bestand geschreven en dan hernoemd
+        columns: kolommen in volgorde (standaard alle velden van de records)
+        silent: geen voortgangsregel printen
+
+    Returns:
+        Dict met rows, seconds en rows_per_second
+    """
+    started = time.time()
+    if columns is None:
+        if not isinstance(records, list) and not hasattr(records, 'columns'):
+            raise ValueError("columns is verplicht als records een iterator is")
+        columns = existing_columns(records)
+
+    base, ext = os.path.splitext(filename)
+    tmp_file = f"{base}.tmp{ext or '.csv'}"
+    # Kop met BOM, daarna de blokken zonder BOM erachter
+    pd.DataFrame(columns=columns).to_csv(tmp_file, index=False, encoding='utf-8-sig')
+    rows = 0
+    iterator = iter(records)
+    for chunk in iter(lambda: list(islice(iterator, CSV_BATCH_SIZE)), []):
+        pd.DataFrame(chunk, columns=columns).to_csv(tmp_file, mode='a', header=False, index=False, encoding='utf-8')
+        rows += len(chunk)
+    os.replace(tmp_file, filename)
+
+    seconds = time.time() - started
+    stats = {
+        'rows': rows,
+        'seconds': round(seconds, 2),
+        'rows_per_second': round(rows / seconds) if seconds > 0 else rows,
+    }
+    if not silent:
+        print(f"📊 CSV: {rows} rijen in {stats['seconds']}s ({stats['rows_per_second']} rijen/s)")
+    return stats
+
+
+def _column_widths(columns: List[str], sample: List[Dict]) -> List[float]:
+    """Schat kolombreedtes op de kop en een steekproef van rijen (goedkoop, geen volledige scan)."""
+    widths = []
+    for col in columns:
+        longest = max([len(col)] + [len(str(record.get(col) or '')) for record in sample])
+        widths.append(min(MAX_COLUMN_WIDTH, max(MIN_COLUMN_WIDTH, longest + 2)))
+    return widths
+
+
+def export_excel(records: Iterable[Dict], filename: str, columns: Optional[List[str]] = None,
+                 sheet_title: str = "Bedrijven", silent: bool = False) -> Dict:
+    """
+    Schrijf records gestreamd naar een .xlsx bestand.
+
+    Args:
+        records: lijst of iterator van dicts (een iterator wordt niet in zijn geheel in het geheugen gezet)
+        filename: doelbestand; er wordt eerst naar een tijdelijk bestand geschreven en dan hernoemd
+        columns: kolommen in volgorde (standaard alle velden van de records)
+        sheet_title: naam van het werkblad
+        silent: geen voortgangsregel printen
+
+    Returns:
+        Dict met rows, seconds en rows_per_second
+    """
+    started = time.time()
+    iterator = iter(records)
+    sample = list(islice(iterator, WIDTH_SAMPLE_ROWS))
+    if columns is None:
+        if not isinstance(records, list):
+            raise ValueError("columns is verplicht als records een iterator is")
+        columns = existing_columns(records)
+    kinds = [NUMERIC_COLUMNS.get(col) for col in columns]
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title)
+    # Breedtes en freeze panes moeten gezet zijn voordat de eerste rij geschreven wordt
+    for index, width in enumerate(_column_widths(columns, sample), 1):
+        sheet.column_dimensions[get_column_letter(index)].width = width
+    sheet.freeze_panes = 'A2'
+    sheet.append(columns)
+
+    rows = 0
+    for chunk in (sample, iterator):
+        for record in chunk:
+            sheet.append([_cell_value(record.get(col), kind) for col, kind in zip(columns, kinds)])
+            rows += 1
+
+    base, ext = os.path.splitext(filename)
+    tmp_file = f"{base}.tmp{ext or '.xlsx'}"
+    workbook.save(tmp_file)
+    os.replace(tmp_file, filename)
+
+    seconds = time.time() - started
+    stats = {
+        'rows': rows,
+        'seconds': round(seconds, 2),
+        'rows_per_second': round(rows / seconds) if seconds > 0 else rows,
+    }
+    if not silent:
+        print(f"📊 Excel: {rows} rijen in {stats['seconds']}s ({stats['rows_per_second']} rijen/s)")
+    return stats
+
+
+def _arrow_schema(columns: List[str]):
+    """Arrow schema: NUMERIC_COLUMNS als float64/int64, CATEGORICAL_COLUMNS als dictionary, de rest tekst."""
+    fields = []
+    for col in columns:
+        kind = NUMERIC_COLUMNS.get(col)
+        if kind is float:
+            fields.append(pa.field(col, pa.float64()))
+        elif kind is int:
+            fields.append(pa.field(col, pa.int64()))
+        elif col in CATEGORICAL_COLUMNS:
+            fields.append(pa.field(col, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append(pa.field(col, pa.string()))
+    return pa.schema(fields)
+
+
+def _arrow_value(value, kind):
+    if kind is not None:
+        # Alleen echte getallen - "N/A" en dergelijke worden null
+        number = _number(value, kind)
+        return int(number) if kind is int and number is not None else number
+    if _is_empty(value):
+        return None
+    return value if isinstance(value, str) else str(value)
+
+
+def _arrow_batches(records: Iterable[Dict], schema) -> Iterator:
+    """Zet records om in RecordBatches van ARROW_BATCH_SIZE rijen (kolomsgewijs opgebouwd)."""
+    kinds = [NUMERIC_COLUMNS.get(field.name) for field in schema]
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, ARROW_BATCH_SIZE))
+        if not chunk:
+            return
+        arrays = []
+        for field, kind in zip(schema, kinds):
+            values = [_arrow_value(record.get(field.name), kind) for record in chunk]
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, type=pa.string()).dictionary_encode().cast(field.type))
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def export_parquet(records: Iterable[Dict], filename: str, columns: Optional[List[str]] = None,
+                   arrow_ipc: bool = False, compression: str = PARQUET_COMPRESSION, silent: bool = False) -> Dict:
+    """
+    Schrijf records naar Parquet (of Arrow IPC) met getypeerde kolommen.
+
+    Args:
+        records: lijst of iterator van dicts; Parquet wordt per ARROW_BATCH_SIZE rijen gestreamd
+        filename: doelbestand (.parquet, of .arrow/.feather bij arrow_ipc)
+        columns: kolommen in volgorde (standaard alle velden van de records)
+        arrow_ipc: Arrow IPC file (Feather v2) in plaats van Parquet - sneller in te lezen, iets groter
+        compression: zstd (standaard), snappy, lz4 of None
+        silent: geen voortgangsregel printen
+
+    Returns:
+        Dict met rows, seconds, rows_per_second en bytes
+    """
+    if pa is None:
+        raise ImportError("pyarrow is niet geïnstalleerd. Installeer met: pip install pyarrow")
+
+    started = time.time()
+    if columns is None:
+        if not isinstance(records, list):
+            raise ValueError("columns is verplicht als records een iterator is")
+        columns = existing_columns(records)
+    schema = _arrow_schema(columns)
+
+    base, ext = os.path.splitext(filename)
+    tmp_file = f"{base}.tmp{ext}"
+    rows = 0
+    if arrow_ipc:
+        # Het IPC file formaat wil één dictionary per kolom: eerst alle batches verzamelen en samenvoegen
+        table = pa.Table.from_batches(list(_arrow_batches(records, schema)), schema=schema)
+        rows = table.num_rows
+        options = pa.ipc.IpcWriteOptions(compression=compression, unify_dictionaries=True)
+        with pa.OSFile(tmp_file, 'wb') as sink:
+            with pa.ipc.new_file(sink, schema, options=options) as writer:
+                writer.write_table(table)
+    else:
+        with pq.ParquetWriter(tmp_file, schema, compression=compression) as writer:
+            for batch in _arrow_batches(records, schema):
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    os.replace(tmp_file, filename)
+
+    seconds = time.time() - started
+    stats = {
+        'rows': rows,
+        'seconds': round(seconds, 2),
+        'rows_per_second': round(rows / seconds) if seconds > 0 else rows,
+        'bytes': os.path.getsize(filename),
+    }
+    if not silent:
+        print(f"📊 {'Arrow' if arrow_ipc else 'Parquet'}: {rows} rijen in {stats['seconds']}s "
+              f"({stats['bytes'] // 1024} KB)")
+    return stats
@@ -0,0 +1,333 @@
+"""
+Job queue voor meerdere categorieën tegelijk.
+Draait meerdere TrustooPreciseScraper/WerkspotScraper (of TrustooHttpScraper) instanties parallel
+tot een instelbare concurrency. Elke job krijgt een eigen map onder scrapes/ en na afloop worden
+alle resultaten samengevoegd (dedupe op ProfielURL, anders naam+adres).
+Elke job houdt zijn records in een eigen SQLite bestand (CompanyStore) in zijn map.
+"""
+
+import os
+import re
+import time
+import queue
+import threading
+import pandas as pd
+from typing import Dict, List, Optional
+
+from script import TrustooPreciseScraper
+from trustoo_http import TrustooHttpScraper
+from werkspot_scraper import WerkspotScraper
+from exporters import HAS_PYARROW, export_excel, export_parquet
+
+
+def _safe_name(text: str) -> str:
+    """Veilige map-/bestandsnaam (zelfde regels als run_scraper)."""
+    safe = "".join(c for c in text if c.isalnum() or c in (' ', '-', '_')).strip()
+    return safe.replace(' ', '_').lower()
+
+
+def detect_site(url: str) -> str:
+    """Bepaal welke scraper bij een URL hoort."""
+    return "werkspot" if "werkspot.nl" in url.lower() else "trustoo"
+
+
+def title_from_url(url: str) -> str:
+    """Maak een titel van het pad van de URL, bijv. "nederland_elektricien"."""
+    path = re.sub(r'^https?://[^/]+/', '', url).strip('/')
+    return _safe_name(path.replace('/', '_')) or "scrape"
+
+
+class ScrapeJob:
+    """Eén te scrapen URL met status en resultaat."""
+
+    def __init__(self, job_id: int, url: str, title: Optional[str] = None, site: Optional[str] = None,
+                 category: Optional[str] = None):
+        self.job_id = job_id
+        self.url = url
+        self.title = title or title_from_url(url)
+        self.site = site or detect_site(url)
+        # Groep voor de Categorie kolom bij samenvoegen (shards van één categorie delen die)
+        self.category = category or self.title
+        self.attempts = 0
+        self.status = "wachtend"  # wachtend, bezig, klaar, gestopt, fout
+        self.job_dir = None
+        self.companies: List[Dict] = []  # na de run de CompanyStore van de scraper
+        self.csv_file = None
+        self.excel_file = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self) -> Dict:
+        """Status voor de API."""
+        duration = None
+        if self.started_at:
+            duration = round((self.finished_at or time.time()) - self.started_at, 1)
+        return {
+            'id': self.job_id,
+            'url': self.url,
+            'title': self.title,
+            'site': self.site,
+            'category': self.category,
+            'status': self.status,
+            'attempts': self.attempts,
+            'companies_count': len(self.companies),
+            'csv_file': self.csv_file,
+            'excel_file': self.excel_file,
+            'error': self.error,
+            'duration': duration,
+        }
+
+
+class JobQueue:
+    """Wachtrij met N parallelle workers die elk één scraper tegelijk draaien."""
+
+    def __init__(self, concurrency=2, output_root="scrapes", batch_name=None, browser_pool=None,
+                 headless=True, max_additional_pages=None, scraper_kwargs=None, max_retries=0):
+        """
+        Args:
+            concurrency: aantal jobs dat tegelijk draait (= aantal browsers)
+            output_root: hoofdmap voor de output
+            batch_name: naam van de batch map (standaard batch_<timestamp>)
+            browser_pool: optionele chrome_utils.BrowserPool; anders start elke job een eigen Chrome
+            headless: headless Chrome voor jobs zonder pool
+            max_additional_pages: maximum aantal "Toon meer" klikken per job (None = alles)
+            scraper_kwargs: extra argumenten voor de Trustoo scraper (bijv. extraction_mode)
+            max_retries: zo vaak wordt een mislukte job opnieuw in de wachtrij gezet
+        """
+        self.concurrency = max(1, int(concurrency))
+        self.batch_name = batch_name or f"batch_{time.strftime('%Y%m%d_%H%M%S')}"
+        self.batch_dir = os.path.join(output_root, _safe_name(self.batch_name))
+        self.browser_pool = browser_pool
+        self.headless = headless
+        self.max_additional_pages = max_additional_pages
+        self.scraper_kwargs = scraper_kwargs or {}
+        self.max_retries = max_retries
+
+        self.jobs: List[ScrapeJob] = []
+        self._queue = queue.Queue()
+        self._workers: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._stop_requested = False
+        self._pool_size = None  # oorspronkelijke grootte van de browser pool tijdens een run
+        self.merged_csv = None
+        self.merged_excel = None
+
+    def add_job(self, url: str, title: Optional[str] = None, site: Optional[str] = None,
+                category: Optional[str] = None) -> ScrapeJob:
+        """Zet een URL in de wachtrij."""
+        with self._lock:
+            job = ScrapeJob(len(self.jobs) + 1, url, title=title, site=site, category=category)
+            self.jobs.append(job)
+        self._queue.put(job)
+        return job
+
+    def add_jobs(self, urls: List[str]) -> List[ScrapeJob]:
+        return [self.add_job(url) for url in urls]
+
+    def should_stop(self) -> bool:
+        return self._stop_requested
+
+    def start(self):
+        """Start de workers (in de achtergrond)."""
+        os.makedirs(self.batch_dir, exist_ok=True)
+        if self.browser_pool and self.browser_pool.size < self.concurrency and self._pool_size is None:
+            # Pool moet minstens zoveel browsers kunnen uitdelen als er workers zijn - tijdelijk, zie wait()
+            self._pool_size = self.browser_pool.size
+            self.browser_pool.resize(self.concurrency)
+        print(f"🚀 {len(self.jobs)} jobs, {self.concurrency} tegelijk - output in {self.batch_dir}")
+        for i in range(self.concurrency):
+            worker = threading.Thread(target=self._worker, name=f"scrape-worker-{i + 1}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self):
+        """Stop alle jobs; lopende scrapers stoppen via hun stop callback en slaan op wat ze hebben."""
+        self._stop_requested = True
+
+    def wait(self):
+        """Wacht tot alle jobs klaar zijn en zet de browser pool terug op zijn oude grootte."""
+        try:
+            for worker in self._workers:
+                worker.join()
+        finally:
+            if self._pool_size is not None:
+                # Overtollige browsers sluiten, anders blijven ze na de batch open staan
+                self.browser_pool.resize(self._pool_size)
+                self._pool_size = None
+
+    def is_running(self) -> bool:
+        return any(worker.is_alive() for worker in self._workers)
+
+    def run(self, merge=True):
+        """Start, wacht en voeg samen. Geeft (merged_csv, merged_excel) terug."""
+        self.start()
+        self.wait()
+        if merge:
+            return self.merge()
+        return None, None
+
+    def _worker(self):
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                if self._stop_requested:
+                    job.status = "gestopt"
+                    continue
+                self._run_job(job)
+                if job.status == "fout" and job.attempts <= self.max_retries and not self._stop_requested:
+                    # Alleen deze job opnieuw, de rest loopt gewoon door
+                    print(f"🔁 Job {job.job_id} opnieuw in de wachtrij (poging {job.attempts + 1})")
+                    job.status = "wachtend"
+                    self._queue.put(job)
+            finally:
+                self._queue.task_done()
+
+    def _create_scraper(self, job: ScrapeJob, driver):
+        # Eigen store per job in job_dir (STORE_FILE van de scraper) - parallelle jobs delen geen schrijflock
+        common = dict(load_existing=False, stop_callback=self.should_stop, work_dir=job.job_dir)
+        if job.site == "werkspot":
+            return WerkspotScraper(headless=self.headless, driver=driver, **common)
+        if job.site == "trustoo_http":
+            return TrustooHttpScraper(**common)
+        return TrustooPreciseScraper(headless=self.headless, driver=driver, **common, **self.scraper_kwargs)
+
+    def _run_job(self, job: ScrapeJob):
+        job.job_dir = os.path.join(self.batch_dir, f"{job.job_id:03d}_{job.title}")
+        os.makedirs(job.job_dir, exist_ok=True)
+        job.status = "bezig"
+        job.error = None
+        job.attempts += 1
+        job.started_at = time.time()
+        print(f"▶️  Job {job.job_id} gestart: {job.url}")
+
+        driver = None
+        scraper = None
+        try:
+            if self.browser_pool and job.site != "trustoo_http":
+                driver = self.browser_pool.acquire()
+            scraper = self._create_scraper(job, driver)
+            job.companies = scraper.scrape_category_page(job.url, max_additional_pages=self.max_additional_pages,
+                                                         resume_from_checkpoint=False)
+
+            if hasattr(scraper, 'finish_enrichment'):
+                scraper.finish_enrichment(timeout=scraper.ENRICHMENT_STOP_TIMEOUT if self._stop_requested else None)
+            job.csv_file = os.path.join(job.job_dir, f"{job.title}.csv")
+            job.excel_file = os.path.join(job.job_dir, f"{job.title}.xlsx")
+            scraper.save_to_csv(job.csv_file, silent=True)
+            scraper.save_to_excel(job.excel_file, silent=True)
+            if HAS_PYARROW:
+                scraper.save_to_parquet(os.path.join(job.job_dir, f"{job.title}.parquet"), silent=True)
+
+            job.status = "gestopt" if scraper._was_stopped or self._stop_requested else "klaar"
+            print(f"✅ Job {job.job_id} {job.status}: {len(job.companies)} bedrijven")
+        except Exception as e:
+            if "STOP_REQUESTED" in str(e) or self._stop_requested:
+                job.status = "gestopt"
+            else:
+                job.status = "fout"
+                job.error = str(e)
+                print(f"❌ Job {job.job_id} mislukt: {str(e)[:100]}")
+            # Bewaar wat er al verzameld is
+            if scraper is not None and scraper.companies_data:
+                job.companies = scraper.companies_data
+                job.csv_file = os.path.join(job.job_dir, f"{job.title}.csv")
+                try:
+                    if hasattr(scraper, 'finish_enrichment'):
+                        scraper.finish_enrichment(timeout=scraper.ENRICHMENT_STOP_TIMEOUT)
+                    scraper.save_to_csv(job.csv_file, silent=True)
+                except Exception:
+                    pass
+        finally:
+            job.finished_at = time.time()
+            if scraper is not None:
+                try:
+                    scraper.close()
+                except Exception:
+                    pass
+            if driver is not None:
+                self.browser_pool.release(driver)
+
+    def merge(self, csv_filename=None, excel_filename=None):
+        """
+        Voeg de resultaten van alle jobs samen.
+        Dedupe op ProfielURL (anders naam+adres); de kolom Categorie bevat alle categorieën waarin een bedrijf voorkwam.
+        """
+        merged: List[Dict] = []
+        index_by_key: Dict = {}
+
+        for job in self.jobs:
+            for company in job.companies:
+                url = company.get('ProfielURL')
+                key = url if url else (company.get('Naam', '') or '', company.get('Adres', '') or '')
+                if key in index_by_key:
+                    existing = merged[index_by_key[key]]
+                    categories = existing['Categorie'].split(', ')
+                    if job.category not in categories:
+                        existing['Categorie'] = ', '.join(categories + [job.category])
+                    continue
+                record = dict(company)
+                record['Categorie'] = job.category
+                index_by_key[key] = len(merged)
+                merged.append(record)
+
+        if not merged:
+            print("Geen gegevens om samen te voegen.")
+            return None, None
+
+        os.makedirs(self.batch_dir, exist_ok=True)
+        self.merged_csv = csv_filename or os.path.join(self.batch_dir, "samengevoegd.csv")
+        self.merged_excel = excel_filename or os.path.join(self.batch_dir, "samengevoegd.xlsx")
+
+        df = pd.DataFrame(merged)
+        df.to_csv(self.merged_csv, index=False, encoding='utf-8-sig')
+        export_excel(merged, self.merged_excel, columns=list(df.columns), silent=True)
+        if HAS_PYARROW:
+            export_parquet(merged, os.path.join(self.batch_dir, "samengevoegd.parquet"), columns=list(df.columns), silent=True)
+        total = sum(len(job.companies) for job in self.jobs)
+        print(f"🔗 {len(merged)} unieke bedrijven samengevoegd uit {total} records ({len(self.jobs)} jobs)")
+        print(f"📁 {self.merged_csv}")
+        return self.merged_csv, self.merged_excel
+
+    def status(self) -> Dict:
+        """Status van de hele wachtrij (voor /api/queue)."""
+        counts: Dict[str, int] = {}
+        for job in self.jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            'batch': self.batch_name,
+            'running': self.is_running(),
+            'concurrency': self.concurrency,
+            'counts': counts,
+            'jobs': [job.to_dict() for job in self.jobs],
+            'merged_csv': self.merged_csv,
+            'merged_excel': self.merged_excel,
+        }
+
+
+def run_job_queue(urls, concurrency=2, batch_name=None, headless=True, max_additional_pages=None):
+    """Scrape meerdere URLs parallel en voeg het resultaat samen."""
+    job_queue = JobQueue(concurrency=concurrency, batch_name=batch_name, headless=headless,
+                         max_additional_pages=max_additional_pages)
+    job_queue.add_jobs(urls)
+    return job_queue.run()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Gebruik: python job_queue.py <concurrency> <url> [url ...]")
+        print("   of:   python job_queue.py <concurrency> urls.txt")
+        sys.exit(1)
+
+    concurrency = int(sys.argv[1])
+    targets = sys.argv[2:]
+    if len(targets) == 1 and os.path.isfile(targets[0]):
+        with open(targets[0]) as f:
+            targets = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+    run_job_queue(targets, concurrency=concurrency)
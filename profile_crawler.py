@@ -0,0 +1,239 @@
+"""
+Tweede fase crawler voor Trustoo profielpagina's.
+Haalt voor elk verzameld bedrijf de pagina achter ProfielURL op (HTTP met een begrensde pool,
+browser tabs als terugval) en voegt de detailvelden (volledige beschrijving, diensten,
+certificeringen, reviews) toe aan de records. Voortgang staat in een JSONL checkpoint,
+zodat een afgebroken crawl verder gaat waar hij gebleven was.
+
+Gebruik:
+    python profile_crawler.py bedrijven.csv [output.csv]
+"""
+
+import os
+import json
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import requests
+
+from trustoo_http import create_session
+from trustoo_parser import parse_profile_page
+
+PROFILE_FIELDS = ['BeschrijvingVolledig', 'Diensten', 'Certificeringen', 'Reviews', 'AantalReviewsProfiel']
+
+
+def _has_details(details: Dict) -> bool:
+    return any(details.get(field) for field in PROFILE_FIELDS)
+
+
+class ProfileCrawler:
+    """Crawlt profielpagina's en voegt de detailvelden toe aan de bedrijfsrecords."""
+
+    def __init__(self, max_workers=4, checkpoint_file="profile_details.jsonl", request_delay=(0.5, 1.5),
+                 request_timeout=15, browser_fallback=True, browser_tabs=3, driver=None, session=None,
+                 stop_callback=None):
+        """
+        Args:
+            max_workers: maximaal aantal gelijktijdige HTTP requests
+            checkpoint_file: JSONL bestand met al gecrawlde profielen (één regel per ProfielURL)
+            request_delay: (min, max) pauze per worker tussen requests
+            request_timeout: timeout per HTTP request in seconden
+            browser_fallback: profielen die via HTTP niets opleveren via Chrome ophalen
+            browser_tabs: aantal tabs dat de browser tegelijk laadt
+            driver: bestaande driver (bijv. uit een BrowserPool); anders wordt er zo nodig één gestart
+            session: eigen requests.Session (standaard een nieuwe met connection pool)
+            stop_callback: functie die True teruggeeft als er gestopt moet worden
+        """
+        self.max_workers = max_workers
+        self.checkpoint_file = checkpoint_file
+        self.request_delay = request_delay
+        self.request_timeout = request_timeout
+        self.browser_fallback = browser_fallback
+        self.browser_tabs = max(1, browser_tabs)
+        self.driver = driver
+        self._owns_driver = False
+        self.session = session or create_session(pool_size=max_workers)
+        self.stop_callback = stop_callback
+
+        self.details: Dict[str, Dict] = {}  # ProfielURL -> detailvelden
+        self._checkpoint_lock = threading.Lock()
+        self.http_crawled = 0
+        self.browser_crawled = 0
+        self.failed = 0
+
+    def _should_stop(self) -> bool:
+        return bool(self.stop_callback and self.stop_callback())
+
+    def load_checkpoint(self) -> int:
+        """Laad eerder gecrawlde profielen uit het checkpoint."""
+        if not self.checkpoint_file or not os.path.exists(self.checkpoint_file):
+            return 0
+        with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Half geschreven regel na een crash
+                self.details[entry['ProfielURL']] = entry['details']
+        if self.details:
+            print(f"📌 {len(self.details)} profielen uit checkpoint geladen")
+        return len(self.details)
+
+    def _save_details(self, url: str, details: Dict):
+        with self._checkpoint_lock:
+            self.details[url] = details
+            if self.checkpoint_file:
+                with open(self.checkpoint_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps({'ProfielURL': url, 'details': details}, ensure_ascii=False) + "\n")
+
+    def _fetch_http(self, url: str) -> Optional[Dict]:
+        """Haal een profiel via HTTP. None als de pagina niet bruikbaar is (dan eventueel via de browser)."""
+        time.sleep(random.uniform(*self.request_delay))
+        try:
+            response = self.session.get(url, timeout=self.request_timeout)
+            if response.status_code != 200:
+                return None
+            details = parse_profile_page(response.text)
+        except (requests.exceptions.RequestException, ValueError):
+            return None
+        return details if _has_details(details) else None
+
+    def _crawl_http(self, urls: List[str]) -> List[str]:
+        """Crawl via HTTP met een begrensde pool. Geeft de URLs terug die niet gelukt zijn."""
+        failed = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._fetch_http, url): url for url in urls}
+            for i, future in enumerate(as_completed(futures), 1):
+                url = futures[future]
+                details = future.result()
+                if details:
+                    self._save_details(url, details)
+                    self.http_crawled += 1
+                else:
+                    failed.append(url)
+                if i % 25 == 0:
+                    print(f"   🔎 {i}/{len(urls)} profielen via HTTP verwerkt")
+                if self._should_stop():
+                    # Nog niet gestarte requests annuleren; lopende maken we af
+                    for pending in futures:
+                        pending.cancel()
+                    break
+        return failed
+
+    def _crawl_browser(self, urls: List[str]) -> List[str]:
+        """Crawl via Chrome: laadt browser_tabs profielen tegelijk in aparte tabs."""
+        if self.driver is None:
+            from chrome_utils import create_chrome_driver
+            self.driver = create_chrome_driver(headless=True)
+            self._owns_driver = True
+
+        failed = []
+        main_handle = self.driver.current_window_handle
+        for start in range(0, len(urls), self.browser_tabs):
+            if self._should_stop():
+                break
+            batch = urls[start:start + self.browser_tabs]
+            handles = []
+            for url in batch:
+                # window.open laadt de tabs parallel, driver.get zou per pagina blokkeren
+                self.driver.switch_to.window(main_handle)
+                before = set(self.driver.window_handles)
+                self.driver.execute_script("window.open(arguments[0], '_blank');", url)
+                new_handles = set(self.driver.window_handles) - before
+                handles.append(new_handles.pop() if new_handles else None)
+
+            time.sleep(3)
+            for url, handle in zip(batch, handles):
+                details = None
+                if handle:
+                    try:
+                        self.driver.switch_to.window(handle)
+                        details = parse_profile_page(self.driver.page_source)
+                    except Exception:
+                        details = None
+                    finally:
+                        try:
+                            self.driver.close()
+                        except Exception:
+                            pass
+                if details and _has_details(details):
+                    self._save_details(url, details)
+                    self.browser_crawled += 1
+                else:
+                    failed.append(url)
+            self.driver.switch_to.window(main_handle)
+        return failed
+
+    def crawl(self, companies: List[Dict]) -> List[Dict]:
+        """
+        Crawl de profielen van de bedrijven en voeg de detailvelden toe (in place).
+
+        Returns:
+            Dezelfde lijst, met de detailvelden en ProfielGecrawld ingevuld
+        """
+        self.load_checkpoint()
+        urls = list(dict.fromkeys(
+            company['ProfielURL'] for company in companies
+            if isinstance(company.get('ProfielURL'), str) and company['ProfielURL'].startswith('http')
+        ))
+        todo = [url for url in urls if url not in self.details]
+        print(f"🔎 {len(todo)} van {len(urls)} profielen nog te crawlen ({self.max_workers} tegelijk)")
+
+        try:
+            failed = self._crawl_http(todo) if todo else []
+            if failed and self.browser_fallback and not self._should_stop():
+                print(f"🌐 {len(failed)} profielen via de browser proberen...")
+                failed = self._crawl_browser(failed)
+            self.failed = len(failed)
+        finally:
+            self.close()
+
+        self.merge(companies)
+        print(f"✅ Profielen: {self.http_crawled} via HTTP, {self.browser_crawled} via browser, {self.failed} mislukt")
+        return companies
+
+    def merge(self, companies: List[Dict]):
+        """Voeg de gecrawlde detailvelden toe aan de records."""
+        for company in companies:
+            details = self.details.get(company.get('ProfielURL'))
+            if details:
+                company.update(details)
+                company['ProfielGecrawld'] = 'Ja'
+            else:
+                for field in PROFILE_FIELDS:
+                    company.setdefault(field, '')
+                company['ProfielGecrawld'] = 'Nee'
+
+    def close(self):
+        if self.driver is not None and self._owns_driver:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
+
+def crawl_profiles(companies: List[Dict], checkpoint_file="profile_details.jsonl", **kwargs) -> List[Dict]:
+    """Helper: verrijk een lijst bedrijven met de velden van hun profielpagina."""
+    return ProfileCrawler(checkpoint_file=checkpoint_file, **kwargs).crawl(companies)
+
+
+if __name__ == "__main__":
+    import sys
+    import pandas as pd
+
+    if len(sys.argv) < 2:
+        print("Gebruik: python profile_crawler.py <bedrijven.csv> [output.csv]")
+        sys.exit(1)
+
+    input_file = sys.argv[1]
+    output_file = sys.argv[2] if len(sys.argv) > 2 else input_file.replace('.csv', '_profielen.csv')
+    records = pd.read_csv(input_file, encoding='utf-8-sig').fillna('').to_dict('records')
+    checkpoint = os.path.splitext(output_file)[0] + "_checkpoint.jsonl"
+
+    crawl_profiles(records, checkpoint_file=checkpoint)
+    pd.DataFrame(records).to_csv(output_file, index=False, encoding='utf-8-sig')
+    print(f"💾 Opgeslagen in: {output_file}")
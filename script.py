@@ -2,51 +2,265 @@ import time
 import random
 import re
 import os
+import json
+import base64
 import pandas as pd
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+from trustoo_parser import (
+    CARD_SELECTOR, NAME_SELECTORS, ADDRESS_XPATHS,
+    build_company_record, parse_company_cards, parse_payload_companies
+)
+from chrome_utils import ResourceBlocker, create_chrome_driver, read_performance_log, resolve_block_patterns
+from storage import CompanyStore
+from exporters import HAS_PYARROW, TRUSTOO_COLUMNS, existing_columns, export_csv, export_excel, export_parquet
+
+# Extractie van alle bedrijfskaarten in de browser zelf (één round trip per pagina).
+# Spiegelt extract_company_info: houd de selectors hieronder in sync met die methode.
+EXTRACT_CARDS_JS = """
+const [cardSelector, newCardSelector, nameSelectors, addressXpaths] = arguments;
+
+// Zelfde semantiek als Selenium's .text: alleen zichtbare tekst, getrimd
+function visibleText(el) {
+    if (!el || !el.getClientRects().length) return '';
+    return (el.innerText || '').trim();
+}
+function xpathFirst(ctx, xpath) {
+    return document.evaluate(xpath, ctx, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+function xpathAll(ctx, xpath) {
+    const res = document.evaluate(xpath, ctx, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const nodes = [];
+    for (let i = 0; i < res.snapshotLength; i++) nodes.push(res.snapshotItem(i));
+    return nodes;
+}
+
+const cards = [];
+for (const card of document.querySelectorAll(newCardSelector)) {
+    let name = '';
+    for (const sel of nameSelectors) {
+        const t = visibleText(card.querySelector(sel));
+        if (t && t !== 'Niet gevonden') { name = t; break; }
+    }
+
+    let address = '';
+    for (const xp of addressXpaths) {
+        const t = visibleText(xpathFirst(card, xp));
+        if (t && t.includes(',') && t.length > 5) { address = t; break; }
+    }
+
+    let phone = '';
+    for (const el of xpathAll(card, ".//div[contains(@class, 'proBullets-module__JgvdTG__list')]//div[contains(@class, 'underline')]")) {
+        const t = visibleText(el);
+        if (/\\d/.test(t) && t.replace(/ /g, '').length >= 8) { phone = t; break; }
+    }
+
+    const scoreEl = card.querySelector('div.score-module__7oD7Ya__stars b');
+    const reviewsEl = card.querySelector('div.score-module__7oD7Ya__stars small span:not(.hidden)');
+
+    const availability = [];
+    for (const el of card.querySelectorAll('div.profileLabels-module__6DVY6G__profileLabel span')) {
+        const t = visibleText(el);
+        if (t && !['local_offer', 'flash_on', 'grade'].includes(t)) availability.push(t);
+    }
+
+    const link = card.querySelector("a[href*='/profiel/'], a[href*='/bedrijf/']");
+
+    cards.push({
+        proId: card.getAttribute('data-pro-id'),
+        name: name,
+        address: address,
+        phone: phone,
+        trustScore: scoreEl ? visibleText(scoreEl) : null,
+        reviews: visibleText(reviewsEl),
+        availability: availability,
+        profileUrl: link ? link.href : '',
+        years: visibleText(xpathFirst(card, ".//div[contains(@class, 'proBullets-module__JgvdTG__list')]//div[contains(text(), 'jaar in bedrijf')]")),
+        lastReview: visibleText(card.querySelector('span.proBullets-module__JgvdTG__lastReviewDate')),
+        description: visibleText(card.querySelector("div[style*='-webkit-line-clamp:2'] p"))
+    });
+}
+return {total: document.querySelectorAll(cardSelector).length, cards: cards};
+"""
+
+# Verwijder of klap verwerkte kaarten in zodat de DOM niet blijft groeien.
+# De laatste kaart(en) blijven staan als anker voor de lijst en de "Toon meer" knop.
+PRUNE_SEEN_CARDS_JS = """
+const [prunableSelector, prunedAttribute, mode, keepLast] = arguments;
+const cards = Array.from(document.querySelectorAll(prunableSelector));
+const toPrune = cards.slice(0, Math.max(0, cards.length - keepLast));
+for (const card of toPrune) {
+    if (mode === 'remove') {
+        card.remove();
+    } else {
+        // Inklappen: uit de layout halen en afbeeldingen vrijgeven, maar de node laten staan
+        for (const img of card.querySelectorAll('img')) {
+            img.removeAttribute('srcset');
+            img.removeAttribute('src');
+        }
+        card.style.display = 'none';
+        card.setAttribute(prunedAttribute, '1');
+    }
+}
+return toPrune.length;
+"""
+
+# Huidige staat van de resultatenlijst: aantal kaarten en data-pro-id van de laatste kaart
+CARD_STATE_JS = """
+const cards = document.querySelectorAll(arguments[0]);
+return {count: cards.length, lastId: cards.length ? cards[cards.length - 1].getAttribute('data-pro-id') : null};
+"""
+
+# Async script: resolve zodra het aantal kaarten of de laatste data-pro-id verandert
+# (via een MutationObserver), of met null na timeoutMs.
+WAIT_FOR_NEW_CARDS_JS = """
+const [cardSelector, knownCount, knownLastId, timeoutMs, done] = arguments;
+function state() {
+    const cards = document.querySelectorAll(cardSelector);
+    return {count: cards.length, lastId: cards.length ? cards[cards.length - 1].getAttribute('data-pro-id') : null};
+}
+function changed(s) { return s.count !== knownCount || s.lastId !== knownLastId; }
+
+const initial = state();
+if (changed(initial)) { done(initial); return; }
+
+let timer = null;
+const observer = new MutationObserver((mutations) => {
+    if (!mutations.some(m => m.addedNodes.length || m.removedNodes.length)) return;
+    const s = state();
+    if (changed(s)) {
+        observer.disconnect();
+        clearTimeout(timer);
+        done(s);
+    }
+});
+observer.observe(document.body, {childList: true, subtree: true});
+timer = setTimeout(() => { observer.disconnect(); done(null); }, timeoutMs);
+"""
+
+# Markeer verwerkte kaarten zodat volgende scans ze niet opnieuw ophalen
+MARK_CARDS_SEEN_JS = """
+const [newCardSelector, seenAttribute, proIds] = arguments;
+const ids = new Set(proIds);
+for (const card of document.querySelectorAll(newCardSelector)) {
+    if (ids.has(card.getAttribute('data-pro-id'))) card.setAttribute(seenAttribute, '1');
+}
+"""
+
 
 class TrustooPreciseScraper:
-    def __init__(self, headless=True, load_existing=True, stop_callback=None):
-        """Initialiseer de scraper voor Trustoo's specifieke structuur."""
-        options = webdriver.ChromeOptions()
-        if headless:
-            options.add_argument('--headless')
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-        
-        # Railway/Server specifieke opties
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-gpu')
-        
-        # Blokkeer locatie-detectie om te voorkomen dat Trustoo automatisch naar een specifieke locatie navigeert
-        options.add_argument('--disable-geolocation')
-        options.add_experimental_option("prefs", {
-            "profile.default_content_setting_values.geolocation": 2,  # Blokkeer geolocatie
-            "profile.default_content_setting_values.notifications": 2  # Blokkeer notificaties
-        })
-        
-        # Gebruik webdriver-manager voor automatische Chrome driver installatie
-        # Op Railway, gebruik chromium uit nixpacks
-        chrome_binary = os.environ.get('CHROME_BIN')
-        if chrome_binary and os.path.exists(chrome_binary):
-            options.binary_location = chrome_binary
-        
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=options)
+    # Selectors en selector cascades - gedeeld met trustoo_parser en EXTRACT_CARDS_JS
+    CARD_SELECTOR = CARD_SELECTOR
+    NAME_SELECTORS = NAME_SELECTORS
+    ADDRESS_XPATHS = ADDRESS_XPATHS
+    
+    # DOM attribuut op kaarten die al verwerkt zijn (incrementele extractie)
+    SEEN_ATTRIBUTE = "data-scraper-seen"
+    PRUNED_ATTRIBUTE = "data-scraper-pruned"
+    
+    # Standaard bestanden (binnen work_dir als die gezet is)
+    DEFAULT_CSV = "trustoo_elektriciens.csv"
+    DEFAULT_EXCEL = "trustoo_elektriciens.xlsx"
+    CHECKPOINT_FILE = "checkpoint.txt"
+    STORE_FILE = "trustoo_bedrijven.sqlite"  # CompanyStore tijdens het scrapen (zie storage.py)
+    
+    # Maximaal zo lang (seconden) wachten op openstaande verrijkingen bij een stop
+    ENRICHMENT_STOP_TIMEOUT = 30
+    
+    # Event mode: maximaal zo lang (seconden) wachten op kaarten die pas na scrollen laden (lazy loading)
+    LAZY_LOAD_TIMEOUT = 2
+    
+    def __init__(self, headless=True, load_existing=True, stop_callback=None, extraction_mode="js", html_snapshot_dir=None,
+                 prune_dom=None, wait_mode="event", politeness_delay=(4, 6), content_timeout=20,
+                 network_capture=False, network_url_pattern=r"trustoo\.nl", block_resources=True,
+                 driver=None, work_dir=None, store=None):
+        """Initialiseer de scraper voor Trustoo's specifieke structuur.
+        
+        extraction_mode: "js" haalt alle kaarten op met één execute_script per pagina,
+        "html" parset driver.page_source offline met trustoo_parser (lxml),
+        "webdriver" gebruikt extract_company_info per kaart (langzaam, maar per veld te debuggen).
+        html_snapshot_dir: als gezet, wordt elke page_source in "html" mode hier bewaard
+        zodat oude runs later opnieuw geparsed kunnen worden.
+        prune_dom: None (uit), "collapse" (verwerkte kaarten verbergen en afbeeldingen vrijgeven)
+        of "remove" (verwerkte kaarten uit de DOM verwijderen). Houdt de kosten per klik en het
+        geheugengebruik vlak bij zeer lange crawls.
+        wait_mode: "event" wacht na een klik tot de nieuwe kaarten er zijn (MutationObserver),
+        "fixed" gebruikt de oude vaste wachttijden (8-12s + 3-5s).
+        politeness_delay: (min, max) seconden die minimaal tussen klik en volgende actie zitten,
+        los van de content wacht - beschermt tegen een IP blok.
+        content_timeout: maximaal aantal seconden wachten op nieuwe kaarten in "event" mode.
+        network_capture: lees de JSON responses van XHR/fetch requests (via de Chrome performance
+        log) en bouw bedrijven direct uit de payload. Kaarten zonder payload gaan via de DOM.
+        network_url_pattern: regex waaraan de URL van een te lezen response moet voldoen.
+        block_resources: blokkeer afbeeldingen, fonts, media en trackers via CDP (True), niets (False),
+        of een lijst met categorieën uit chrome_utils.RESOURCE_BLOCK_PATTERNS en/of eigen URL patronen.
+        Bij close() wordt gerapporteerd hoeveel bandbreedte dat (geschat) heeft bespaard.
+        driver: bestaande (warme) driver, bijv. uit chrome_utils.BrowserPool. Moet met de performance
+        log aan gestart zijn. De scraper sluit een meegegeven driver niet; dat doet de eigenaar.
+        work_dir: map voor checkpoint en tussentijdse bestanden (per job), zodat meerdere scrapers
+        naast elkaar kunnen draaien. Standaard de huidige map.
+        store: eigen CompanyStore voor de records. Standaard STORE_FILE in work_dir (één bestand per job).
+        """
+        # Performance log aan om XHR/fetch responses te kunnen lezen en geblokkeerde requests te tellen
+        block_patterns = resolve_block_patterns(block_resources)
+        if driver is None:
+            self.driver = create_chrome_driver(headless=headless, performance_log=network_capture or bool(block_patterns))
+            self._owns_driver = True
+        else:
+            self.driver = driver
+            self._owns_driver = False
         self.wait = WebDriverWait(self.driver, 10)
-        self.companies_data = []
         
-        # OPTIMALISATIE: Houd sets bij als instance variabelen (veel sneller!)
-        self.existing_urls = set()
-        self.existing_keys = set()
+        # Blokkeer resources die de extractor nooit gebruikt (scheelt bandbreedte en render tijd)
+        self.resource_blocker = ResourceBlocker(self.driver, block_patterns)
+        self.resource_blocker.apply()
+        
+        # Extractie mode: "js" (één round trip per pagina) of "webdriver" (per kaart)
+        self.extraction_mode = extraction_mode
+        self.html_snapshot_dir = html_snapshot_dir
+        self._snapshot_count = 0
+        
+        # DOM pruning van verwerkte kaarten (None, "collapse" of "remove")
+        self.prune_dom = prune_dom
+        self.pruned_cards = 0
+        
+        # Wachten na een klik: "event" (nieuwe kaarten gedetecteerd) of "fixed" (vaste sleeps)
+        self.wait_mode = wait_mode
+        self.politeness_delay = politeness_delay
+        self.content_timeout = content_timeout
+        
+        # Netwerk capture: bedrijven uit de "Toon meer" JSON payloads
+        self.network_capture = network_capture
+        self.network_url_pattern = network_url_pattern
+        self._pending_network_responses = {}  # requestId -> aantal pogingen
+        self.network_companies = 0
+        
+        # Gedeelde (browser-onafhankelijke) state: data, dedupe sets, stop callback, verrijking
+        self._init_state(load_existing=load_existing, stop_callback=stop_callback, work_dir=work_dir, store=store)
+        
+        # Mask automation
+        self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    
+    def _init_state(self, load_existing=True, stop_callback=None, work_dir=None, store=None):
+        """Initialiseer de state die niet van de browser afhangt (ook gebruikt door de HTTP scraper)."""
+        # Map voor checkpoint en tussentijdse bestanden
+        self.work_dir = work_dir
+        if work_dir:
+            os.makedirs(work_dir, exist_ok=True)
+        
+        # Bedrijven staan in een SQLite store (zie storage.py): lijst-achtig, met geïndexeerde dedupe.
+        # Een eigen store kan meegegeven worden; anders een bestand in work_dir (per job een eigen map).
+        self.companies_data = store if store is not None else CompanyStore(self._work_path(self.STORE_FILE))
+        self.last_excel_export = None  # rows / seconds / rows_per_second van de laatste Excel export
+        
+        # Set-achtige views op de store - "url in self.existing_urls" is een index lookup
+        self.existing_urls = self.companies_data.urls
+        self.existing_keys = self.companies_data.keys
+        
+        # data-pro-id's van kaarten die al verwerkt zijn - deze worden niet opnieuw geëxtraheerd
+        self.seen_pro_ids = set()
         
         # Checkpoint voor hervatten
         self.checkpoint_clicks = 0
@@ -57,13 +271,21 @@ class TrustooPreciseScraper:
         # Flag om bij te houden of we gestopt zijn
         self._was_stopped = False
         
-        # Ad Hoc Data API client (optioneel)
+        # Ad Hoc Data API client (optioneel) - lookups lopen op de achtergrond via EnrichmentWorker
         self.ad_hoc_api = None
+        self.enrichment = None
         try:
             from ad_hoc_data import AdHocDataAPI
+            from enrichment import EnrichmentWorker
             api_key = os.environ.get('AD_HOC_DATA_API_KEY', '52239725-9f5a-4719-94ac-563f789e537b')
             if api_key:
-                self.ad_hoc_api = AdHocDataAPI(api_key=api_key)
+                self.ad_hoc_api = AdHocDataAPI(
+                    api_key=api_key,
+                    persist_endpoint=os.environ.get('AD_HOC_DATA_PERSIST_ENDPOINT', 'true').lower() == 'true',
+                    hedged=os.environ.get('AD_HOC_DATA_HEDGED', 'false').lower() == 'true',
+                )
+                self.enrichment = EnrichmentWorker(self.ad_hoc_api, workers=int(os.environ.get('AD_HOC_DATA_WORKERS', 4)),
+                                                   on_update=self.companies_data.upsert)
                 print("✅ Ad Hoc Data API verbinding actief")
         except Exception as e:
             print(f"⚠️ Ad Hoc Data API niet beschikbaar: {str(e)}")
@@ -74,30 +296,29 @@ class TrustooPreciseScraper:
             self.load_existing_data()
         else:
             # Bij nieuw bestand: reset alle duplicate tracking
-            self.existing_urls = set()
-            self.existing_keys = set()
-            self.companies_data = []
+            self.companies_data.clear()
             print("🆕 Nieuw bestand - geen duplicaatcontrole op basis van oude data")
-        
-        # Mask automation
-        self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
     
-    def load_existing_data(self, csv_file="trustoo_elektriciens.csv", excel_file="trustoo_elektriciens.xlsx"):
-        """Laad bestaande data vanuit CSV of Excel om te hervatten."""
+    def _work_path(self, filename):
+        """Pad van een werkbestand (checkpoint, tussentijdse saves) binnen work_dir."""
+        return os.path.join(self.work_dir, filename) if self.work_dir else filename
+    
+    def load_existing_data(self, csv_file=None, excel_file=None):
+        """Laad bestaande data om te hervatten: uit de store zelf, anders vanuit CSV of Excel."""
+        csv_file = csv_file or self._work_path(self.DEFAULT_CSV)
+        excel_file = excel_file or self._work_path(self.DEFAULT_EXCEL)
+        if len(self.companies_data) > 0:
+            # De store bevat ook wat na de laatste export gescraped is
+            print(f"✅ {len(self.companies_data)} bestaande bedrijven geladen vanuit {self.companies_data.path}")
+            return
+        
         try:
             # Probeer eerst CSV (meest betrouwbaar)
             if os.path.exists(csv_file):
                 df = pd.read_csv(csv_file, encoding='utf-8-sig')
                 if not df.empty:
-                    self.companies_data = df.to_dict('records')
-                    # Vul de sets met bestaande data
-                    for company in self.companies_data:
-                        if company.get('ProfielURL'):
-                            self.existing_urls.add(company['ProfielURL'])
-                        naam = company.get('Naam', '') or ''
-                        adres = company.get('Adres', '') or ''
-                        if naam or adres:  # Alleen toevoegen als er data is
-                            self.existing_keys.add((naam, adres))
+                    # Dedupe gebeurt door de unieke indexes van de store
+                    self.companies_data.extend(df.to_dict('records'))
                     print(f"✅ {len(self.companies_data)} bestaande bedrijven geladen vanuit {csv_file}")
                     return
         except Exception as e:
@@ -108,15 +329,7 @@ class TrustooPreciseScraper:
             if os.path.exists(excel_file):
                 df = pd.read_excel(excel_file)
                 if not df.empty:
-                    self.companies_data = df.to_dict('records')
-                    # Vul de sets met bestaande data
-                    for company in self.companies_data:
-                        if company.get('ProfielURL'):
-                            self.existing_urls.add(company['ProfielURL'])
-                        naam = company.get('Naam', '') or ''
-                        adres = company.get('Adres', '') or ''
-                        if naam or adres:
-                            self.existing_keys.add((naam, adres))
+                    self.companies_data.extend(df.to_dict('records'))
                     print(f"✅ {len(self.companies_data)} bestaande bedrijven geladen vanuit {excel_file}")
                     if len(self.companies_data) > 0:
                         last_company = self.companies_data[-1]
@@ -129,7 +342,7 @@ class TrustooPreciseScraper:
         """Sla checkpoint op (aantal klikken)."""
         self.checkpoint_clicks = clicks
         try:
-            with open("checkpoint.txt", "w") as f:
+            with open(self._work_path(self.CHECKPOINT_FILE), "w") as f:
                 f.write(str(clicks))
         except:
             pass
@@ -137,8 +350,9 @@ class TrustooPreciseScraper:
     def load_checkpoint(self):
         """Laad checkpoint (aantal klikken)."""
         try:
-            if os.path.exists("checkpoint.txt"):
-                with open("checkpoint.txt", "r") as f:
+            checkpoint_file = self._work_path(self.CHECKPOINT_FILE)
+            if os.path.exists(checkpoint_file):
+                with open(checkpoint_file, "r") as f:
                     clicks = int(f.read().strip())
                     self.checkpoint_clicks = clicks
                     print(f"📌 Checkpoint geladen: was gebleven bij {clicks} klikken")
@@ -151,15 +365,7 @@ class TrustooPreciseScraper:
         """Haal gegevens uit een enkel bedrijfsblok - PRECIES voor Trustoo's HTML."""
         # 1. Bedrijfsnaam - probeer meerdere selectors
         name = "Niet gevonden"
-        name_selectors = [
-            "h3.proNameNew-module__5tvS2q__companyName",  # Originele selector
-            "h3[class*='companyName']",  # Meer flexibele selector
-            "h3[class*='proName']",  # Alternatief
-            "h2, h3",  # Fallback naar elke h2/h3
-            "a[href*='/profiel/']",  # Fallback naar link tekst
-        ]
-        
-        for selector in name_selectors:
+        for selector in self.NAME_SELECTORS:
             try:
                 name_element = company_element.find_element(By.CSS_SELECTOR, selector)
                 name_text = name_element.text.strip()
@@ -171,22 +377,9 @@ class TrustooPreciseScraper:
         
         # 2. Adres - probeer meerdere selectors
         address = "Niet gevonden"
-        address_selectors = [
-            # Nieuwe structuur: adres zit in ellipsis div binnen placeWrapper
-            (By.XPATH, ".//div[contains(@class, 'proBullets-module__JgvdTG__list')]//div[contains(@class, 'ellipsis-module__O8e_Ha__ellipsis')]"),
-            # Alternatief: zoek naar div met place icon en dan de tekst ernaast
-            (By.XPATH, ".//div[contains(@class, 'proBullets-module__JgvdTG__list')]//div[contains(@class, 'placeWrapper')]//div[contains(text(), ',')]"),
-            # Origineel: zoek naar div met komma in tekst
-            (By.XPATH, ".//div[contains(@class, 'proBullets-module__JgvdTG__list')]//div[contains(text(), ',')]"),
-            # Meer flexibel
-            (By.XPATH, ".//div[contains(@class, 'proBullets')]//div[contains(text(), ',')]"),
-            # Fallback
-            (By.XPATH, ".//*[contains(text(), ',') and string-length(text()) > 5]"),
-        ]
-        
-        for selector_type, selector in address_selectors:
+        for selector in self.ADDRESS_XPATHS:
             try:
-                address_element = company_element.find_element(selector_type, selector)
+                address_element = company_element.find_element(By.XPATH, selector)
                 address_text = address_element.text.strip()
                 if address_text and ',' in address_text and len(address_text) > 5:
                     address = address_text
@@ -299,18 +492,219 @@ class TrustooPreciseScraper:
         except NoSuchElementException:
             pass
         
-        return {
-            'Naam': name,
-            'Adres': address,
-            'Telefoon': phone,
-            'TrustScore': trust_score,
-            'AantalReviews': num_reviews,
-            'Beschikbaarheid': ', '.join(availability) if availability else "Niet vermeld",
-            'ProfielURL': profile_url,
-            'JarenInBedrijf': years_in_business,
-            'LaatsteReview': last_review,
-            'Beschrijving': description[:200] + "..." if len(description) > 200 else description
-        }
+        return build_company_record(
+            name, address, phone, trust_score, num_reviews, availability,
+            profile_url, years_in_business, last_review, description
+        )
+    
+    def _new_card_selector(self):
+        """CSS selector voor kaarten die nog niet verwerkt zijn."""
+        return f"{self.CARD_SELECTOR}:not([{self.SEEN_ATTRIBUTE}])"
+    
+    def extract_all_companies_js(self):
+        """Haal alle NIEUWE bedrijfskaarten op met één execute_script (één round trip per pagina).
+        
+        Geeft dezelfde dicts terug als extract_company_info, maar zonder 15-25
+        WebDriver calls per kaart. Kaarten die al verwerkt zijn worden overgeslagen.
+        
+        Returns:
+            Tuple (totaal aantal kaarten op de pagina, lijst van (pro_id, bedrijfsdict))
+        """
+        result = self.driver.execute_script(
+            EXTRACT_CARDS_JS, self.CARD_SELECTOR, self._new_card_selector(),
+            self.NAME_SELECTORS, self.ADDRESS_XPATHS
+        ) or {}
+        
+        companies = []
+        for raw in result.get('cards') or []:
+            if raw.get('proId') in self.seen_pro_ids:
+                continue  # Bijv. na een page reload zijn de DOM markeringen weg
+            num_reviews = "0"
+            match = re.search(r'\((\d+)\)', raw.get('reviews') or '')
+            if match:
+                num_reviews = match.group(1)
+            companies.append((raw.get('proId'), build_company_record(
+                raw.get('name') or "Niet gevonden",
+                raw.get('address') or "Niet gevonden",
+                raw.get('phone') or "Niet vermeld",
+                raw.get('trustScore') if raw.get('trustScore') is not None else "N/A",
+                num_reviews,
+                raw.get('availability') or [],
+                raw.get('profileUrl') or "",
+                raw.get('years') or "",
+                raw.get('lastReview') or "",
+                raw.get('description') or "",
+            )))
+        return result.get('total', 0), companies
+    
+    def extract_all_companies_html(self):
+        """Haal alle NIEUWE bedrijfskaarten op uit één driver.page_source, geparsed in Python.
+        
+        Geen WebDriver calls per veld; dezelfde parser werkt op opgeslagen HTML
+        (zie trustoo_parser.parse_companies_file).
+        
+        Returns:
+            Tuple (totaal aantal kaarten op de pagina, lijst van (pro_id, bedrijfsdict))
+        """
+        page_html = self.driver.page_source
+        
+        if self.html_snapshot_dir:
+            try:
+                os.makedirs(self.html_snapshot_dir, exist_ok=True)
+                self._snapshot_count += 1
+                snapshot_path = os.path.join(self.html_snapshot_dir, f"page_{self._snapshot_count:05d}.html")
+                with open(snapshot_path, "w", encoding="utf-8") as f:
+                    f.write(page_html)
+            except Exception as e:
+                print(f"   ⚠️  Kon HTML snapshot niet opslaan: {str(e)[:50]}")
+        
+        return parse_company_cards(page_html, base_url=self.driver.current_url, skip_pro_ids=self.seen_pro_ids)
+    
+    def _find_new_card_elements(self):
+        """Zoek kaart elementen die nog niet verwerkt zijn (WebDriver mode).
+        
+        Leest de data-pro-id's van alle nieuwe kaarten in één execute_script,
+        zodat oude kaarten geen WebDriver calls meer kosten.
+        
+        Returns:
+            Tuple (totaal aantal kaarten op de pagina, lijst van (pro_id, WebElement))
+        """
+        total = self.driver.execute_script(
+            "return document.querySelectorAll(arguments[0]).length;", self.CARD_SELECTOR
+        ) or 0
+        elements = self.driver.find_elements(By.CSS_SELECTOR, self._new_card_selector())
+        if not elements:
+            return total, []
+        pro_ids = self.driver.execute_script(
+            "return arguments[0].map(e => e.getAttribute('data-pro-id'));", elements
+        )
+        return total, [(pro_id, element) for pro_id, element in zip(pro_ids, elements)
+                       if pro_id not in self.seen_pro_ids]
+    
+    @staticmethod
+    def _card_complete(company_info):
+        """Zijn naam én adres echt gevonden? Alleen dan mag een kaart als verwerkt gelden (anders later opnieuw proberen)."""
+        return all(company_info.get(field) and company_info.get(field) != "Niet gevonden"
+                   for field in ('Naam', 'Adres'))
+    
+    def _mark_cards_seen(self, pro_ids):
+        """Onthoud verwerkte kaarten (in Python én in de DOM)."""
+        if not pro_ids:
+            return
+        self.seen_pro_ids.update(pro_ids)
+        try:
+            self.driver.execute_script(
+                MARK_CARDS_SEEN_JS, self._new_card_selector(), self.SEEN_ATTRIBUTE, list(pro_ids)
+            )
+        except Exception:
+            pass  # seen_pro_ids blijft leidend
+    
+    def _prune_seen_cards(self, keep_last=1):
+        """Verwijder/klap kaarten in die al in companies_data staan (alleen als prune_dom aan staat)."""
+        if not self.prune_dom:
+            return 0
+        prunable_selector = f"{self.CARD_SELECTOR}[{self.SEEN_ATTRIBUTE}]:not([{self.PRUNED_ATTRIBUTE}])"
+        try:
+            pruned = self.driver.execute_script(
+                PRUNE_SEEN_CARDS_JS, prunable_selector, self.PRUNED_ATTRIBUTE, self.prune_dom, keep_last
+            ) or 0
+        except Exception as e:
+            print(f"   ⚠️  DOM pruning mislukt: {str(e)[:50]}")
+            return 0
+        self.pruned_cards += pruned
+        return pruned
+    
+    def _sleep_with_stop_check(self, seconds):
+        """Slaap, maar check de stop callback elke halve seconde."""
+        end_time = time.time() + seconds
+        while True:
+            if self.stop_callback and self.stop_callback():
+                raise Exception("STOP_REQUESTED")
+            remaining = end_time - time.time()
+            if remaining <= 0:
+                return
+            time.sleep(min(0.5, remaining))
+    
+    def _get_card_state(self):
+        """Aantal kaarten en laatste data-pro-id, of None als dat niet lukt."""
+        try:
+            return self.driver.execute_script(CARD_STATE_JS, self.CARD_SELECTOR)
+        except Exception:
+            return None
+    
+    def _wait_for_new_results(self, before_state, timeout):
+        """
+        Wacht tot er nieuwe kaarten in de lijst staan (aantal of laatste data-pro-id veranderd).
+        
+        Gebruikt een geïnjecteerde MutationObserver in korte async slices zodat de stop
+        callback tussendoor gecheckt blijft worden.
+        
+        Returns:
+            Nieuwe staat dict, of None bij timeout
+        """
+        deadline = time.time() + timeout
+        while True:
+            if self.stop_callback and self.stop_callback():
+                raise Exception("STOP_REQUESTED")
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+            slice_ms = int(min(1.0, remaining) * 1000)
+            try:
+                new_state = self.driver.execute_async_script(
+                    WAIT_FOR_NEW_CARDS_JS, self.CARD_SELECTOR,
+                    before_state['count'], before_state['lastId'], slice_ms
+                )
+            except TimeoutException:
+                new_state = None
+            if new_state:
+                return new_state
+    
+    def _trigger_lazy_load(self):
+        """Scroll om lazy loading te triggeren voordat de kaarten gelezen worden.
+        
+        In "event" mode wordt niet gescrold als er al onverwerkte kaarten in de DOM staan (de nieuwe
+        batch is er al), en anders gewacht met de MutationObserver in plaats van vaste pauzes.
+        """
+        if self.wait_mode == "event":
+            new_cards = self.driver.execute_script(
+                "return document.querySelectorAll(arguments[0]).length;", self._new_card_selector()
+            )
+            if new_cards:
+                return
+            before_state = self._get_card_state()
+            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            if before_state is not None:
+                self._wait_for_new_results(before_state, self.LAZY_LOAD_TIMEOUT)
+            self.driver.execute_script("window.scrollTo(0, 0);")
+            return
+        
+        # Scroll langzaam naar beneden om lazy loading te triggeren
+        for i in range(5):
+            self.driver.execute_script(f"window.scrollTo(0, {(i+1) * 500});")
+            time.sleep(0.3)
+        # Scroll naar beneden
+        self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        time.sleep(1)
+        # Scroll terug naar boven
+        self.driver.execute_script("window.scrollTo(0, 0);")
+        time.sleep(0.5)
+        # BELANGRIJK: Wacht even tot alle content geladen is
+        time.sleep(1)
+    
+    def _wait_after_click(self, before_state, click_time):
+        """Wacht na een klik: tot de nieuwe batch er is, plus de politeness ondergrens."""
+        if before_state is not None:
+            print("⏳ Wachten tot nieuwe resultaten geladen zijn...")
+            new_state = self._wait_for_new_results(before_state, self.content_timeout)
+            if new_state:
+                print(f"   ✅ Nieuwe resultaten na {time.time() - click_time:.1f}s ({new_state['count']} kaarten)")
+            else:
+                print(f"   ⚠️  Geen nieuwe resultaten gezien binnen {self.content_timeout}s")
+        
+        # Politeness ondergrens - los van de content wacht (VOORZICHTIG - voorkom IP blok!)
+        floor = random.uniform(*self.politeness_delay)
+        self._sleep_with_stop_check(floor - (time.time() - click_time))
     
     def click_show_more(self, max_clicks=None):
         """Klik op 'Toon meer resultaten' - blijft doorgaan tot er geen knop meer is."""
@@ -371,25 +765,32 @@ class TrustooPreciseScraper:
                 except:
                     pass
                 
+                # Staat van de lijst vlak voor de klik (voor de event-driven wacht)
+                before_state = self._get_card_state() if self.wait_mode == "event" else None
+                
                 # Klik op de knop met JavaScript (meer betrouwbaar)
                 try:
                     self.driver.execute_script("arguments[0].click();", show_more_button)
                 except:
                     # Fallback naar normale click
                     show_more_button.click()
+                click_time = time.time()
                 
                 clicks += 1
                 consecutive_failures = 0  # Reset failure counter
                 print(f"✅ Klik {clicks}: Meer resultaten geladen...")
                 
-                # Wacht tot nieuwe content laadt - belangrijk!
-                time.sleep(random.uniform(4, 6))
-                
-                # Wacht tot de pagina klaar is met laden
-                try:
-                    self.wait.until(lambda driver: driver.execute_script("return document.readyState") == "complete")
-                except:
-                    pass
+                if self.wait_mode == "event" and before_state is not None:
+                    self._wait_after_click(before_state, click_time)
+                else:
+                    # Wacht tot nieuwe content laadt - belangrijk!
+                    time.sleep(random.uniform(4, 6))
+                    
+                    # Wacht tot de pagina klaar is met laden
+                    try:
+                        self.wait.until(lambda driver: driver.execute_script("return document.readyState") == "complete")
+                    except:
+                        pass
                 
             except StaleElementReferenceException:
                 consecutive_failures += 1
@@ -482,7 +883,12 @@ class TrustooPreciseScraper:
         return False
     
     def scrape_category_page(self, url, max_additional_pages=None, save_interval=10, resume_from_checkpoint=True):
-        """Scrape een Trustoo categoriepagina met tussentijds opslaan."""
+        """Scrape een Trustoo categoriepagina met tussentijds opslaan.
+        
+        save_interval: commit de store uiterlijk na zoveel nieuwe records (en anders op tijd).
+        """
+        self.companies_data.commit_every = max(1, save_interval)
+        
         # Clear alles VOORDAT we navigeren
         try:
             self.driver.delete_all_cookies()
@@ -585,8 +991,8 @@ class TrustooPreciseScraper:
             # Als resume_from_checkpoint True is maar er zijn geen bestaande bedrijven, reset checkpoint
             print("📌 Nieuw bestand - checkpoint wordt genegeerd")
             try:
-                if os.path.exists("checkpoint.txt"):
-                    os.remove("checkpoint.txt")
+                if os.path.exists(self._work_path(self.CHECKPOINT_FILE)):
+                    os.remove(self._work_path(self.CHECKPOINT_FILE))
                     print("🗑️ Oud checkpoint bestand verwijderd")
             except:
                 pass
@@ -658,6 +1064,7 @@ class TrustooPreciseScraper:
                     break
                 
                 # Scroll naar de knop en klik
+                before_state = None
                 try:
                     # Check stop callback VOORDAT we klikken
                     if self.stop_callback and self.stop_callback():
@@ -679,6 +1086,9 @@ class TrustooPreciseScraper:
                     if self.stop_callback and self.stop_callback():
                         raise Exception("STOP_REQUESTED")
                     
+                    # Staat van de lijst vlak voor de klik (voor de event-driven wacht)
+                    before_state = self._get_card_state() if self.wait_mode == "event" else None
+                    
                     self.driver.execute_script("arguments[0].click();", show_more_button)
                 except Exception as e:
                     try:
@@ -687,6 +1097,7 @@ class TrustooPreciseScraper:
                         print(f"   ⚠️  Kon niet klikken: {str(e2)[:50]}")
                         consecutive_failures += 1
                         continue
+                click_time = time.time()
                 
                 clicks += 1
                 consecutive_failures = 0
@@ -694,42 +1105,46 @@ class TrustooPreciseScraper:
                 # Sla checkpoint op (stil)
                 self.save_checkpoint(clicks)
                 
-                # Wacht LANGER tot content laadt (VOORZICHTIG - voorkom IP blok!)
-                # Check stop callback tijdens wachten!
-                wait_time = random.uniform(8, 12)
-                print(f"⏳ Wachten {int(wait_time)} seconden tot nieuwe content laadt...")
-                for _ in range(int(wait_time)):
-                    if self.stop_callback and self.stop_callback():
-                        raise Exception("STOP_REQUESTED")
-                    time.sleep(1)
-                time.sleep(wait_time - int(wait_time))  # Rest van de tijd
-                
-                try:
-                    self.wait.until(lambda driver: driver.execute_script("return document.readyState") == "complete")
-                except:
-                    pass
-                
-                # Extra wachttijd voor dynamische content (VOORZICHTIG!)
-                # Check stop callback tijdens wachten!
-                extra_wait = random.uniform(3, 5)
-                print(f"⏳ Extra wachttijd {int(extra_wait)} seconden voor dynamische content...")
-                for _ in range(int(extra_wait)):
-                    if self.stop_callback and self.stop_callback():
-                        raise Exception("STOP_REQUESTED")
-                    time.sleep(1)
-                time.sleep(extra_wait - int(extra_wait))  # Rest van de tijd
-                
-                # Wacht tot nieuwe bedrijven zichtbaar zijn op de pagina
-                print("🔍 Controleren of nieuwe bedrijven zijn geladen...")
-                try:
-                    # Scroll naar beneden om te zorgen dat nieuwe content zichtbaar is
-                    self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(2)
-                    # Scroll terug naar boven
-                    self.driver.execute_script("window.scrollTo(0, 0);")
-                    time.sleep(1)
-                except:
-                    pass
+                if self.wait_mode == "event" and before_state is not None:
+                    # Wacht precies tot de nieuwe batch er is, met een politeness ondergrens
+                    self._wait_after_click(before_state, click_time)
+                else:
+                    # Wacht LANGER tot content laadt (VOORZICHTIG - voorkom IP blok!)
+                    # Check stop callback tijdens wachten!
+                    wait_time = random.uniform(8, 12)
+                    print(f"⏳ Wachten {int(wait_time)} seconden tot nieuwe content laadt...")
+                    for _ in range(int(wait_time)):
+                        if self.stop_callback and self.stop_callback():
+                            raise Exception("STOP_REQUESTED")
+                        time.sleep(1)
+                    time.sleep(wait_time - int(wait_time))  # Rest van de tijd
+                    
+                    try:
+                        self.wait.until(lambda driver: driver.execute_script("return document.readyState") == "complete")
+                    except:
+                        pass
+                    
+                    # Extra wachttijd voor dynamische content (VOORZICHTIG!)
+                    # Check stop callback tijdens wachten!
+                    extra_wait = random.uniform(3, 5)
+                    print(f"⏳ Extra wachttijd {int(extra_wait)} seconden voor dynamische content...")
+                    for _ in range(int(extra_wait)):
+                        if self.stop_callback and self.stop_callback():
+                            raise Exception("STOP_REQUESTED")
+                        time.sleep(1)
+                    time.sleep(extra_wait - int(extra_wait))  # Rest van de tijd
+                    
+                    # Wacht tot nieuwe bedrijven zichtbaar zijn op de pagina
+                    print("🔍 Controleren of nieuwe bedrijven zijn geladen...")
+                    try:
+                        # Scroll naar beneden om te zorgen dat nieuwe content zichtbaar is
+                        self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                        time.sleep(2)
+                        # Scroll terug naar boven
+                        self.driver.execute_script("window.scrollTo(0, 0);")
+                        time.sleep(1)
+                    except:
+                        pass
                 
                 # Controleer of URL nog steeds correct is (stil, alleen bij problemen)
                 self._ensure_nederland_url(url)
@@ -755,11 +1170,6 @@ class TrustooPreciseScraper:
                 else:
                     print(f"⚠️ Geen nieuwe bedrijven gevonden op deze pagina (totaal blijft: {new_count_after})")
                 
-                # Tussentijds opslaan (stil)
-                if len(self.companies_data) > 0 and len(self.companies_data) % save_interval == 0:
-                    self.save_to_excel(silent=True)
-                    self.save_to_csv(silent=True)
-                
             except StaleElementReferenceException:
                 consecutive_failures += 1
                 if consecutive_failures >= max_failures:
@@ -785,25 +1195,19 @@ class TrustooPreciseScraper:
                     except Exception as collect_err:
                         print(f"⚠️ Fout bij laatste verzamelen: {collect_err}")
                     # SLA EERST DATA OP VOORDAT BROWSER SLUIT
-                    # Note: Bestanden worden opgeslagen door run_scraper_thread in app.py
-                    # Hier slaan we alleen op als backup met standaard namen
+                    # Note: CSV/Excel worden geëxporteerd door run_scraper_thread in app.py
+                    # Hier committen we alleen de store als backup
                     try:
                         if len(self.companies_data) > 0:
-                            # Maak scrapes directory aan als die niet bestaat
-                            os.makedirs("scrapes", exist_ok=True)
-                            # Tussentijds opslaan met standaard namen als backup
-                            backup_csv = os.path.join("scrapes", f"backup_stopped_{int(time.time())}.csv")
-                            backup_excel = os.path.join("scrapes", f"backup_stopped_{int(time.time())}.xlsx")
-                            self.save_to_csv(backup_csv, silent=True)
-                            self.save_to_excel(backup_excel, silent=True)
-                            print(f"✅ {len(self.companies_data)} bedrijven opgeslagen als backup: {backup_csv}")
+                            self.companies_data.flush()
+                            print(f"✅ {len(self.companies_data)} bedrijven veilig in: {self.companies_data.path}")
                     except Exception as save_err:
                         print(f"⚠️ Fout bij tussentijds opslaan: {save_err}")
                         import traceback
                         print(f"Traceback: {traceback.format_exc()}")
-                    # SLUIT BROWSER DIRECT BIJ STOPPEN
+                    # SLUIT BROWSER DIRECT BIJ STOPPEN (een driver uit de pool geeft de eigenaar terug via release())
                     try:
-                        if self.driver:
+                        if self.driver and self._owns_driver:
                             self.driver.quit()
                             print("🔒 Browser gesloten")
                     except:
@@ -819,49 +1223,204 @@ class TrustooPreciseScraper:
         
         return self.companies_data
     
+    def _read_performance_log(self):
+        """Lees (en leeg) de Chrome performance log. Geeft (method, params) tuples terug."""
+        events = read_performance_log(self.driver)
+        # Elk event kan maar één keer gelezen worden: de blocker telt mee met de netwerk capture
+        self.resource_blocker.observe(events)
+        return events
+    
+    def _capture_network_payloads(self):
+        """Haal de JSON bodies op van XHR/fetch responses die sinds de vorige keer binnen zijn."""
+        for method, params in self._read_performance_log():
+            if method != 'Network.responseReceived' or params.get('type') not in ('XHR', 'Fetch'):
+                continue
+            response = params.get('response', {})
+            if 'json' not in (response.get('mimeType') or '').lower():
+                continue
+            if not re.search(self.network_url_pattern, response.get('url', '')):
+                continue
+            self._pending_network_responses[params['requestId']] = 0
+        
+        payloads = []
+        for request_id in list(self._pending_network_responses):
+            try:
+                result = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+                body = result.get('body', '')
+                if result.get('base64Encoded'):
+                    body = base64.b64decode(body).decode('utf-8', errors='replace')
+                payloads.append(json.loads(body))
+                del self._pending_network_responses[request_id]
+            except ValueError:
+                del self._pending_network_responses[request_id]  # Geen geldige JSON
+            except Exception:
+                # Body nog niet beschikbaar (request loopt nog) - volgende ronde opnieuw, max 3 keer
+                self._pending_network_responses[request_id] += 1
+                if self._pending_network_responses[request_id] >= 3:
+                    del self._pending_network_responses[request_id]
+        return payloads
+    
+    def _collect_companies_from_network(self, silent=False):
+        """Voeg bedrijven toe uit gevangen "Toon meer resultaten" payloads (alleen met network_capture).
+        
+        De data-pro-id's worden als verwerkt gemarkeerd, zodat de DOM extractie alleen
+        kaarten oppakt waarvoor geen payload is gezien.
+        """
+        if not self.network_capture:
+            return 0
+        
+        added_count = 0
+        processed_pro_ids = []
+        try:
+            for payload in self._capture_network_payloads():
+                for pro_id, company_info in parse_payload_companies(payload, base_url=self.driver.current_url):
+                    if self.stop_callback and self.stop_callback():
+                        raise Exception("STOP_REQUESTED")
+                    if pro_id and pro_id in self.seen_pro_ids:
+                        continue
+                    if self._add_company(company_info, silent):
+                        added_count += 1
+                    # Pas na _add_company (toegevoegd of duplicate) en met echte naam/adres als verwerkt markeren
+                    if pro_id and self._card_complete(company_info):
+                        processed_pro_ids.append(pro_id)
+        finally:
+            self._mark_cards_seen(processed_pro_ids)
+        
+        if added_count > 0:
+            self.network_companies += added_count
+            print(f"   🌐 {added_count} bedrijven uit netwerk payload (totaal: {len(self.companies_data)})")
+        return added_count
+    
+    def _add_company(self, company_info, silent=False):
+        """Voeg een bedrijf toe als het nieuw is (dedupe op ProfielURL, anders naam+adres).
+        
+        Returns:
+            True als het bedrijf is toegevoegd, False als het is overgeslagen
+        """
+        # Check of het een nieuw bedrijf is - ALLE bedrijven toevoegen, alleen duplicaten overslaan
+        is_new = False
+        skip_reason = ""
+        
+        # BELANGRIJK: Skip bedrijven waarvan naam EN adres beide "Niet gevonden" zijn
+        # Dit zijn waarschijnlijk fouten in de scraping, geen echte bedrijven
+        naam = company_info.get('Naam', '') or ''
+        adres = company_info.get('Adres', '') or ''
+        
+        if naam == "Niet gevonden" and adres == "Niet gevonden":
+            skip_reason = "geen data gevonden"
+            if not silent:
+                print(f"⚠️ Bedrijf overgeslagen: geen naam of adres gevonden")
+            return False
+        
+        # Gebruik URL als primaire identifier als die er is
+        if company_info.get('ProfielURL') and company_info['ProfielURL']:
+            if company_info['ProfielURL'] not in self.existing_urls:
+                is_new = True
+            else:
+                skip_reason = "duplicate URL"
+        else:
+            # Als er geen URL is, gebruik naam+adres als identifier
+            # Maar alleen als minstens één van beide gevonden is
+            if naam != "Niet gevonden" or adres != "Niet gevonden":
+                key = (naam, adres)
+                # Voeg toe als het niet een lege duplicate is
+                if key not in self.existing_keys:
+                    is_new = True
+                else:
+                    skip_reason = "duplicate naam+adres"
+            else:
+                skip_reason = "geen identifier beschikbaar"
+        
+        if is_new:
+            # De unieke indexes van de store vangen wat de checks hierboven niet zien
+            if not self.companies_data.append(company_info):
+                if not silent:
+                    print(f"⚠️ Overgeslagen: duplicate")
+                return False
+            
+            # Verrijk met Ad Hoc Data API op de achtergrond - de worker schrijft het bijgewerkte record terug (upsert)
+            if self.enrichment:
+                self.enrichment.submit(company_info)
+            
+            # Alleen tonen als niet silent
+            if not silent:
+                display_naam = company_info.get('Naam', 'Geen naam')[:50]
+                score = company_info.get('TrustScore', 'N/A')
+                reviews = company_info.get('AantalReviews', '0')
+                verrijkt = "✓" if company_info.get('AdHocData_Verrijkt') == 'Ja' else "○"
+                print(f"{verrijkt} {display_naam} (Score: {score}, Reviews: {reviews})")
+            return True
+        
+        if not silent and skip_reason:
+            print(f"⚠️ Overgeslagen: {skip_reason}")
+        return False
+    
     def _collect_companies_from_page(self, silent=False):
         """Verzamel bedrijven van de huidige pagina."""
         try:
-            # BELANGRIJK: Scroll eerst naar beneden om te zorgen dat ALLE content geladen is
+            # Eerst bedrijven uit gevangen netwerk payloads (goedkoop, geen DOM nodig)
             try:
-                # Scroll langzaam naar beneden om lazy loading te triggeren
-                for i in range(5):
-                    self.driver.execute_script(f"window.scrollTo(0, {(i+1) * 500});")
-                    time.sleep(0.3)
-                # Scroll naar beneden
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(1)
-                # Scroll terug naar boven
-                self.driver.execute_script("window.scrollTo(0, 0);")
-                time.sleep(0.5)
-            except:
-                pass
+                self._collect_companies_from_network(silent=silent)
+            except Exception as e:
+                if str(e) == "STOP_REQUESTED":
+                    raise
+                print(f"   ⚠️  Netwerk capture mislukt, alleen DOM extractie: {str(e)[:80]}")
+            
+            # Zonder netwerk capture de performance log hier legen (telt geblokkeerde requests)
+            if not self.network_capture and self.resource_blocker.active:
+                self._read_performance_log()
             
-            # BELANGRIJK: Wacht even tot alle content geladen is
-            time.sleep(1)
+            # BELANGRIJK: Scroll eerst naar beneden om te zorgen dat ALLE content geladen is
+            try:
+                self._trigger_lazy_load()
+            except Exception as e:
+                if str(e) == "STOP_REQUESTED":
+                    raise
             
-            # Vind ALLE bedrijfscontainers - probeer meerdere keren om te zorgen dat alle content geladen is
+            # Vind alle NIEUWE bedrijfscontainers - probeer meerdere keren om te zorgen dat alle content geladen is
+            # Lijst van (pro_id, container); in JS/HTML mode is de container direct het geëxtraheerde bedrijfsdict
             company_containers = []
+            total_cards = 0
+            
+            # JS/HTML MODE: alle kaarten in één round trip ophalen in plaats van per veld
+            if self.extraction_mode in ("js", "html"):
+                try:
+                    # In event mode heeft _trigger_lazy_load al gewacht tot de kaarten er zijn
+                    for attempt in range(0 if self.wait_mode == "event" else 2):
+                        time.sleep(0.5)
+                        # Scroll een beetje om lazy loading te triggeren
+                        self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight * 0.5);")
+                        time.sleep(0.5)
+                        self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                        time.sleep(0.5)
+                    if self.extraction_mode == "html":
+                        total_cards, company_containers = self.extract_all_companies_html()
+                    else:
+                        total_cards, company_containers = self.extract_all_companies_js()
+                except Exception as e:
+                    print(f"   ⚠️  {self.extraction_mode.upper()} extractie mislukt, terugval naar WebDriver: {str(e)[:80]}")
+                    total_cards, company_containers = 0, []
             
             # NIEUWE SELECTOR: Trustoo gebruikt nu div[id^="_pro_"][data-pro-id] voor elke bedrijfskaart
             # Dit is de meest betrouwbare selector omdat elk bedrijf een unieke ID heeft die begint met "_pro_"
-            for attempt in range(3):
-                containers = self.driver.find_elements(
-                    By.CSS_SELECTOR, 
-                    "div[id^='_pro_'][data-pro-id]"
-                )
-                if len(containers) > len(company_containers):
-                    company_containers = containers
-                if attempt < 2:
-                    time.sleep(0.5)
-                    # Scroll een beetje om lazy loading te triggeren
-                    self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight * 0.5);")
-                    time.sleep(0.5)
-                    self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(0.5)
+            if total_cards == 0:
+                for attempt in range(3):
+                    total, containers = self._find_new_card_elements()
+                    if total > total_cards:
+                        total_cards, company_containers = total, containers
+                    if attempt < 2 and self.wait_mode == "event":
+                        # Scrollen en wachten tot er kaarten bijkomen (MutationObserver), geen vaste pauzes
+                        self._trigger_lazy_load()
+                    elif attempt < 2:
+                        time.sleep(0.5)
+                        # Scroll een beetje om lazy loading te triggeren
+                        self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight * 0.5);")
+                        time.sleep(0.5)
+                        self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                        time.sleep(0.5)
             
             # Als eerste selector niets vindt, probeer alternatieve selectors (fallback voor oude structuur)
-            if len(company_containers) == 0:
+            if total_cards == 0:
                 alternative_selectors = [
                     "div.proListItemNewest-module__tr-fyq__mainSection",  # Nieuwe class-based selector
                     "div[data-test-id='pro-list-item']",  # Oude selector (voor backwards compatibility)
@@ -874,20 +1433,24 @@ class TrustooPreciseScraper:
                     try:
                         containers = self.driver.find_elements(By.CSS_SELECTOR, selector)
                         if len(containers) > len(company_containers):
-                            company_containers = containers
+                            # Geen data-pro-id in de oude structuur: altijd volledig extraheren
+                            company_containers = [(None, container) for container in containers]
                             if not silent:
                                 print(f"   ✅ Alternatieve selector werkt: {selector} ({len(containers)} containers)")
                             break
                     except Exception as e:
                         continue
             
-            if not silent:
+            if total_cards > 0:
+                if not silent or len(company_containers) > 0:
+                    print(f"   📋 Gevonden {len(company_containers)} nieuwe van {total_cards} bedrijfscontainers op pagina")
+            elif not silent:
                 print(f"   📋 Gevonden {len(company_containers)} bedrijfscontainers op pagina")
             elif len(company_containers) > 0:
                 print(f"   📋 Gevonden {len(company_containers)} bedrijfscontainers op pagina")
             
             # DEBUG: Als er geen containers zijn gevonden, log wat er wel op de pagina staat
-            if len(company_containers) == 0:
+            if len(company_containers) == 0 and total_cards == 0:
                 print(f"   ⚠️  GEEN bedrijfscontainers gevonden!")
                 print(f"   🔍 Debug: Zoeken naar mogelijke containers...")
                 try:
@@ -913,91 +1476,49 @@ class TrustooPreciseScraper:
             
             added_count = 0
             skipped_count = 0
+            processed_pro_ids = []
             
-            for container in company_containers:
-                # Check of stoppen is aangevraagd tijdens verzamelen
-                if self.stop_callback and self.stop_callback():
-                    raise Exception("STOP_REQUESTED")
-                try:
-                    company_info = self.extract_company_info(container)
-                    
-                    # Check of het een nieuw bedrijf is - ALLE bedrijven toevoegen, alleen duplicaten overslaan
-                    is_new = False
-                    skip_reason = ""
-                    
-                    # BELANGRIJK: Skip bedrijven waarvan naam EN adres beide "Niet gevonden" zijn
-                    # Dit zijn waarschijnlijk fouten in de scraping, geen echte bedrijven
-                    naam = company_info.get('Naam', '') or ''
-                    adres = company_info.get('Adres', '') or ''
-                    
-                    if naam == "Niet gevonden" and adres == "Niet gevonden":
-                        skip_reason = "geen data gevonden"
-                        skipped_count += 1
-                        if not silent:
-                            print(f"⚠️ Bedrijf overgeslagen: geen naam of adres gevonden")
-                        continue
-                    
-                    # Gebruik URL als primaire identifier als die er is
-                    if company_info.get('ProfielURL') and company_info['ProfielURL']:
-                        if company_info['ProfielURL'] not in self.existing_urls:
-                            is_new = True
+            try:
+                for pro_id, container in company_containers:
+                    # Check of stoppen is aangevraagd tijdens verzamelen
+                    if self.stop_callback and self.stop_callback():
+                        raise Exception("STOP_REQUESTED")
+                    try:
+                        if isinstance(container, dict):
+                            company_info = container  # Al geëxtraheerd in JS/HTML mode
                         else:
-                            skip_reason = "duplicate URL"
-                    else:
-                        # Als er geen URL is, gebruik naam+adres als identifier
-                        # Maar alleen als minstens één van beide gevonden is
-                        if naam != "Niet gevonden" or adres != "Niet gevonden":
-                            key = (naam, adres)
-                            # Voeg toe als het niet een lege duplicate is
-                            if key not in self.existing_keys:
-                                is_new = True
-                            else:
-                                skip_reason = "duplicate naam+adres"
+                            company_info = self.extract_company_info(container)
+                            
+                        if self._add_company(company_info, silent):
+                            added_count += 1
                         else:
-                            skip_reason = "geen identifier beschikbaar"
-                    
-                    if is_new:
-                        # Verrijk met Ad Hoc Data API direct na scrapen
-                        if self.ad_hoc_api:
-                            try:
-                                company_info = self.ad_hoc_api.enrich_company(company_info)
-                            except Exception as e:
-                                if not silent:
-                                    print(f"   ⚠️ Verrijking mislukt voor {company_info.get('Naam', 'Onbekend')}: {str(e)[:50]}")
+                            skipped_count += 1
                         
-                        self.companies_data.append(company_info)
-                        # Update de sets direct (veel sneller!)
-                        if company_info.get('ProfielURL'):
-                            self.existing_urls.add(company_info['ProfielURL'])
-                        naam = company_info.get('Naam', '') or ''
-                        adres = company_info.get('Adres', '') or ''
-                        if naam or adres:  # Alleen toevoegen als er data is
-                            self.existing_keys.add((naam, adres))
-                        added_count += 1
+                        # Kaart is verwerkt (toegevoegd of duplicate) - wordt bij volgende scans niet opnieuw
+                        # geëxtraheerd. Onvolledige kaarten (nog niet geladen) blijven open voor een volgende scan.
+                        if pro_id and self._card_complete(company_info):
+                            processed_pro_ids.append(pro_id)
                         
-                        # Alleen tonen als niet silent
-                        if not silent:
-                            display_naam = company_info.get('Naam', 'Geen naam')[:50]
-                            score = company_info.get('TrustScore', 'N/A')
-                            reviews = company_info.get('AantalReviews', '0')
-                            verrijkt = "✓" if company_info.get('AdHocData_Verrijkt') == 'Ja' else "○"
-                            print(f"{verrijkt} {display_naam} (Score: {score}, Reviews: {reviews})")
-                    else:
+                    except StaleElementReferenceException:
                         skipped_count += 1
-                        if not silent and skip_reason:
-                            print(f"⚠️ Overgeslagen: {skip_reason}")
-                    
-                except StaleElementReferenceException:
-                    skipped_count += 1
-                    continue
-                except Exception as e:
-                    # Check of dit een stop request is
-                    if str(e) == "STOP_REQUESTED":
-                        raise  # Her-raise zodat de outer loop het kan vangen
-                    skipped_count += 1
-                    if not silent:
-                        print(f"⚠️ Fout bij extraheren: {str(e)[:50]}")
-                    continue
+                        continue
+                    except Exception as e:
+                        # Check of dit een stop request is
+                        if str(e) == "STOP_REQUESTED":
+                            raise  # Her-raise zodat de outer loop het kan vangen
+                        skipped_count += 1
+                        if not silent:
+                            print(f"⚠️ Fout bij extraheren: {str(e)[:50]}")
+                        continue
+            finally:
+                self._mark_cards_seen(processed_pro_ids)
+                # Pagina verwerkt - committen zodat er tot de volgende klik geen transactie openstaat
+                self.companies_data.flush()
+            
+            # Verwerkte kaarten staan veilig in companies_data - haal ze uit de DOM
+            pruned = self._prune_seen_cards()
+            if pruned > 0 and not silent:
+                print(f"   🧹 {pruned} verwerkte kaarten uit de DOM gehaald ({self.prune_dom})")
             
             # ALTIJD totaal tonen (ook als silent, maar alleen als er iets is gebeurd)
             if not silent:
@@ -1040,49 +1561,66 @@ class TrustooPreciseScraper:
         except Exception as e:
             print(f"Geen cookie melding of fout: {e}")
     
-    def save_to_excel(self, filename="trustoo_elektriciens.xlsx", silent=False):
+    def save_to_excel(self, filename=None, silent=False):
         """Sla gegevens op in Excel."""
+        filename = filename or self._work_path(self.DEFAULT_EXCEL)
         if not self.companies_data:
             if not silent:
                 print("Geen gegevens om op te slaan.")
             return
         
-        df = pd.DataFrame(self.companies_data)
-        
-        # Maak kolommen leesbaarder - voeg Ad Hoc Data velden toe
-        column_order = [
-            'Naam', 'Adres', 'Telefoon', 'Email', 'Website', 'Contactpersoon',
-            'TrustScore', 'AantalReviews', 'Beschikbaarheid', 'JarenInBedrijf', 
-            'LaatsteReview', 'SBI_Code', 'Beschrijving', 'ProfielURL', 'AdHocData_Verrijkt'
-        ]
-        
-        # Alleen kolommen die bestaan
-        existing_columns = [col for col in column_order if col in df.columns]
-        df = df[existing_columns]
-        
-        df.to_excel(filename, index=False)
+        # Gestreamd schrijven (openpyxl write-only) - alleen kolommen uit TRUSTOO_COLUMNS die bestaan
+        columns = existing_columns(self.companies_data, TRUSTOO_COLUMNS)
+        self.last_excel_export = export_excel(self.companies_data, filename, columns=columns, silent=silent)
         if not silent:
             print(f"💾 {len(self.companies_data)} bedrijven opgeslagen in: {filename}")
         return filename
     
-    def save_to_csv(self, filename="trustoo_elektriciens.csv", silent=False):
+    def save_to_csv(self, filename=None, silent=False):
         """Sla gegevens op in CSV."""
+        filename = filename or self._work_path(self.DEFAULT_CSV)
         if not self.companies_data:
             if not silent:
                 print("Geen gegevens om op te slaan.")
             return
         
-        df = pd.DataFrame(self.companies_data)
-        df.to_csv(filename, index=False, encoding='utf-8-sig')
+        # In blokken uit de store, alle kolommen zoals voorheen de DataFrame export
+        export_csv(self.companies_data, filename, columns=self.companies_data.columns, silent=True)
         if not silent:
             print(f"💾 {len(self.companies_data)} bedrijven opgeslagen in: {filename}")
         return filename
     
+    def save_to_parquet(self, filename=None, silent=False, arrow_ipc=False):
+        """Sla gegevens op in Parquet (of Arrow IPC met arrow_ipc=True) met getypeerde kolommen. Vereist pyarrow."""
+        filename = filename or self._work_path(os.path.splitext(self.DEFAULT_CSV)[0] + (".arrow" if arrow_ipc else ".parquet"))
+        if not self.companies_data:
+            if not silent:
+                print("Geen gegevens om op te slaan.")
+            return
+        
+        # Alle kolommen, net als de CSV
+        export_parquet(self.companies_data, filename, columns=existing_columns(self.companies_data),
+                       arrow_ipc=arrow_ipc, silent=silent)
+        if not silent:
+            print(f"💾 {len(self.companies_data)} bedrijven opgeslagen in: {filename}")
+        return filename
+    
+    def finish_enrichment(self, timeout=None):
+        """Wacht tot de achtergrond verrijking klaar is (None = onbeperkt). Aanroepen vóór het definitief opslaan."""
+        if self.enrichment:
+            return self.enrichment.drain(timeout)
+        return True
+    
+    def enrichment_progress(self):
+        """Voortgang van de achtergrond verrijking (None zonder Ad Hoc Data)."""
+        return self.enrichment.progress() if self.enrichment else None
+    
     def force_stop_and_save(self, csv_filename=None, excel_filename=None, title=None):
         """FORCEER stop en sla bestanden direct op."""
         print("\n🛑 FORCE STOP - Browser wordt gesloten en bestanden worden opgeslagen...")
         
         self._was_stopped = True
+        self.finish_enrichment(timeout=self.ENRICHMENT_STOP_TIMEOUT)
         
         # Sla bestanden op VOORDAT we de browser sluiten
         if len(self.companies_data) > 0:
@@ -1125,9 +1663,9 @@ class TrustooPreciseScraper:
                 except:
                     pass
         
-        # SLUIT BROWSER DIRECT
+        # SLUIT BROWSER DIRECT (een driver uit de pool wordt door de eigenaar teruggegeven)
         try:
-            if self.driver:
+            if self.driver and self._owns_driver:
                 self.driver.quit()
                 print("🔒 Browser geforceerd gesloten")
         except:
@@ -1137,6 +1675,14 @@ class TrustooPreciseScraper:
     
     def close(self):
         """Sluit de browser en Ad Hoc Data API session."""
+        # Stop de verrijkingsworkers (de wachtrij is bij normaal afsluiten al leeg). close() wacht tot de
+        # threads gestopt zijn, anders schrijft een late upsert na het sluiten van de store
+        if self.enrichment:
+            self.enrichment.close()
+        
+        # Openstaande records committen (de store opent zichzelf opnieuw als er nog geëxporteerd wordt)
+        self.companies_data.close()
+        
         # Sluit Ad Hoc Data API session
         if self.ad_hoc_api:
             try:
@@ -1146,15 +1692,27 @@ class TrustooPreciseScraper:
         
         # Sluit browser
         if self.driver:
+            try:
+                self._read_performance_log()
+                self.resource_blocker.report()
+            except Exception:
+                pass
+            if not self._owns_driver:
+                return  # Driver hoort bij een pool - die reset en hergebruikt hem
             try:
                 self.driver.quit()
                 print("Browser gesloten.")
             except:
                 pass
 
-def run_scraper(target_url, csv_filename=None, excel_filename=None, load_existing=True, headless=False, max_additional_pages=None, title=None, stop_callback=None):
-    """Voer de scraper uit met gegeven parameters."""
-    scraper = TrustooPreciseScraper(headless=headless, load_existing=load_existing, stop_callback=stop_callback)
+def run_scraper(target_url, csv_filename=None, excel_filename=None, load_existing=True, headless=False, max_additional_pages=None, title=None, stop_callback=None, scraper=None, crawl_profiles=False):
+    """Voer de scraper uit met gegeven parameters.
+    
+    Een kant-en-klare scraper (bijv. TrustooHttpScraper) kan via scraper worden meegegeven.
+    Met crawl_profiles worden daarna de profielpagina's gecrawld (zie profile_crawler.py).
+    """
+    if scraper is None:
+        scraper = TrustooPreciseScraper(headless=headless, load_existing=load_existing, stop_callback=stop_callback)
     
     try:
         # Scrape de pagina
@@ -1182,6 +1740,23 @@ def run_scraper(target_url, csv_filename=None, excel_filename=None, load_existin
         
         os.makedirs(output_dir, exist_ok=True)
         
+        # Eerst de achtergrond verrijking afronden (bij stop begrensd) - vóór de profielcrawl, zodat die
+        # records met de verrijkte velden leest en terugschrijft
+        scraper.finish_enrichment(timeout=scraper.ENRICHMENT_STOP_TIMEOUT if scraper._was_stopped else None)
+        
+        # Tweede fase: detailvelden van de profielpagina's (hervat via checkpoint in output_dir)
+        if crawl_profiles and companies and not was_stopped:
+            from profile_crawler import ProfileCrawler
+            crawler = ProfileCrawler(
+                checkpoint_file=os.path.join(output_dir, "profielen_checkpoint.jsonl"),
+                stop_callback=stop_callback,
+                driver=scraper.driver
+            )
+            # De crawler werkt records in place bij - daarna terugschrijven naar de store
+            records = list(companies)
+            crawler.crawl(records)
+            scraper.companies_data.upsert_many(records)
+        
         # Genereer bestandsnamen
         base_name = title.replace(' ', '_').lower() if title else "trustoo_scrape"
         base_name = "".join(c for c in base_name if c.isalnum() or c in ('_', '-'))
@@ -1202,6 +1777,9 @@ def run_scraper(target_url, csv_filename=None, excel_filename=None, load_existin
         try:
             scraper.save_to_csv(csv_filename, silent=True)
             scraper.save_to_excel(excel_filename, silent=True)
+            # Getypeerde kopie voor analyse (alleen als pyarrow geïnstalleerd is)
+            if HAS_PYARROW:
+                scraper.save_to_parquet(os.path.splitext(csv_filename)[0] + ".parquet", silent=True)
             print(f"✅ {len(companies)} bedrijven opgeslagen")
         except Exception as save_error:
             print(f"⚠️ Fout bij opslaan: {save_error}")
@@ -1227,6 +1805,7 @@ def run_scraper(target_url, csv_filename=None, excel_filename=None, load_existin
         # Probeer nog steeds op te slaan wat we hebben
         try:
             if len(scraper.companies_data) > 0:
+                scraper.finish_enrichment(timeout=scraper.ENRICHMENT_STOP_TIMEOUT)
                 print("\n💾 Proberen bestanden op te slaan met verzamelde data...")
                 
                 # Genereer bestandsnamen als die er nog niet zijn
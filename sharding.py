@@ -0,0 +1,139 @@
+"""
+Geografische sharding van landelijke Trustoo crawls.
+Splitst https://trustoo.nl/nederland/<categorie>/ op in provincie- of stad-URL's, zodat één lange
+"Toon meer" keten vervangen wordt door veel korte crawls die parallel lopen en los opnieuw geprobeerd
+kunnen worden. De resultaten worden via de JobQueue samengevoegd (dedupe op ProfielURL).
+
+Dekking: op provincieniveau is elke provincie één shard, dus niets valt buiten de crawl. Op stadniveau
+dekken de steden uit CITIES alleen de grootste plaatsen: bedrijven in andere gemeenten ontbreken.
+Stadniveau is dus bedoeld voor snelle, parallelle crawls van de grote plaatsen, niet voor volledigheid.
+Met remainder=True krijgt elke provincie er een restshard (de provincie URL) bij; die dekt alles, maar
+crawlt ook alles wat de stadshards al crawlen - dan is "province" alleen goedkoper.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from job_queue import JobQueue
+
+# Provincie slugs zoals Trustoo ze in de URL gebruikt
+PROVINCES = [
+    "groningen", "friesland", "drenthe", "overijssel", "flevoland", "gelderland",
+    "utrecht", "noord-holland", "zuid-holland", "zeeland", "noord-brabant", "limburg",
+]
+
+# Grootste plaatsen per provincie voor sharding op stad (aan te vullen per categorie). Niet volledig:
+# bedrijven in andere plaatsen vallen buiten een crawl op stadniveau (zie de module docstring)
+CITIES: Dict[str, List[str]] = {
+    "groningen": ["groningen", "hoogezand", "veendam", "stadskanaal", "delfzijl"],
+    "friesland": ["leeuwarden", "drachten", "sneek", "heerenveen", "harlingen"],
+    "drenthe": ["assen", "emmen", "hoogeveen", "meppel", "coevorden"],
+    "overijssel": ["zwolle", "enschede", "deventer", "hengelo", "almelo", "kampen"],
+    "flevoland": ["almere", "lelystad", "dronten", "emmeloord"],
+    "gelderland": ["arnhem", "nijmegen", "apeldoorn", "ede", "doetinchem", "harderwijk", "tiel"],
+    "utrecht": ["utrecht", "amersfoort", "nieuwegein", "veenendaal", "zeist", "houten"],
+    "noord-holland": ["amsterdam", "haarlem", "zaandam", "alkmaar", "hilversum", "hoorn", "den-helder"],
+    "zuid-holland": ["rotterdam", "den-haag", "leiden", "dordrecht", "zoetermeer", "delft", "gouda"],
+    "zeeland": ["middelburg", "vlissingen", "goes", "terneuzen"],
+    "noord-brabant": ["eindhoven", "tilburg", "breda", "s-hertogenbosch", "helmond", "oss", "roosendaal"],
+    "limburg": ["maastricht", "venlo", "heerlen", "sittard", "roermond", "weert"],
+}
+
+# URL opbouw per shard niveau
+SHARD_URL_TEMPLATES = {
+    "province": "{base}/{province}/{category}/",
+    "city": "{base}/{province}/{city}/{category}/",
+}
+
+
+def parse_category_url(url: str) -> Tuple[str, str, str]:
+    """Splits een Trustoo URL in (base, locatie, categorie), bijv. ("https://trustoo.nl", "nederland", "elektricien")."""
+    match = re.match(r'(https?://[^/]+)/(.+)/([^/]+)/?$', url.strip())
+    if not match:
+        raise ValueError(f"Geen Trustoo categorie URL: {url}")
+    return match.group(1), match.group(2), match.group(3)
+
+
+def shard_category_url(url: str, level: str = "province", provinces: Optional[List[str]] = None,
+                       cities: Optional[Dict[str, List[str]]] = None, remainder: bool = False) -> List[Dict]:
+    """
+    Maak shard jobs voor een landelijke categorie URL.
+
+    Args:
+        url: bijv. https://trustoo.nl/nederland/elektricien/
+        level: "province" of "city"
+        provinces: subset van PROVINCES (standaard alle)
+        cities: eigen stad-lijst per provincie (standaard CITIES)
+        remainder: op stadniveau per provincie ook de provincie URL crawlen, voor bedrijven buiten de
+            genoemde steden. Volledig, maar meer werk dan level="province" (de stadshards overlappen
+            er volledig mee) - alleen zinvol als de restshard goedkoper is dan een provinciecrawl
+
+    Returns:
+        Lijst van dicts met url, title en category (voor JobQueue.add_job)
+    """
+    if level not in SHARD_URL_TEMPLATES:
+        raise ValueError(f"Onbekend shard niveau: {level} (kies uit {', '.join(SHARD_URL_TEMPLATES)})")
+
+    base, location, category = parse_category_url(url)
+    if location.lower() != "nederland":
+        # Al een regionale URL - niets te splitsen
+        return [{'url': url, 'title': f"{category}_{location.replace('/', '_')}", 'category': category}]
+
+    cities = cities or CITIES
+    shards = []
+    for province in provinces or PROVINCES:
+        if level == "province":
+            shards.append({
+                'url': SHARD_URL_TEMPLATES["province"].format(base=base, province=province, category=category),
+                'title': f"{category}_{province}",
+                'category': category,
+            })
+            continue
+        for city in cities.get(province, []):
+            shards.append({
+                'url': SHARD_URL_TEMPLATES["city"].format(base=base, province=province, city=city, category=category),
+                'title': f"{category}_{city}",
+                'category': category,
+            })
+        if remainder:
+            # Restshard: de hele provincie - overlap met de steden wordt ontdubbeld in merge()
+            shards.append({
+                'url': SHARD_URL_TEMPLATES["province"].format(base=base, province=province, category=category),
+                'title': f"{category}_{province}_overig",
+                'category': category,
+            })
+    return shards
+
+
+def add_sharded_jobs(job_queue: JobQueue, url: str, level: str = "province", **kwargs):
+    """Zet de shards van een URL in een bestaande wachtrij."""
+    shards = shard_category_url(url, level=level, **kwargs)
+    for shard in shards:
+        job_queue.add_job(shard['url'], title=shard['title'], category=shard['category'])
+    print(f"🗺️  {url} opgesplitst in {len(shards)} shards ({level})")
+    return shards
+
+
+def run_sharded_scraper(url, level="province", concurrency=3, batch_name=None, headless=True,
+                        max_additional_pages=None, max_retries=1, browser_pool=None):
+    """Crawl een landelijke categorie als parallelle shards en voeg samen. Geeft (merged_csv, merged_excel) terug."""
+    _, _, category = parse_category_url(url)
+    job_queue = JobQueue(concurrency=concurrency, batch_name=batch_name or f"{category}_{level}",
+                         browser_pool=browser_pool, headless=headless,
+                         max_additional_pages=max_additional_pages, max_retries=max_retries)
+    add_sharded_jobs(job_queue, url, level=level)
+    return job_queue.run()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Gebruik: python sharding.py <nederland_url> [province|city] [concurrency]")
+        sys.exit(1)
+
+    run_sharded_scraper(
+        sys.argv[1],
+        level=sys.argv[2] if len(sys.argv) > 2 else "province",
+        concurrency=int(sys.argv[3]) if len(sys.argv) > 3 else 3,
+    )
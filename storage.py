@@ -0,0 +1,291 @@
+"""
+Opslag van gescrapete bedrijven in SQLite (WAL).
+Vervangt de lijst companies_data plus de sets existing_urls/existing_keys: de records staan op schijf,
+dedupe gaat via unieke indexes op ProfielURL en (Naam, Adres), en het geheugengebruik blijft gelijk bij
+elke omvang. CompanyStore gedraagt zich als een lijst (len, iteratie, [-1], append) en biedt views die
+zich als de oude sets gedragen ("url in store.urls"); upsert voegt velden samen en store.columns houdt
+de kolommen bij (exports hoeven de records niet eerst te scannen). Parallelle jobs krijgen elk een eigen bestand:
+SQLite heeft één schrijflock per bestand, dus verbindingen op hetzelfde bestand wachten op elkaar.
+Records worden per commit_every toevoegingen of na commit_interval seconden gecommit, en de scrapers
+committen na elke pagina (flush), zodat er tussen pagina's geen transactie openstaat.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_TABLE = "bedrijven"
+DEFAULT_COMMIT_EVERY = 50  # records
+DEFAULT_COMMIT_INTERVAL = 5.0  # seconden
+ITER_BATCH_SIZE = 1000
+
+
+def record_key(record: Dict) -> Tuple[Optional[str], str, str]:
+    """Identiteit van een bedrijf: ProfielURL, anders (Naam, Adres) - zelfde regel als de dedupe in de scrapers."""
+    url = record.get('ProfielURL')
+    url = url if isinstance(url, str) and url else None
+    naam = record.get('Naam')
+    adres = record.get('Adres')
+    # NaN (lege cel uit pandas) telt als leeg
+    naam = '' if naam is None or naam != naam else str(naam)
+    adres = '' if adres is None or adres != adres else str(adres)
+    return url, naam, adres
+
+
+def _clean(record: Dict) -> Dict:
+    """NaN uit pandas is geen geldige JSON - als lege waarde opslaan."""
+    return {k: ('' if isinstance(v, float) and v != v else v) for k, v in record.items()}
+
+
+class _UrlView:
+    """Set-achtige view op de ProfielURLs in een CompanyStore."""
+
+    def __init__(self, store):
+        self._store = store
+
+    def __contains__(self, url) -> bool:
+        return self._store.has_url(url)
+
+
+class _KeyView:
+    """Set-achtige view op de (Naam, Adres) paren in een CompanyStore."""
+
+    def __init__(self, store):
+        self._store = store
+
+    def __contains__(self, key) -> bool:
+        naam, adres = key
+        return self._store.has_key(naam, adres)
+
+
+class CompanyStore:
+    """SQLite tabel met bedrijfsrecords: lijst-achtige API, geïndexeerde dedupe en upsert. Thread-safe."""
+
+    def __init__(self, path: str, table: str = DEFAULT_TABLE, commit_every: int = DEFAULT_COMMIT_EVERY,
+                 commit_interval: float = DEFAULT_COMMIT_INTERVAL):
+        """
+        Args:
+            path: SQLite bestand (wordt aangemaakt als het niet bestaat)
+            table: tabelnaam; andere tekens dan letters/cijfers worden _
+            commit_every: committen na zoveel nieuwe of bijgewerkte records
+            commit_interval: uiterlijk na zoveel seconden committen (gecontroleerd bij elke schrijfactie)
+        """
+        self.path = path
+        self.table = re.sub(r'\W', '_', table)
+        self.commit_every = max(1, int(commit_every))
+        self.commit_interval = commit_interval
+        self.urls = _UrlView(self)
+        self.keys = _KeyView(self)
+
+        self._lock = threading.RLock()
+        self._conn = None
+        self._count = 0
+        self._columns: Dict[str, None] = {}  # kolommen in volgorde van eerste voorkomen
+        self._uncommitted = 0
+        self._last_commit = time.time()
+        self._connect()
+
+    def _connect(self):
+        """Open de verbinding (ook opnieuw na close(), bijv. om na de scrape nog te exporteren)."""
+        if self._conn is not None:
+            return self._conn
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS "{self.table}" (
+                id INTEGER PRIMARY KEY,
+                url TEXT,
+                naam TEXT NOT NULL,
+                adres TEXT NOT NULL,
+                data TEXT NOT NULL
+            )
+        """)
+        # Dedupe zoals de scrapers: ProfielURL uniek, zonder URL is (Naam, Adres) uniek
+        conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "{self.table}_url" ON "{self.table}" (url) WHERE url IS NOT NULL')
+        conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "{self.table}_naam_adres" ON "{self.table}" (naam, adres) WHERE url IS NULL')
+        # (Naam, Adres) opzoeken over alle records, ook die met een URL
+        conn.execute(f'CREATE INDEX IF NOT EXISTS "{self.table}_key" ON "{self.table}" (naam, adres)')
+        # Kolommen van alle records, in volgorde van eerste voorkomen
+        conn.execute(f'CREATE TABLE IF NOT EXISTS "{self.table}_columns" (pos INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)')
+        conn.commit()
+        self._conn = conn
+        self._count = conn.execute(f'SELECT COUNT(*) FROM "{self.table}"').fetchone()[0]
+        self._columns = dict.fromkeys(
+            name for (name,) in conn.execute(f'SELECT name FROM "{self.table}_columns" ORDER BY pos'))
+        if self._count and not self._columns:
+            # Bestand van vóór de kolomtabel: eenmalig opbouwen
+            for (data,) in conn.execute(f'SELECT data FROM "{self.table}" ORDER BY id'):
+                self._track_columns(conn, json.loads(data))
+            conn.commit()
+        return conn
+
+    def _wrote(self, n: int = 1):
+        """Commit volgens het tijd-of-aantal beleid."""
+        self._uncommitted += n
+        # Ook een genegeerde INSERT opent een transactie (met schrijflock) - zonder openstaande records direct sluiten
+        if (not self._uncommitted or self._uncommitted >= self.commit_every
+                or time.time() - self._last_commit >= self.commit_interval):
+            self._commit()
+
+    def _commit(self):
+        if self._conn is not None:
+            self._conn.commit()
+        self._uncommitted = 0
+        self._last_commit = time.time()
+
+    def _track_columns(self, conn, record: Dict):
+        for key in record:
+            if key not in self._columns:
+                self._columns[key] = None
+                conn.execute(f'INSERT OR IGNORE INTO "{self.table}_columns" (name) VALUES (?)', (key,))
+
+    def _insert(self, conn, record: Dict) -> bool:
+        url, naam, adres = record_key(record)
+        cursor = conn.execute(
+            f'INSERT OR IGNORE INTO "{self.table}" (url, naam, adres, data) VALUES (?, ?, ?, ?)',
+            (url, naam, adres, json.dumps(_clean(record), ensure_ascii=False, default=str))
+        )
+        if cursor.rowcount == 1:
+            self._count += 1
+            self._track_columns(conn, record)
+            return True
+        return False
+
+    # Lijst-achtige API
+
+    def append(self, record: Dict) -> bool:
+        """Voeg een record toe. Geeft False terug (en verandert niets) als het bedrijf er al in staat."""
+        with self._lock:
+            added = self._insert(self._connect(), record)
+            self._wrote(1 if added else 0)
+            return added
+
+    def extend(self, records: Iterable[Dict]) -> int:
+        """Voeg records toe in één transactie. Geeft het aantal nieuwe records terug."""
+        with self._lock:
+            conn = self._connect()
+            added = sum(1 for record in records if self._insert(conn, record))
+            self._commit()
+            return added
+
+    def upsert(self, record: Dict):
+        """
+        Voeg een record toe of werk de opgeslagen versie bij (bijv. na verrijking of profielcrawl).
+        Velden worden samengevoegd: wat al in de store staat en niet in record zit blijft behouden, zodat
+        verrijking en profielcrawl elkaars velden niet wissen.
+        """
+        url, naam, adres = record_key(record)
+        with self._lock:
+            conn = self._connect()
+            if url is not None:
+                row = conn.execute(f'SELECT id, data FROM "{self.table}" WHERE url = ?', (url,)).fetchone()
+            else:
+                row = conn.execute(f'SELECT id, data FROM "{self.table}" WHERE url IS NULL AND naam = ? AND adres = ?',
+                                   (naam, adres)).fetchone()
+            if row is None:
+                self._insert(conn, record)
+            else:
+                merged = json.loads(row[1])
+                merged.update(_clean(record))
+                self._track_columns(conn, record)
+                conn.execute(f'UPDATE "{self.table}" SET naam = ?, adres = ?, data = ? WHERE id = ?',
+                             (naam, adres, json.dumps(merged, ensure_ascii=False, default=str), row[0]))
+            self._wrote()
+
+    def upsert_many(self, records: Iterable[Dict]):
+        """Upsert een reeks records (bijv. na het crawlen van de profielen)."""
+        with self._lock:
+            for record in records:
+                self.upsert(record)
+            self._commit()
+
+    @property
+    def columns(self) -> List[str]:
+        """Alle kolommen die in minstens één record voorkomen, in volgorde van eerste voorkomen."""
+        with self._lock:
+            return list(self._columns)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Loop in volgorde van toevoegen door de records, in batches (geen lock tussen de batches)."""
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._connect().execute(
+                    f'SELECT id, data FROM "{self.table}" WHERE id > ? ORDER BY id LIMIT ?', (last_id, ITER_BATCH_SIZE)
+                ).fetchall()
+            if not rows:
+                return
+            for row_id, data in rows:
+                yield json.loads(data)
+            last_id = rows[-1][0]
+
+    def __getitem__(self, index: int) -> Dict:
+        with self._lock:
+            if index < 0:
+                index += self._count
+            if not 0 <= index < self._count:
+                raise IndexError("CompanyStore index buiten bereik")
+            row = self._connect().execute(
+                f'SELECT data FROM "{self.table}" ORDER BY id LIMIT 1 OFFSET ?', (index,)
+            ).fetchone()
+        return json.loads(row[0])
+
+    # Dedupe
+
+    def has_url(self, url: str) -> bool:
+        if not url:
+            return False
+        with self._lock:
+            return self._connect().execute(
+                f'SELECT 1 FROM "{self.table}" WHERE url = ? LIMIT 1', (url,)
+            ).fetchone() is not None
+
+    def has_key(self, naam: str, adres: str) -> bool:
+        with self._lock:
+            return self._connect().execute(
+                f'SELECT 1 FROM "{self.table}" WHERE naam = ? AND adres = ? LIMIT 1', (naam or '', adres or '')
+            ).fetchone() is not None
+
+    def __contains__(self, record: Dict) -> bool:
+        """Staat dit bedrijf (volgens record_key) al in de store?"""
+        url, naam, adres = record_key(record)
+        return self.has_url(url) if url is not None else self.has_key(naam, adres)
+
+    # Beheer
+
+    def clear(self):
+        """Verwijder alle records uit deze tabel (nieuwe scrape zonder bestaande data)."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(f'DELETE FROM "{self.table}"')
+            conn.execute(f'DELETE FROM "{self.table}_columns"')
+            self._count = 0
+            self._columns = {}
+            self._commit()
+
+    def flush(self):
+        """Commit wat nog openstaat (aanroepen na elke pagina, zodat er geen transactie open blijft staan)."""
+        with self._lock:
+            if self._conn is not None and self._conn.in_transaction:
+                self._commit()
+
+    def close(self):
+        """Commit en sluit de verbinding. Een volgende aanroep opent hem gewoon opnieuw."""
+        with self._lock:
+            if self._conn is not None:
+                self._commit()
+                self._conn.close()
+                self._conn = None
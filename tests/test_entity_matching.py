@@ -0,0 +1,79 @@
+"""Normalisatie en fuzzy matching van Ad Hoc Data kandidaten (entity_matching.py)."""
+
+import pytest
+
+from entity_matching import best_match, best_matches, candidate_key, normalize_name, parse_address, score_pairs
+
+
+@pytest.mark.parametrize('name, expected', [
+    ("Elektro Jansen B.V.", "elektro jansen"),
+    ("Elektro Jansen BV", "elektro jansen"),
+    ("Bouwbedrijf de Vries v.o.f.", "bouwbedrijf de vries"),
+    ("Café Müller & Zn.", "cafe muller zn"),
+    ("Stichting Groen", "groen"),
+    ("", ""),
+])
+def test_normalize_name(name, expected):
+    assert normalize_name(name) == expected
+
+
+@pytest.mark.parametrize('address, expected', [
+    ("Dorpsstraat 12a, 1234 ab Utrecht", ("1234AB", "12A", "dorpsstraat utrecht")),
+    ("Dorpsstraat 12-3, 1234AB Utrecht", ("1234AB", "12-3", "dorpsstraat utrecht")),
+    # Het getal in de straatnaam is geen huisnummer
+    ("2e Jan Steenstraat 5", ("", "5", "2e jan steenstraat")),
+    ("2e Jan Steenstraat 5, 1072 AB Amsterdam", ("1072AB", "5", "2e jan steenstraat amsterdam")),
+    ("Utrecht", ("", "", "utrecht")),
+    ("", ("", "", "")),
+])
+def test_parse_address(address, expected):
+    assert parse_address(address) == expected
+
+
+def test_candidate_key_adds_postcode_and_city():
+    candidate = {'naam': "Elektro Jansen B.V.", 'adres': "Dorpsstraat 12", 'postcode': "1234AB", 'plaats': "Utrecht"}
+    assert candidate_key(candidate) == ("Elektro Jansen B.V.", "Dorpsstraat 12, 1234AB, Utrecht")
+
+
+def test_exact_match_scores_one():
+    scores = score_pairs([("Elektro Jansen", "Dorpsstraat 12, 1234 AB Utrecht")],
+                         [("Elektro Jansen B.V.", "Dorpsstraat 12, 1234AB Utrecht")])
+    assert scores['score'][0] == pytest.approx(1.0)
+    assert scores['match'][0]
+
+
+def test_city_only_address_matches_full_address():
+    candidates = [{'naam': "Elektro Jansen", 'adres': "Dorpsstraat 12, Utrecht"}]
+    best, score = best_match("Elektro Jansen", "Utrecht", candidates)
+    assert best == 0
+    assert score >= 0.6
+
+
+def test_other_city_does_not_match():
+    candidates = [{'naam': "Elektro Jansen", 'adres': "Dorpsstraat 12, Amsterdam"}]
+    assert best_match("Elektro Jansen", "Utrecht", candidates)[0] is None
+
+
+def test_different_postcode_does_not_match():
+    candidates = [{'naam': "Elektro Jansen", 'adres': "Dorpsstraat 12, 9999 ZZ Groningen"}]
+    assert best_match("Elektro Jansen", "Dorpsstraat 12, 1234 AB Utrecht", candidates)[0] is None
+
+
+def test_best_match_picks_the_right_candidate():
+    candidates = [
+        {'naam': "Installatiebedrijf Pietersen", 'adres': "Kerkweg 1, 1234 AB Utrecht"},
+        {'naam': "Jansen Elektrotechniek", 'adres': "Dorpsstraat 12, 1234 AB Utrecht"},
+        {'naam': "Elektro Jansen B.V.", 'adres': "Dorpsstraat 12, 1234 AB Utrecht"},
+    ]
+    assert best_match("Elektro Jansen", "Dorpsstraat 12, 1234 AB Utrecht", candidates)[0] == 2
+
+
+def test_best_matches_per_company():
+    queries = [("Elektro Jansen", "Dorpsstraat 12, 1234 AB Utrecht"), ("Schilder Bakker", "Utrecht")]
+    candidate_lists = [
+        [{'naam': "Elektro Jansen", 'adres': "Dorpsstraat 12, 1234 AB Utrecht"}],
+        [],
+    ]
+    results = best_matches(queries, candidate_lists)
+    assert results[0][0] == 0
+    assert results[1] == (None, 0.0)
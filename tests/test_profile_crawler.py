@@ -0,0 +1,153 @@
+"""
+Profielpagina parser (trustoo_parser.parse_profile_page) en ProfileCrawler tegen een lokale
+stand-in server (http.server op 127.0.0.1): checkpoint, hervatten en samenvoegen.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from profile_crawler import ProfileCrawler
+from trustoo_parser import parse_profile_page
+
+JSON_LD_PAGE = """<html><head>
+<meta name="description" content="Elektro Jansen op Trustoo">
+<script type="application/ld+json">{"@context": "https://schema.org", "@graph": [
+  {"@type": "WebPage", "name": "Elektro Jansen"},
+  {"@type": ["LocalBusiness", "Electrician"], "name": "Elektro Jansen",
+   "description": "Erkend installateur sinds 2010.",
+   "makesOffer": [{"itemOffered": {"name": "Groepenkast vervangen"}}, {"itemOffered": {"name": "Laadpaal"}}],
+   "hasCredential": [{"name": "InstallQ"}],
+   "aggregateRating": {"ratingValue": 4.8, "reviewCount": 23},
+   "review": [{"author": {"name": "Piet"}, "reviewRating": {"ratingValue": 5},
+               "datePublished": "2024-05-01", "reviewBody": " Snel en netjes. "}]}
+]}</script>
+</head><body><h1>Elektro Jansen</h1></body></html>"""
+
+SECTION_PAGE = """<html><head><meta name="description" content="Schildersbedrijf Bakker uit Utrecht"></head>
+<body>
+<h2>Over ons</h2><p>Familiebedrijf.</p>
+<h2>Onze diensten</h2><div><ul><li>Binnenschilderwerk</li><li>Buitenschilderwerk</li><li style="display:none">Verborgen</li></ul></div>
+<h3>Keurmerken</h3><ul><li>Erkend Schildersbedrijf</li></ul>
+</body></html>"""
+
+# Foutpagina / consent wall: alleen een meta description
+META_ONLY_PAGE = """<html><head><meta name="description" content="Vind de beste vakman op Trustoo"></head>
+<body><h1>Even geduld...</h1></body></html>"""
+
+
+def test_parse_profile_page_json_ld():
+    details = parse_profile_page(JSON_LD_PAGE)
+    assert details['BeschrijvingVolledig'] == "Erkend installateur sinds 2010."
+    assert details['Diensten'] == "Groepenkast vervangen; Laadpaal"
+    assert details['Certificeringen'] == "InstallQ"
+    assert details['AantalReviewsProfiel'] == "23"
+    assert json.loads(details['Reviews']) == [
+        {'auteur': "Piet", 'score': 5, 'datum': "2024-05-01", 'tekst': "Snel en netjes."}]
+
+
+def test_parse_profile_page_section_fallback():
+    details = parse_profile_page(SECTION_PAGE)
+    assert details['Diensten'] == "Binnenschilderwerk; Buitenschilderwerk"
+    assert details['Certificeringen'] == "Erkend Schildersbedrijf"
+    # Meta description als beschrijving, want de pagina heeft echte profieldata
+    assert details['BeschrijvingVolledig'] == "Schildersbedrijf Bakker uit Utrecht"
+    assert details['Reviews'] == ''
+
+
+def test_parse_profile_page_meta_only_has_no_details():
+    assert not any(parse_profile_page(META_ONLY_PAGE).values())
+    assert not any(parse_profile_page('').values())
+
+
+PAGES = {
+    '/profiel/jansen/': JSON_LD_PAGE,
+    '/profiel/bakker/': SECTION_PAGE,
+    '/profiel/consent/': META_ONLY_PAGE,
+}
+
+
+class ProfileHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append(self.path)
+        page = PAGES.get(self.path)
+        if page is None:
+            self.send_error(404)
+            return
+        body = page.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), ProfileHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    ProfileHandler.requests_seen = []
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_crawler(checkpoint_file):
+    return ProfileCrawler(max_workers=2, checkpoint_file=str(checkpoint_file), request_delay=(0, 0),
+                          browser_fallback=False)
+
+
+def make_companies(base):
+    return [
+        {'Naam': "Elektro Jansen", 'ProfielURL': f"{base}/profiel/jansen/"},
+        {'Naam': "Schildersbedrijf Bakker", 'ProfielURL': f"{base}/profiel/bakker/"},
+        {'Naam': "Consent", 'ProfielURL': f"{base}/profiel/consent/"},
+        {'Naam': "Bestaat niet", 'ProfielURL': f"{base}/profiel/weg/"},
+        {'Naam': "Zonder profiel", 'ProfielURL': ''},
+    ]
+
+
+def test_crawl_merges_details_and_checkpoints_only_real_profiles(server, tmp_path):
+    checkpoint = tmp_path / "profielen.jsonl"
+    companies = make_companies(server)
+    crawler = make_crawler(checkpoint)
+    crawler.crawl(companies)
+
+    assert [c['ProfielGecrawld'] for c in companies] == ['Ja', 'Ja', 'Nee', 'Nee', 'Nee']
+    assert companies[0]['Diensten'] == "Groepenkast vervangen; Laadpaal"
+    assert companies[1]['Certificeringen'] == "Erkend Schildersbedrijf"
+    # Niet gecrawlde profielen krijgen lege detailvelden
+    assert companies[2]['BeschrijvingVolledig'] == ''
+    assert companies[4]['Diensten'] == ''
+    assert (crawler.http_crawled, crawler.failed) == (2, 2)
+
+    entries = [json.loads(line) for line in checkpoint.read_text(encoding='utf-8').splitlines()]
+    assert sorted(entry['ProfielURL'] for entry in entries) == [
+        f"{server}/profiel/bakker/", f"{server}/profiel/jansen/"]
+
+
+def test_resume_from_checkpoint(server, tmp_path):
+    checkpoint = tmp_path / "profielen.jsonl"
+    make_crawler(checkpoint).crawl(make_companies(server))
+    # Half geschreven regel na een crash wordt overgeslagen
+    with open(checkpoint, 'a', encoding='utf-8') as f:
+        f.write('{"ProfielURL": "http://')
+
+    ProfileHandler.requests_seen = []
+    companies = make_companies(server)
+    resumed = make_crawler(checkpoint)
+    resumed.crawl(companies)
+
+    # Alleen de profielen zonder details worden opnieuw opgehaald
+    assert sorted(ProfileHandler.requests_seen) == ['/profiel/consent/', '/profiel/weg/']
+    assert resumed.http_crawled == 0
+    assert companies[0]['AantalReviewsProfiel'] == "23"
+    assert [c['ProfielGecrawld'] for c in companies] == ['Ja', 'Ja', 'Nee', 'Nee', 'Nee']
@@ -0,0 +1,164 @@
+"""
+TrustooHttpScraper tegen een lokale stand-in server (http.server op 127.0.0.1).
+Pagina's komen als JSON payload of als HTML met bedrijfskaarten, net als de echte paginatie.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from trustoo_http import TrustooHttpScraper, create_session
+
+CATEGORY_URL = "https://trustoo.nl/utrecht/elektricien/"
+
+
+def _company(pro_id):
+    return {
+        'proId': pro_id,
+        'companyName': f"Bedrijf {pro_id}",
+        'address': f"Dorpsstraat {pro_id}, 3511 AA Utrecht",
+        'profileUrl': f"/utrecht/elektricien/bedrijf-{pro_id}/",
+    }
+
+
+def _card_html(company):
+    return (f'<div id="_pro_{company["proId"]}" data-pro-id="{company["proId"]}">'
+            f'<h3 class="companyName">{company["companyName"]}</h3>'
+            f'<div class="proBullets"><div>{company["address"]}</div></div>'
+            f'<a href="{company["profileUrl"]}">Bekijk profiel</a></div>')
+
+
+# Per route de pro_id's per pagina; pagina's buiten de lijst zijn leeg (einde van de lijst)
+ROUTES = {
+    # Pagina 2 herhaalt pro_id 2 (overlap tussen "Toon meer" pagina's)
+    'json': [[1, 2, 3], [2, 4, 5], [6, 7], [8]],
+    'html': [[1, 2], [2, 3], [4]],
+    # Na pagina 1 alleen nog bedrijven die er al zijn
+    'herhaling': [[1, 2], [1, 2], [2, 1], [1], [9]],
+}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        route = parsed.path.strip('/')
+        page = int(parse_qs(parsed.query)['page'][0])
+        self.requests_seen.append((route, page))
+
+        pages = ROUTES.get(route.replace('.html', ''))
+        if pages is None:
+            self.send_error(404)
+            return
+        companies = [_company(pro_id) for pro_id in (pages[page - 1] if page <= len(pages) else [])]
+        if route.endswith('.html'):
+            body = f"<html><body>{''.join(_card_html(c) for c in companies)}</body></html>".encode('utf-8')
+            content_type = 'text/html; charset=utf-8'
+        else:
+            body = json.dumps({'results': companies}).encode('utf-8')
+            content_type = 'application/json'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    StandInHandler.requests_seen = []
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def no_enrichment(monkeypatch):
+    # Geen Ad Hoc Data lookups tijdens de tests
+    monkeypatch.setenv('AD_HOC_DATA_API_KEY', '')
+
+
+def make_scraper(server, route, tmp_path, load_existing=False, **kwargs):
+    port = server.server_address[1]
+    return TrustooHttpScraper(
+        load_existing=load_existing,
+        endpoint=f"http://127.0.0.1:{port}/{route}?page={{page}}",
+        session=create_session(retries=0),
+        request_delay=(0, 0),
+        work_dir=str(tmp_path),
+        **kwargs
+    )
+
+
+def names(scraper):
+    return [record['Naam'] for record in scraper.companies_data]
+
+
+def test_json_pagination_and_pro_id_dedupe(server, tmp_path):
+    scraper = make_scraper(server, 'json', tmp_path)
+    try:
+        scraper.scrape_category_page(CATEGORY_URL)
+        assert names(scraper) == [f"Bedrijf {i}" for i in range(1, 9)]
+        # Pagina 1 t/m 4 plus de lege pagina 5 (einde van de lijst)
+        assert [page for _, page in StandInHandler.requests_seen] == [1, 2, 3, 4, 5]
+        assert scraper.seen_pro_ids == {str(i) for i in range(1, 9)}
+        first = scraper.companies_data[0]
+        assert first['Adres'] == "Dorpsstraat 1, 3511 AA Utrecht"
+        assert first['ProfielURL'] == "https://trustoo.nl/utrecht/elektricien/bedrijf-1/"
+    finally:
+        scraper.close()
+
+
+def test_html_pages(server, tmp_path):
+    scraper = make_scraper(server, 'html.html', tmp_path)
+    try:
+        scraper.scrape_category_page(CATEGORY_URL)
+        assert names(scraper) == ["Bedrijf 1", "Bedrijf 2", "Bedrijf 3", "Bedrijf 4"]
+        assert scraper.seen_pro_ids == {'1', '2', '3', '4'}
+    finally:
+        scraper.close()
+
+
+def test_max_empty_pages(server, tmp_path):
+    scraper = make_scraper(server, 'herhaling', tmp_path, max_empty_pages=2)
+    try:
+        scraper.scrape_category_page(CATEGORY_URL)
+        # Pagina 2 en 3 leveren niets nieuws op - pagina 4 en 5 worden niet meer opgehaald
+        assert names(scraper) == ["Bedrijf 1", "Bedrijf 2"]
+        assert [page for _, page in StandInHandler.requests_seen] == [1, 2, 3]
+    finally:
+        scraper.close()
+
+
+def test_stop_callback_and_checkpoint_resume(server, tmp_path):
+    # Stop zodra pagina 2 binnen is (de callback wordt ook per bedrijf en tijdens het wachten gecontroleerd)
+    state = {}
+    scraper = make_scraper(server, 'json', tmp_path, stop_callback=lambda: len(state['scraper'].companies_data) >= 5)
+    state['scraper'] = scraper
+    try:
+        scraper.scrape_category_page(CATEGORY_URL)
+        assert scraper._was_stopped
+        assert names(scraper) == [f"Bedrijf {i}" for i in range(1, 6)]
+        assert scraper.load_checkpoint() == 1
+    finally:
+        scraper.close()
+
+    # Zelfde work_dir: records uit de store, verder vanaf pagina 3
+    StandInHandler.requests_seen = []
+    resumed = make_scraper(server, 'json', tmp_path, load_existing=True)
+    try:
+        resumed.scrape_category_page(CATEGORY_URL)
+        assert [page for _, page in StandInHandler.requests_seen] == [3, 4, 5]
+        assert names(resumed) == [f"Bedrijf {i}" for i in range(1, 9)]
+    finally:
+        resumed.close()
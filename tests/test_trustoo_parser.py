@@ -0,0 +1,72 @@
+"""Offline parsing van een opgeslagen Trustoo categoriepagina (trustoo_parser.py)."""
+
+import os
+
+import pytest
+
+from trustoo_parser import parse_companies_html, parse_company_cards
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'trustoo_category.html')
+BASE_URL = "https://trustoo.nl/utrecht/elektricien/"
+
+
+@pytest.fixture(scope='module')
+def page_html():
+    with open(FIXTURE, encoding='utf-8') as f:
+        return f.read()
+
+
+def test_cards_are_paired_with_their_pro_id(page_html):
+    total, parsed = parse_company_cards(page_html, BASE_URL)
+    assert total == 3
+    assert [pro_id for pro_id, _ in parsed] == ['101', '102', '103']
+
+
+def test_full_card(page_html):
+    _, parsed = parse_company_cards(page_html, BASE_URL)
+    assert parsed[0][1] == {
+        'Naam': "Elektro Jansen B.V.",
+        # Witruimte samengevoegd zoals Selenium's .text
+        'Adres': "Dorpsstraat 12, 3511 AA Utrecht",
+        # Het verborgen nummer wordt overgeslagen
+        'Telefoon': "030 123 45 67",
+        'TrustScore': "4,8",
+        # (999) staat in een span.hidden
+        'AantalReviews': "23",
+        # Icoonnamen (flash_on, local_offer) horen niet bij de labels
+        'Beschikbaarheid': "Snel beschikbaar, Gratis offerte",
+        'ProfielURL': "https://trustoo.nl/profiel/elektro-jansen/",
+        'JarenInBedrijf': "12 jaar in bedrijf",
+        'LaatsteReview': "Laatste review 3 dagen geleden",
+        'Beschrijving': "Erkend installateur voor groepenkasten en laadpalen.",
+    }
+
+
+def test_minimal_card_uses_defaults(page_html):
+    _, parsed = parse_company_cards(page_html, BASE_URL)
+    company = parsed[1][1]
+    assert company['Naam'] == "Installatiebedrijf De Vries"
+    assert company['Adres'] == "Kerkweg 1, 3603 CD Maarssen"
+    assert company['Telefoon'] == "Niet vermeld"
+    assert company['TrustScore'] == "N/A"
+    assert company['AantalReviews'] == "0"
+    assert company['Beschikbaarheid'] == "Niet vermeld"
+    assert company['ProfielURL'] == ""
+
+
+def test_absolute_profile_url_is_kept(page_html):
+    _, parsed = parse_company_cards(page_html, BASE_URL)
+    assert parsed[2][1]['ProfielURL'] == "https://trustoo.nl/bedrijf/bakker-elektra/"
+
+
+def test_skip_pro_ids(page_html):
+    total, parsed = parse_company_cards(page_html, BASE_URL, skip_pro_ids={'101', '103'})
+    # Het totaal telt alle kaarten, ook de overgeslagen
+    assert total == 3
+    assert [pro_id for pro_id, _ in parsed] == ['102']
+
+
+def test_parse_companies_html_and_empty_page(page_html):
+    assert [c['Naam'] for c in parse_companies_html(page_html, BASE_URL)] == [
+        "Elektro Jansen B.V.", "Installatiebedrijf De Vries", "Bakker Elektra"]
+    assert parse_company_cards("", BASE_URL) == (0, [])
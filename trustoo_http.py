@@ -0,0 +1,234 @@
+"""
+Browserloze Trustoo scraper.
+Bladert via HTTP door de "Toon meer" paginatie (requests.Session met keep-alive connection pool)
+in plaats van via een volledige Chrome. Levert hetzelfde record schema als TrustooPreciseScraper
+en gebruikt dezelfde dedupe sets, stop callback, checkpoint en opslag.
+
+Gebruik:
+    TRUSTOO_PAGINATION_ENDPOINT="https://trustoo.nl/{path}/?page={page}" \\
+        python trustoo_http.py https://trustoo.nl/nederland/elektricien/ [output.csv] [output.xlsx]
+"""
+
+import os
+import re
+import random
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from script import TrustooPreciseScraper, run_scraper
+from trustoo_parser import TRUSTOO_BASE_URL, parse_company_cards, parse_payload_companies
+
+# Paginatie endpoint (te overschrijven met TRUSTOO_PAGINATION_ENDPOINT of de endpoint parameter).
+# Placeholders: {url} (categorie URL), {base} (scheme + host), {path} (pad zonder domein),
+# {location}, {category} en {page}. Zonder {page} wordt ?page=N achter de URL gezet.
+DEFAULT_PAGINATION_ENDPOINT = "{url}?page={page}"
+
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/json, text/html;q=0.9, */*;q=0.8',
+    'Accept-Language': 'nl-NL,nl;q=0.9',
+}
+
+# Gedeelde sessie zodat meerdere scrapers (threads) dezelfde keep-alive verbindingen hergebruiken
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+def create_session(pool_size=10, retries=3):
+    """Maak een requests.Session met connection pool en retries op 429/5xx (Retry-After wordt gerespecteerd)."""
+    session = requests.Session()
+    retry = Retry(
+        total=retries,
+        backoff_factor=1,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(HTTP_HEADERS)
+    return session
+
+
+def get_shared_session(pool_size=10):
+    """Geef de proces-brede sessie terug (wordt bij eerste gebruik aangemaakt)."""
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = create_session(pool_size=pool_size)
+        return _shared_session
+
+
+class TrustooHttpScraper(TrustooPreciseScraper):
+    """Trustoo scraper zonder browser: haalt de paginatie direct op via HTTP."""
+
+    def __init__(self, load_existing=True, stop_callback=None, endpoint=None, session=None,
+                 pool_size=10, request_timeout=15, request_delay=(1, 2), max_empty_pages=2, work_dir=None,
+                 store=None):
+        """
+        Args:
+            load_existing: laad bestaande CSV/Excel data voor duplicaatcontrole
+            stop_callback: functie die True teruggeeft als er gestopt moet worden
+            endpoint: paginatie URL template (zie DEFAULT_PAGINATION_ENDPOINT). Standaard uit
+                TRUSTOO_PAGINATION_ENDPOINT; kan ook naar een lokale server wijzen om offline te ontwikkelen.
+            session: eigen requests.Session. Standaard de gedeelde sessie met connection pool.
+            pool_size: grootte van de connection pool van de gedeelde sessie
+            request_timeout: timeout per request in seconden
+            request_delay: (min, max) wachttijd tussen pagina's in seconden
+            max_empty_pages: stop na zoveel opeenvolgende pagina's zonder nieuwe bedrijven
+            work_dir: map voor checkpoint en tussentijdse bestanden (per job)
+            store: CompanyStore voor de records (standaard STORE_FILE in work_dir)
+        """
+        # Geen browser - inherited methodes checken self.driver voordat ze hem gebruiken
+        self.driver = None
+
+        self.endpoint = endpoint or os.environ.get('TRUSTOO_PAGINATION_ENDPOINT') or DEFAULT_PAGINATION_ENDPOINT
+        self.session = session or get_shared_session(pool_size)
+        self.request_timeout = request_timeout
+        self.request_delay = request_delay
+        self.max_empty_pages = max_empty_pages
+        self.pages_fetched = 0
+
+        self._init_state(load_existing=load_existing, stop_callback=stop_callback, work_dir=work_dir, store=store)
+
+    def build_page_url(self, url, page):
+        """Vul het paginatie endpoint in voor een categorie URL en paginanummer."""
+        match = re.match(r'(https?://[^/]+)/(.*?)/?$', url)
+        base = match.group(1) if match else TRUSTOO_BASE_URL.rstrip('/')
+        path = match.group(2) if match else ''
+        parts = [part for part in path.split('/') if part]
+
+        endpoint = self.endpoint
+        if '{page}' not in endpoint:
+            endpoint += ('&' if '?' in endpoint else '?') + 'page={page}'
+
+        return endpoint.format(
+            url=f"{base}/{path}/" if path else f"{base}/",
+            base=base,
+            path=path,
+            location='/'.join(parts[:-1]),
+            category=parts[-1] if parts else '',
+            page=page,
+        )
+
+    def fetch_page(self, page_url, base_url=TRUSTOO_BASE_URL):
+        """
+        Haal één pagina op en parse de bedrijven (JSON payload of HTML).
+
+        Returns:
+            (totaal aantal bedrijven op de pagina, [(pro_id, bedrijf_dict)] van nog niet geziene bedrijven)
+        """
+        response = self.session.get(page_url, timeout=self.request_timeout)
+        response.raise_for_status()
+        self.pages_fetched += 1
+
+        if 'json' in response.headers.get('Content-Type', ''):
+            payload = response.json()
+            pairs = parse_payload_companies(payload, base_url)
+            # Sommige endpoints sturen gerenderde HTML in de JSON mee
+            if not pairs and isinstance(payload, dict) and isinstance(payload.get('html'), str):
+                return parse_company_cards(payload['html'], base_url, skip_pro_ids=self.seen_pro_ids)
+            new_pairs = [(pro_id, company) for pro_id, company in pairs
+                         if not pro_id or pro_id not in self.seen_pro_ids]
+            return len(pairs), new_pairs
+
+        return parse_company_cards(response.text, base_url, skip_pro_ids=self.seen_pro_ids)
+
+    def scrape_category_page(self, url, max_additional_pages=None, save_interval=10, resume_from_checkpoint=True):
+        """Blader via HTTP door een Trustoo categorie met tussentijds opslaan."""
+        print(f"🌐 HTTP modus: {url}")
+        print(f"   Endpoint: {self.endpoint}")
+
+        base_match = re.match(r'https?://[^/]+/', url)
+        base_url = base_match.group(0) if base_match else TRUSTOO_BASE_URL
+
+        # Checkpoint = aantal "Toon meer" klikken, dus pagina 1 + klikken zijn al binnen
+        page = 1
+        if resume_from_checkpoint:
+            clicks = self.load_checkpoint()
+            if clicks > 0:
+                page = clicks + 2
+                print(f"📌 Hervatten vanaf pagina {page}")
+
+        empty_pages = 0
+        self.companies_data.commit_every = max(1, save_interval)
+
+        try:
+            while True:
+                if self.stop_callback and self.stop_callback():
+                    raise Exception("STOP_REQUESTED")
+
+                if max_additional_pages is not None and page - 1 > max_additional_pages:
+                    print(f"✅ Maximum van {max_additional_pages} extra pagina's bereikt")
+                    break
+
+                page_url = self.build_page_url(url, page)
+                try:
+                    total, pairs = self.fetch_page(page_url, base_url)
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    print(f"   ⚠️  Pagina {page} ophalen mislukt: {str(e)[:80]}")
+                    break
+
+                added_count = 0
+                for pro_id, company_info in pairs:
+                    if self.stop_callback and self.stop_callback():
+                        raise Exception("STOP_REQUESTED")
+                    if self._add_company(company_info, silent=True):
+                        added_count += 1
+                    # Pas na _add_company en met echte naam/adres als verwerkt markeren (zie _card_complete)
+                    if pro_id and self._card_complete(company_info):
+                        self.seen_pro_ids.add(pro_id)
+
+                self.companies_data.flush()
+                print(f"📄 Pagina {page}: {len(pairs)} nieuw van {total}, {added_count} toegevoegd, Totaal: {len(self.companies_data)}")
+
+                if total == 0:
+                    print("✅ Geen bedrijven meer - einde van de lijst bereikt")
+                    break
+
+                empty_pages = empty_pages + 1 if added_count == 0 else 0
+                if empty_pages >= self.max_empty_pages:
+                    print(f"✅ {empty_pages} pagina's zonder nieuwe bedrijven - gestopt")
+                    break
+
+                self.save_checkpoint(page - 1)
+
+                page += 1
+                self._sleep_with_stop_check(random.uniform(*self.request_delay))
+
+        except Exception as e:
+            if str(e) == "STOP_REQUESTED":
+                print("\n🛑 Stop aangevraagd - HTTP scraper stopt")
+                self._was_stopped = True
+            else:
+                print(f"❌ Fout tijdens HTTP scrapen: {e}")
+
+        print(f"📊 {self.pages_fetched} pagina's opgehaald via HTTP")
+        return self.companies_data
+
+
+def run_http_scraper(target_url, csv_filename=None, excel_filename=None, load_existing=True, max_additional_pages=None,
+                     title=None, stop_callback=None, endpoint=None):
+    """Voer de browserloze scraper uit met dezelfde opslag als run_scraper."""
+    scraper = TrustooHttpScraper(load_existing=load_existing, stop_callback=stop_callback, endpoint=endpoint)
+    return run_scraper(target_url, csv_filename, excel_filename, load_existing=load_existing,
+                       max_additional_pages=max_additional_pages, title=title, stop_callback=stop_callback,
+                       scraper=scraper)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Gebruik: python trustoo_http.py <categorie_url> [output.csv] [output.xlsx]")
+        sys.exit(1)
+
+    run_http_scraper(
+        sys.argv[1],
+        csv_filename=sys.argv[2] if len(sys.argv) > 2 else None,
+        excel_filename=sys.argv[3] if len(sys.argv) > 3 else None,
+        load_existing=False,
+    )
@@ -0,0 +1,480 @@
+"""
+Offline parser voor Trustoo categoriepagina's.
+Parset een volledige page_source (of opgeslagen HTML) en JSON payloads van de
+"Toon meer resultaten" requests naar dezelfde bedrijfsdicts als
+TrustooPreciseScraper.extract_company_info, zonder WebDriver.
+Daarnaast de detailvelden van een profielpagina (zie profile_crawler.py).
+"""
+
+import re
+import sys
+import json
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urljoin
+
+try:
+    from lxml import html as lxml_html
+except ImportError:  # lxml is optioneel - alleen nodig voor de "html" extractie mode
+    lxml_html = None
+
+
+# Elke bedrijfskaart heeft een unieke id die begint met "_pro_"
+CARD_SELECTOR = "div[id^='_pro_'][data-pro-id]"
+
+# Selector cascades - gedeeld door de WebDriver, JS en HTML extractie
+NAME_SELECTORS = [
+    "h3.proNameNew-module__5tvS2q__companyName",  # Originele selector
+    "h3[class*='companyName']",  # Meer flexibele selector
+    "h3[class*='proName']",  # Alternatief
+    "h2, h3",  # Fallback naar elke h2/h3
+    "a[href*='/profiel/']",  # Fallback naar link tekst
+]
+ADDRESS_XPATHS = [
+    # Nieuwe structuur: adres zit in ellipsis div binnen placeWrapper
+    ".//div[contains(@class, 'proBullets-module__JgvdTG__list')]//div[contains(@class, 'ellipsis-module__O8e_Ha__ellipsis')]",
+    # Alternatief: zoek naar div met place icon en dan de tekst ernaast
+    ".//div[contains(@class, 'proBullets-module__JgvdTG__list')]//div[contains(@class, 'placeWrapper')]//div[contains(text(), ',')]",
+    # Origineel: zoek naar div met komma in tekst
+    ".//div[contains(@class, 'proBullets-module__JgvdTG__list')]//div[contains(text(), ',')]",
+    # Meer flexibel
+    ".//div[contains(@class, 'proBullets')]//div[contains(text(), ',')]",
+    # Fallback
+    ".//*[contains(text(), ',') and string-length(text()) > 5]",
+]
+PHONE_XPATH = ".//div[contains(@class, 'proBullets-module__JgvdTG__list')]//div[contains(@class, 'underline')]"
+YEARS_XPATH = ".//div[contains(@class, 'proBullets-module__JgvdTG__list')]//div[contains(text(), 'jaar in bedrijf')]"
+SCORE_SELECTOR = "div.score-module__7oD7Ya__stars b"
+REVIEWS_SELECTOR = "div.score-module__7oD7Ya__stars small span:not(.hidden)"
+AVAILABILITY_SELECTOR = "div.profileLabels-module__6DVY6G__profileLabel span"
+PROFILE_LINK_SELECTOR = "a[href*='/profiel/'], a[href*='/bedrijf/']"
+LAST_REVIEW_SELECTOR = "span.proBullets-module__JgvdTG__lastReviewDate"
+DESCRIPTION_SELECTOR = "div[style*='-webkit-line-clamp:2'] p"
+
+# Material icon namen die als tekst in de profile labels staan
+ICON_TEXTS = ["local_offer", "flash_on", "grade"]
+
+TRUSTOO_BASE_URL = "https://trustoo.nl/"
+
+
+def build_company_record(name, address, phone, trust_score, num_reviews, availability,
+                         profile_url, years_in_business, last_review, description) -> Dict:
+    """Bouw het bedrijfsrecord - gedeeld door alle extractie modes zodat de velden identiek blijven."""
+    return {
+        'Naam': name,
+        'Adres': address,
+        'Telefoon': phone,
+        'TrustScore': trust_score,
+        'AantalReviews': num_reviews,
+        'Beschikbaarheid': ', '.join(availability) if availability else "Niet vermeld",
+        'ProfielURL': profile_url,
+        'JarenInBedrijf': years_in_business,
+        'LaatsteReview': last_review,
+        'Beschrijving': description[:200] + "..." if len(description) > 200 else description
+    }
+
+
+def _is_hidden(element) -> bool:
+    """Benader Selenium's zichtbaarheid: verborgen als het element of een voorouder verborgen is."""
+    while element is not None:
+        if element.get('hidden') is not None:
+            return True
+        if 'hidden' in (element.get('class') or '').split():
+            return True
+        style = (element.get('style') or '').replace(' ', '').lower()
+        if 'display:none' in style or 'visibility:hidden' in style:
+            return True
+        element = element.getparent()
+    return False
+
+
+def _text(element) -> str:
+    """Zichtbare tekst van een element, met witruimte samengevoegd zoals Selenium's .text."""
+    if element is None or _is_hidden(element):
+        return ""
+    return ' '.join(element.text_content().split())
+
+
+def _first_css(card, selector):
+    matches = card.cssselect(selector)
+    return matches[0] if matches else None
+
+
+def _first_xpath(card, xpath):
+    matches = card.xpath(xpath)
+    return matches[0] if matches else None
+
+
+def parse_company_card(card, base_url: str = TRUSTOO_BASE_URL) -> Dict:
+    """Parse één bedrijfskaart (lxml element) naar hetzelfde dict als extract_company_info."""
+    # 1. Bedrijfsnaam
+    name = "Niet gevonden"
+    for selector in NAME_SELECTORS:
+        name_text = _text(_first_css(card, selector))
+        if name_text and name_text != "Niet gevonden":
+            name = name_text
+            break
+
+    # 2. Adres
+    address = "Niet gevonden"
+    for selector in ADDRESS_XPATHS:
+        address_text = _text(_first_xpath(card, selector))
+        if address_text and ',' in address_text and len(address_text) > 5:
+            address = address_text
+            break
+
+    # 3. Telefoonnummer
+    phone = "Niet vermeld"
+    for element in card.xpath(PHONE_XPATH):
+        text = _text(element)
+        if any(char.isdigit() for char in text) and len(text.replace(' ', '')) >= 8:
+            phone = text
+            break
+
+    # 4. TrustScore
+    trust_score = "N/A"
+    score_element = _first_css(card, SCORE_SELECTOR)
+    if score_element is not None:
+        trust_score = _text(score_element)
+
+    # 5. Aantal reviews
+    num_reviews = "0"
+    match = re.search(r'\((\d+)\)', _text(_first_css(card, REVIEWS_SELECTOR)))
+    if match:
+        num_reviews = match.group(1)
+
+    # 6. Beschikbaarheid
+    availability = []
+    for element in card.cssselect(AVAILABILITY_SELECTOR):
+        text = _text(element)
+        if text and text not in ICON_TEXTS:
+            availability.append(text)
+
+    # 7. Link naar bedrijfspagina (absoluut, net als get_attribute('href'))
+    profile_url = ""
+    link_element = _first_css(card, PROFILE_LINK_SELECTOR)
+    if link_element is not None and link_element.get('href'):
+        profile_url = urljoin(base_url, link_element.get('href'))
+
+    return build_company_record(
+        name, address, phone, trust_score, num_reviews, availability, profile_url,
+        _text(_first_xpath(card, YEARS_XPATH)),
+        _text(_first_css(card, LAST_REVIEW_SELECTOR)),
+        _text(_first_css(card, DESCRIPTION_SELECTOR)),
+    )
+
+
+def parse_company_cards(page_html: str, base_url: str = TRUSTOO_BASE_URL,
+                        skip_pro_ids: Optional[Set[str]] = None) -> Tuple[int, List[Tuple[str, Dict]]]:
+    """
+    Parse de bedrijfskaarten uit een volledige Trustoo pagina, gekoppeld aan hun data-pro-id.
+
+    Args:
+        page_html: HTML van de pagina (driver.page_source of een opgeslagen bestand)
+        base_url: URL van de pagina, om relatieve profiel links absoluut te maken
+        skip_pro_ids: data-pro-id's die al verwerkt zijn - deze kaarten worden niet geparsed
+
+    Returns:
+        Tuple (totaal aantal kaarten op de pagina, lijst van (pro_id, bedrijfsdict))
+    """
+    if lxml_html is None:
+        raise ImportError("lxml is niet geïnstalleerd. Installeer met: pip install lxml cssselect")
+
+    if not page_html:
+        return 0, []
+
+    document = lxml_html.fromstring(page_html)
+    cards = document.cssselect(CARD_SELECTOR)
+    skip_pro_ids = skip_pro_ids or set()
+
+    parsed = []
+    for card in cards:
+        pro_id = card.get('data-pro-id')
+        if pro_id in skip_pro_ids:
+            continue
+        parsed.append((pro_id, parse_company_card(card, base_url)))
+    return len(cards), parsed
+
+
+def parse_companies_html(page_html: str, base_url: str = TRUSTOO_BASE_URL) -> List[Dict]:
+    """
+    Parse alle bedrijfskaarten uit een volledige Trustoo pagina.
+
+    Args:
+        page_html: HTML van de pagina (driver.page_source of een opgeslagen bestand)
+        base_url: URL van de pagina, om relatieve profiel links absoluut te maken
+
+    Returns:
+        Lijst van bedrijfsdicts in dezelfde vorm als extract_company_info
+    """
+    _, parsed = parse_company_cards(page_html, base_url)
+    return [company for _, company in parsed]
+
+
+# Mogelijke sleutels in de "Toon meer resultaten" JSON payload
+PAYLOAD_ID_KEYS = ['proId', 'pro_id', 'id', 'companyId', 'company_id']
+PAYLOAD_NAME_KEYS = ['companyName', 'company_name', 'name', 'displayName', 'title']
+PAYLOAD_URL_KEYS = ['profileUrl', 'profile_url', 'url', 'href', 'link']
+
+
+def _first_value(item: Dict, keys: List[str]):
+    """Eerste niet-lege waarde uit een dict voor een lijst van mogelijke sleutels."""
+    for key in keys:
+        value = item.get(key)
+        if value not in (None, '', [], {}):
+            return value
+    return None
+
+
+def _payload_address(item: Dict) -> str:
+    """Bouw een adres string ("Straat 1, 1234 AB Plaats") uit een JSON payload item."""
+    address = _first_value(item, ['address', 'adres', 'location', 'locatie'])
+    if isinstance(address, str):
+        return address.strip()
+
+    source = address if isinstance(address, dict) else item
+    street = _first_value(source, ['street', 'streetName', 'straat']) or ''
+    number = _first_value(source, ['houseNumber', 'number', 'huisnummer']) or ''
+    postcode = _first_value(source, ['postalCode', 'postcode', 'zipCode', 'zipcode']) or ''
+    city = _first_value(source, ['city', 'place', 'plaats', 'cityName']) or ''
+    street_part = f"{street} {number}".strip()
+    city_part = f"{postcode} {city}".strip()
+    return ', '.join(part for part in (street_part, city_part) if part)
+
+
+def _payload_labels(value) -> List[str]:
+    """Labels (beschikbaarheid e.d.) uit een lijst van strings of dicts."""
+    if not isinstance(value, list):
+        return [str(value)] if value else []
+    labels = []
+    for label in value:
+        if isinstance(label, dict):
+            label = _first_value(label, ['label', 'text', 'name', 'title'])
+        if label and str(label) not in ICON_TEXTS:
+            labels.append(str(label))
+    return labels
+
+
+def _looks_like_company(item) -> bool:
+    return (isinstance(item, dict)
+            and _first_value(item, PAYLOAD_NAME_KEYS) is not None
+            and _first_value(item, PAYLOAD_ID_KEYS + PAYLOAD_URL_KEYS) is not None)
+
+
+def _find_company_items(payload, depth: int = 0) -> List[Dict]:
+    """Zoek (recursief) de lijst met bedrijven in een JSON payload."""
+    if depth > 6:
+        return []
+    if isinstance(payload, list):
+        if payload and all(_looks_like_company(item) for item in payload):
+            return payload
+        items = []
+        for value in payload:
+            items.extend(_find_company_items(value, depth + 1))
+        return items
+    if isinstance(payload, dict):
+        items = []
+        for value in payload.values():
+            if isinstance(value, (list, dict)):
+                items.extend(_find_company_items(value, depth + 1))
+        return items
+    return []
+
+
+def parse_payload_company(item: Dict, base_url: str = TRUSTOO_BASE_URL) -> Dict:
+    """Zet één bedrijf uit een JSON payload om naar hetzelfde dict als extract_company_info."""
+    name = str(_first_value(item, PAYLOAD_NAME_KEYS) or "Niet gevonden").strip()
+    address = _payload_address(item) or "Niet gevonden"
+    phone = str(_first_value(item, ['phone', 'phoneNumber', 'telephone', 'telefoon']) or "Niet vermeld").strip()
+
+    score = _first_value(item, ['trustScore', 'trust_score', 'score', 'rating', 'averageRating'])
+    if isinstance(score, dict):
+        score = _first_value(score, ['value', 'score', 'average'])
+    trust_score = str(score) if score is not None else "N/A"
+
+    reviews = _first_value(item, ['reviewCount', 'reviewsCount', 'numberOfReviews', 'totalReviews', 'reviews'])
+    if isinstance(reviews, list):
+        reviews = len(reviews)
+    num_reviews = str(reviews) if isinstance(reviews, (int, float, str)) and reviews != '' else "0"
+
+    availability = _payload_labels(_first_value(item, ['labels', 'badges', 'availability', 'profileLabels']))
+
+    profile_url = _first_value(item, PAYLOAD_URL_KEYS) or ""
+    if profile_url:
+        profile_url = urljoin(base_url, str(profile_url))
+
+    years = _first_value(item, ['yearsInBusiness', 'years_in_business', 'yearsActive'])
+    years_in_business = f"{years} jaar in bedrijf" if isinstance(years, (int, float)) else str(years or "")
+
+    last_review = str(_first_value(item, ['lastReviewDate', 'last_review_date', 'lastReview']) or "")
+    description = str(_first_value(item, ['description', 'shortDescription', 'about', 'intro']) or "").strip()
+
+    return build_company_record(
+        name, address, phone, trust_score, num_reviews, availability,
+        profile_url, years_in_business, last_review, description
+    )
+
+
+def parse_payload_companies(payload, base_url: str = TRUSTOO_BASE_URL) -> List[Tuple[Optional[str], Dict]]:
+    """
+    Parse de bedrijven uit een JSON payload (bijv. de "Toon meer resultaten" XHR response).
+
+    Args:
+        payload: Gedecodeerde JSON (dict of list)
+        base_url: URL van de pagina, om relatieve profiel links absoluut te maken
+
+    Returns:
+        Lijst van (pro_id, bedrijfsdict); leeg als de payload geen bedrijvenlijst bevat
+    """
+    companies = []
+    for item in _find_company_items(payload):
+        pro_id = _first_value(item, PAYLOAD_ID_KEYS)
+        companies.append((str(pro_id) if pro_id is not None else None, parse_payload_company(item, base_url)))
+    return companies
+
+
+# Koppen van de detailsecties op een profielpagina (kleine letters, deel van de kop is genoeg)
+PROFILE_SECTION_HEADINGS = {
+    'Diensten': ['diensten', 'werkzaamheden', 'specialisaties', 'services'],
+    'Certificeringen': ['certificering', 'certificaten', 'keurmerk', 'erkenning', 'lidmaatschap'],
+}
+MAX_PROFILE_REVIEWS = 20
+
+
+def _json_ld_objects(document) -> List[Dict]:
+    """Alle schema.org objecten uit de JSON-LD blokken van een pagina (@graph en lijsten platgeslagen)."""
+    objects = []
+    for script in document.xpath("//script[@type='application/ld+json']"):
+        try:
+            data = json.loads(script.text_content())
+        except ValueError:
+            continue
+        stack = data if isinstance(data, list) else [data]
+        while stack:
+            item = stack.pop(0)
+            if isinstance(item, list):
+                stack.extend(item)
+            elif isinstance(item, dict):
+                if '@graph' in item:
+                    stack.extend(item['@graph'] if isinstance(item['@graph'], list) else [item['@graph']])
+                objects.append(item)
+    return objects
+
+
+def _ld_names(value) -> List[str]:
+    """Namen uit een JSON-LD waarde (string, dict met name, of lijst/ItemList daarvan)."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value.strip()]
+    if isinstance(value, list):
+        names = []
+        for item in value:
+            names.extend(_ld_names(item))
+        return names
+    if isinstance(value, dict):
+        for key in ('itemListElement', 'itemOffered'):
+            if key in value:
+                return _ld_names(value[key])
+        name = _first_value(value, ['name', 'description', 'credentialCategory'])
+        return [str(name).strip()] if name else []
+    return []
+
+
+def _section_items(document, keywords: List[str]) -> List[str]:
+    """Lijstitems onder de eerste kop (h2-h4) waarvan de tekst een van de keywords bevat."""
+    for heading in document.xpath("//h2 | //h3 | //h4"):
+        heading_text = heading.text_content().strip().lower()
+        if not any(keyword in heading_text for keyword in keywords):
+            continue
+        sibling = heading.getnext()
+        while sibling is not None and sibling.tag not in ('h2', 'h3', 'h4'):
+            items = [_text(li) for li in sibling.xpath("descendant-or-self::li")]
+            items = [item for item in items if item]
+            if items:
+                return items
+            sibling = sibling.getnext()
+    return []
+
+
+def parse_profile_page(page_html: str) -> Dict:
+    """
+    Parse de detailvelden van een Trustoo profielpagina.
+    Gebruikt eerst de JSON-LD (schema.org LocalBusiness), met de HTML secties als terugval.
+
+    Returns:
+        Dict met BeschrijvingVolledig, Diensten, Certificeringen, Reviews (JSON lijst) en AantalReviewsProfiel.
+        Velden die niet gevonden zijn blijven leeg; een pagina zonder JSON-LD bedrijf en zonder
+        diensten/certificeringen secties levert alleen lege velden op.
+    """
+    if lxml_html is None:
+        raise ImportError("lxml is niet geïnstalleerd. Installeer met: pip install lxml cssselect")
+
+    details = {'BeschrijvingVolledig': '', 'Diensten': '', 'Certificeringen': '', 'Reviews': '', 'AantalReviewsProfiel': ''}
+    if not page_html:
+        return details
+
+    document = lxml_html.fromstring(page_html)
+    business = next((obj for obj in _json_ld_objects(document)
+                     if 'review' in obj or 'aggregateRating' in obj or 'LocalBusiness' in str(obj.get('@type', ''))), {})
+
+    # Diensten en certificeringen
+    services = _ld_names(business.get('makesOffer')) + _ld_names(business.get('hasOfferCatalog')) + _ld_names(business.get('knowsAbout'))
+    credentials = _ld_names(business.get('hasCredential')) + _ld_names(business.get('award'))
+    services = services or _section_items(document, PROFILE_SECTION_HEADINGS['Diensten'])
+    credentials = credentials or _section_items(document, PROFILE_SECTION_HEADINGS['Certificeringen'])
+    details['Diensten'] = '; '.join(dict.fromkeys(services))
+    details['Certificeringen'] = '; '.join(dict.fromkeys(credentials))
+
+    # Volledige beschrijving. De meta description alleen als de pagina ook echt profieldata heeft -
+    # een foutpagina of consent wall heeft er ook een en zou anders als gecrawld profiel tellen
+    description = str(business.get('description') or '').strip()
+    if not description and (business or services or credentials):
+        meta = document.xpath("//meta[@name='description']/@content")
+        description = meta[0].strip() if meta else ''
+    details['BeschrijvingVolledig'] = description
+
+    # Reviews
+    reviews = business.get('review') or []
+    if isinstance(reviews, dict):
+        reviews = [reviews]
+    review_list = []
+    for review in reviews[:MAX_PROFILE_REVIEWS]:
+        if not isinstance(review, dict):
+            continue
+        author = review.get('author')
+        rating = review.get('reviewRating')
+        review_list.append({
+            'auteur': (author.get('name') if isinstance(author, dict) else author) or '',
+            'score': (rating.get('ratingValue') if isinstance(rating, dict) else rating) or '',
+            'datum': review.get('datePublished') or '',
+            'tekst': (review.get('reviewBody') or review.get('description') or '').strip(),
+        })
+    if review_list:
+        details['Reviews'] = json.dumps(review_list, ensure_ascii=False)
+
+    aggregate = business.get('aggregateRating')
+    if isinstance(aggregate, dict):
+        details['AantalReviewsProfiel'] = str(aggregate.get('reviewCount') or aggregate.get('ratingCount') or '')
+
+    return details
+
+
+def parse_companies_file(path: str, base_url: Optional[str] = None) -> List[Dict]:
+    """Parse een opgeslagen HTML snapshot van een Trustoo pagina."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_companies_html(f.read(), base_url or TRUSTOO_BASE_URL)
+
+
+# Her-parse opgeslagen HTML: python trustoo_parser.py pagina.html [output.csv]
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Gebruik: python trustoo_parser.py <pagina.html> [output.csv]")
+        sys.exit(1)
+
+    companies = parse_companies_file(sys.argv[1])
+    print(f"📋 {len(companies)} bedrijven geparsed uit {sys.argv[1]}")
+
+    if len(sys.argv) > 2:
+        import pandas as pd
+        pd.DataFrame(companies).to_csv(sys.argv[2], index=False, encoding='utf-8-sig')
+        print(f"💾 Opgeslagen in: {sys.argv[2]}")
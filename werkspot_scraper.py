@@ -3,52 +3,45 @@ import random
 import re
 import os
 import pandas as pd
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+from chrome_utils import ResourceBlocker, create_chrome_driver, read_performance_log, resolve_block_patterns
+from storage import CompanyStore
+from exporters import existing_columns, export_csv, export_excel, export_parquet
 
 class WerkspotScraper:
     """Werkspot scraper - volledig gescheiden van Trustoo code."""
     
-    def __init__(self, headless=True, load_existing=True, stop_callback=None):
-        """Initialiseer de scraper voor Werkspot."""
-        options = webdriver.ChromeOptions()
-        if headless:
-            options.add_argument('--headless')
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-        
-        # Railway/Server specifieke opties
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-gpu')
-        
-        # Blokkeer locatie-detectie
-        options.add_argument('--disable-geolocation')
-        options.add_experimental_option("prefs", {
-            "profile.default_content_setting_values.geolocation": 2,
-            "profile.default_content_setting_values.notifications": 2
-        })
-        
-        # Gebruik webdriver-manager voor automatische Chrome driver installatie
-        # Op Railway, gebruik chromium uit nixpacks
-        chrome_binary = os.environ.get('CHROME_BIN')
-        if chrome_binary and os.path.exists(chrome_binary):
-            options.binary_location = chrome_binary
-        
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=options)
+    # Standaard bestanden (binnen work_dir als die gezet is)
+    DEFAULT_CSV = "werkspot_elektriciens.csv"
+    DEFAULT_EXCEL = "werkspot_elektriciens.xlsx"
+    CHECKPOINT_FILE = "werkspot_checkpoint.txt"
+    STORE_FILE = "werkspot_bedrijven.sqlite"  # CompanyStore tijdens het scrapen (zie storage.py)
+    
+    def __init__(self, headless=True, load_existing=True, stop_callback=None, block_resources=True, driver=None, work_dir=None,
+                 store=None):
+        """Initialiseer de scraper voor Werkspot.
+        
+        block_resources: blokkeer afbeeldingen, fonts, media en trackers via CDP (zie chrome_utils).
+        driver: bestaande (warme) driver uit een BrowserPool; wordt niet door de scraper gesloten.
+        work_dir: map voor checkpoint en tussentijdse bestanden (per job). Standaard de huidige map.
+        store: eigen CompanyStore voor de records. Standaard STORE_FILE in work_dir (één bestand per job).
+        """
+        # Performance log aan om geblokkeerde requests te kunnen tellen
+        block_patterns = resolve_block_patterns(block_resources)
+        if driver is None:
+            self.driver = create_chrome_driver(headless=headless, performance_log=bool(block_patterns))
+            self._owns_driver = True
+        else:
+            self.driver = driver
+            self._owns_driver = False
         self.wait = WebDriverWait(self.driver, 10)
-        self.companies_data = []
         
-        # OPTIMALISATIE: Houd sets bij als instance variabelen
-        self.existing_urls = set()
-        self.existing_keys = set()
+        # Blokkeer resources die de extractor nooit gebruikt
+        self.resource_blocker = ResourceBlocker(self.driver, block_patterns)
+        self.resource_blocker.apply()
         
         # Checkpoint voor hervatten
         self.checkpoint_clicks = 0
@@ -59,29 +52,43 @@ class WerkspotScraper:
         # Flag om bij te houden of we gestopt zijn
         self._was_stopped = False
         
+        # Map voor checkpoint en tussentijdse bestanden
+        self.work_dir = work_dir
+        if work_dir:
+            os.makedirs(work_dir, exist_ok=True)
+        
+        # Bedrijven staan in een SQLite store (zie storage.py) met geïndexeerde dedupe; CSV/Excel pas bij de eindexport
+        self.companies_data = store if store is not None else CompanyStore(self._work_path(self.STORE_FILE))
+        self.existing_urls = self.companies_data.urls
+        self.existing_keys = self.companies_data.keys
+        
         # Laad bestaande data als die er is
         if load_existing:
             self.load_existing_data()
+        else:
+            self.companies_data.clear()
         
         # Mask automation
         self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
     
-    def load_existing_data(self, csv_file="werkspot_elektriciens.csv", excel_file="werkspot_elektriciens.xlsx"):
-        """Laad bestaande data vanuit CSV of Excel om te hervatten."""
+    def _work_path(self, filename):
+        """Pad van een werkbestand (checkpoint, tussentijdse saves) binnen work_dir."""
+        return os.path.join(self.work_dir, filename) if self.work_dir else filename
+    
+    def load_existing_data(self, csv_file=None, excel_file=None):
+        """Laad bestaande data om te hervatten: uit de store zelf, anders vanuit CSV of Excel."""
+        csv_file = csv_file or self._work_path(self.DEFAULT_CSV)
+        excel_file = excel_file or self._work_path(self.DEFAULT_EXCEL)
+        if len(self.companies_data) > 0:
+            print(f"✅ {len(self.companies_data)} bestaande bedrijven geladen vanuit {self.companies_data.path}")
+            return
+        
         try:
             # Probeer eerst CSV
             if os.path.exists(csv_file):
                 df = pd.read_csv(csv_file, encoding='utf-8-sig')
                 if not df.empty:
-                    self.companies_data = df.to_dict('records')
-                    # Vul de sets met bestaande data
-                    for company in self.companies_data:
-                        if company.get('ProfielURL'):
-                            self.existing_urls.add(company['ProfielURL'])
-                        naam = company.get('Naam', '') or ''
-                        adres = company.get('Adres', '') or ''
-                        if naam or adres:
-                            self.existing_keys.add((naam, adres))
+                    self.companies_data.extend(df.to_dict('records'))
                     print(f"✅ {len(self.companies_data)} bestaande bedrijven geladen vanuit {csv_file}")
                     if len(self.companies_data) > 0:
                         last_company = self.companies_data[-1]
@@ -96,15 +103,7 @@ class WerkspotScraper:
             if os.path.exists(excel_file):
                 df = pd.read_excel(excel_file)
                 if not df.empty:
-                    self.companies_data = df.to_dict('records')
-                    # Vul de sets met bestaande data
-                    for company in self.companies_data:
-                        if company.get('ProfielURL'):
-                            self.existing_urls.add(company['ProfielURL'])
-                        naam = company.get('Naam', '') or ''
-                        adres = company.get('Adres', '') or ''
-                        if naam or adres:
-                            self.existing_keys.add((naam, adres))
+                    self.companies_data.extend(df.to_dict('records'))
                     print(f"✅ {len(self.companies_data)} bestaande bedrijven geladen vanuit {excel_file}")
                     if len(self.companies_data) > 0:
                         last_company = self.companies_data[-1]
@@ -117,7 +116,7 @@ class WerkspotScraper:
         """Sla checkpoint op (aantal klikken)."""
         self.checkpoint_clicks = clicks
         try:
-            with open("werkspot_checkpoint.txt", "w") as f:
+            with open(self._work_path(self.CHECKPOINT_FILE), "w") as f:
                 f.write(str(clicks))
         except:
             pass
@@ -125,8 +124,9 @@ class WerkspotScraper:
     def load_checkpoint(self):
         """Laad checkpoint (aantal klikken)."""
         try:
-            if os.path.exists("werkspot_checkpoint.txt"):
-                with open("werkspot_checkpoint.txt", "r") as f:
+            checkpoint_file = self._work_path(self.CHECKPOINT_FILE)
+            if os.path.exists(checkpoint_file):
+                with open(checkpoint_file, "r") as f:
                     clicks = int(f.read().strip())
                     self.checkpoint_clicks = clicks
                     print(f"📌 Checkpoint geladen: was gebleven bij {clicks} klikken")
@@ -278,6 +278,8 @@ class WerkspotScraper:
     
     def scrape_category_page(self, url, max_additional_pages=None, save_interval=10, resume_from_checkpoint=True):
         """Scrape een Werkspot categoriepagina."""
+        self.companies_data.commit_every = max(1, save_interval)
+        
         # Navigeer naar de pagina
         self.driver.get(url)
         
@@ -405,12 +407,8 @@ class WerkspotScraper:
                     self._was_stopped = True
                     if len(self.companies_data) > 0:
                         try:
-                            temp_csv = f"scrapes/temp_stopped_{int(time.time())}.csv"
-                            temp_excel = f"scrapes/temp_stopped_{int(time.time())}.xlsx"
-                            os.makedirs("scrapes", exist_ok=True)
-                            self.save_to_csv(temp_csv, silent=True)
-                            self.save_to_excel(temp_excel, silent=True)
-                            print(f"✅ Bestanden opgeslagen")
+                            self.companies_data.flush()
+                            print(f"✅ {len(self.companies_data)} bedrijven veilig in: {self.companies_data.path}")
                         except Exception as save_err:
                             print(f"⚠️ Fout bij opslaan: {save_err}")
                     break
@@ -419,11 +417,6 @@ class WerkspotScraper:
                 if new_companies > 0:
                     print(f"✅ {new_companies} nieuwe bedrijven gevonden (totaal: {new_count_after})")
                 
-                # Tussentijds opslaan (stil)
-                if len(self.companies_data) > 0 and len(self.companies_data) % save_interval == 0:
-                    self.save_to_excel(silent=True)
-                    self.save_to_csv(silent=True)
-                
             except StaleElementReferenceException:
                 consecutive_failures += 1
                 if consecutive_failures >= max_failures:
@@ -444,6 +437,10 @@ class WerkspotScraper:
     def _collect_companies_from_page(self, silent=False):
         """Verzamel bedrijven van de huidige pagina."""
         try:
+            # Performance log legen en geblokkeerde requests tellen
+            if self.resource_blocker.active:
+                self.resource_blocker.observe(read_performance_log(self.driver))
+            
             # BELANGRIJK: Scroll eerst naar beneden om te zorgen dat ALLE content geladen is
             try:
                 # Scroll langzaam naar beneden om lazy loading te triggeren
@@ -544,15 +541,8 @@ class WerkspotScraper:
                         if key not in self.existing_keys and (naam or adres):
                             is_new = True
                     
-                    if is_new:
-                        self.companies_data.append(company_info)
-                        # Update de sets direct
-                        if company_info.get('ProfielURL'):
-                            self.existing_urls.add(company_info['ProfielURL'])
-                        naam = company_info.get('Naam', '') or ''
-                        adres = company_info.get('Adres', '') or ''
-                        if naam or adres:
-                            self.existing_keys.add((naam, adres))
+                    # append geeft False als de unieke indexes van de store een duplicaat zien
+                    if is_new and self.companies_data.append(company_info):
                         added_count += 1
                         
                         # Alleen tonen als niet silent
@@ -571,6 +561,9 @@ class WerkspotScraper:
                     skipped_count += 1
                     continue
             
+            # Pagina verwerkt - committen zodat er tot de volgende pagina geen transactie openstaat
+            self.companies_data.flush()
+            
             # ALTIJD totaal tonen (ook als silent, maar alleen als er iets is gebeurd)
             if not silent:
                 if added_count > 0:
@@ -589,46 +582,64 @@ class WerkspotScraper:
         except Exception as e:
             print(f"   ⚠️  Fout bij verzamelen bedrijven: {str(e)[:80]}")
     
-    def save_to_excel(self, filename="werkspot_elektriciens.xlsx", silent=False):
+    def save_to_excel(self, filename=None, silent=False):
         """Sla gegevens op in Excel."""
+        filename = filename or self._work_path(self.DEFAULT_EXCEL)
         if not self.companies_data:
             if not silent:
                 print("Geen gegevens om op te slaan.")
             return
         
-        df = pd.DataFrame(self.companies_data)
-        
         # Maak kolommen leesbaarder
         column_order = [
             'Naam', 'Adres', 'Telefoon', 'Rating', 'AantalReviews',
             'Beschrijving', 'ProfielURL'
         ]
         
-        # Alleen kolommen die bestaan
-        existing_columns = [col for col in column_order if col in df.columns]
-        df = df[existing_columns]
-        
-        df.to_excel(filename, index=False)
+        # Gestreamd schrijven - alleen kolommen die bestaan
+        columns = existing_columns(self.companies_data, column_order)
+        export_excel(self.companies_data, filename, columns=columns, silent=silent)
         if not silent:
             print(f"💾 {len(self.companies_data)} bedrijven opgeslagen in: {filename}")
         return filename
     
-    def save_to_csv(self, filename="werkspot_elektriciens.csv", silent=False):
+    def save_to_csv(self, filename=None, silent=False):
         """Sla gegevens op in CSV."""
+        filename = filename or self._work_path(self.DEFAULT_CSV)
+        if not self.companies_data:
+            if not silent:
+                print("Geen gegevens om op te slaan.")
+            return
+        
+        # In blokken uit de store, alle kolommen zoals voorheen de DataFrame export
+        export_csv(self.companies_data, filename, columns=self.companies_data.columns, silent=True)
+        if not silent:
+            print(f"💾 {len(self.companies_data)} bedrijven opgeslagen in: {filename}")
+        return filename
+    
+    def save_to_parquet(self, filename=None, silent=False, arrow_ipc=False):
+        """Sla gegevens op in Parquet (of Arrow IPC met arrow_ipc=True) met getypeerde kolommen. Vereist pyarrow."""
+        filename = filename or self._work_path(os.path.splitext(self.DEFAULT_CSV)[0] + (".arrow" if arrow_ipc else ".parquet"))
         if not self.companies_data:
             if not silent:
                 print("Geen gegevens om op te slaan.")
             return
         
-        df = pd.DataFrame(self.companies_data)
-        df.to_csv(filename, index=False, encoding='utf-8-sig')
+        export_parquet(self.companies_data, filename, columns=existing_columns(self.companies_data),
+                       arrow_ipc=arrow_ipc, silent=silent)
         if not silent:
             print(f"💾 {len(self.companies_data)} bedrijven opgeslagen in: {filename}")
         return filename
     
     def close(self):
         """Sluit de browser."""
+        self.companies_data.close()
         if self.driver:
+            if self.resource_blocker.active:
+                self.resource_blocker.observe(read_performance_log(self.driver))
+                self.resource_blocker.report()
+            if not self._owns_driver:
+                return  # Driver hoort bij een pool
             self.driver.quit()
             print("Browser gesloten.")
 